@@ -0,0 +1,239 @@
+import json
+import os
+import sys
+import numpy as np
+from flight_blackbox import BlackboxReader, HEADER_SIZE, RECORD
+AXES = ("roll", "pitch", "yaw")
+MOTORS = ("motor1", "motor2", "motor3", "motor4")
+SPECTRUM_CHANNELS = ("gyro_x", "gyro_y", "gyro_z", "accel_x", "accel_y", "accel_z")
+def blackbox_dtype(fields):
+    return np.dtype([(fields[0], "<f8")] + [(name, "<f4") for name in fields[1:-1]] + [(fields[-1], "<u4")])
+def iter_blackbox_chunks(directory, chunk_records=1000000, start=None, end=None, session=None):
+    reader = BlackboxReader(directory, session=session)
+    dtype = blackbox_dtype(reader.fields)
+    if dtype.itemsize != RECORD.size:
+        raise ValueError(f"黑匣子记录长度不匹配: {dtype.itemsize} != {RECORD.size}")
+    try:
+        for segment, lo, hi in reader.spans(start, end):
+            records = np.memmap(segment.path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(segment.count,))
+            for i in range(lo, hi, chunk_records):
+                chunk = records[i:min(i + chunk_records, hi)]
+                yield {name: chunk[name] for name in reader.fields}
+            del records
+    finally:
+        reader.close()
+def iter_csv_chunks(path, chunk_records=1000000):
+    with open(path, "r", encoding="utf-8") as f:
+        fields = f.readline().strip().split(",")
+        while True:
+            block = np.loadtxt(f, delimiter=",", max_rows=chunk_records, ndmin=2)
+            if block.size == 0:
+                break
+            yield {name: block[:, i] for i, name in enumerate(fields)}
+            if len(block) < chunk_records:
+                break
+def iter_chunks(source, chunk_records=1000000, start=None, end=None):
+    if os.path.isdir(source):
+        return iter_blackbox_chunks(source, chunk_records, start, end)
+    return iter_csv_chunks(source, chunk_records)
+def load_columns(source, names=None, start=None, end=None):
+    parts = {}
+    for chunk in iter_chunks(source, start=start, end=end):
+        for name in names or chunk:
+            parts.setdefault(name, []).append(np.asarray(chunk[name], dtype=np.float64))
+    return {name: np.concatenate(values) for name, values in parts.items()}
+class StepTracker:
+    def __init__(self, axis, band_fraction=0.02, min_band=0.5):
+        self.axis = axis
+        self.band_fraction = band_fraction
+        self.min_band = min_band
+        self.setpoint = None
+        self.start_time = None
+        self.band = min_band
+        self.sign = 1.0
+        self.last_outside = None
+        self.overshoot = 0.0
+        self.steps = []
+    def begin(self, t, setpoint, measured):
+        size = setpoint - measured
+        self.setpoint = setpoint
+        self.start_time = t
+        self.band = max(self.band_fraction * abs(size), self.min_band)
+        self.sign = 1.0 if size >= 0 else -1.0
+        self.size = abs(size)
+        self.last_outside = None
+        self.overshoot = 0.0
+    def finish(self):
+        if self.start_time is None:
+            return
+        settling = 0.0 if self.last_outside is None else self.last_outside - self.start_time
+        self.steps.append({"time": self.start_time, "size": self.size, "settling_time": settling, "overshoot": self.overshoot})
+    def feed(self, t, setpoint, measured):
+        if len(t) == 0:
+            return
+        changes = np.flatnonzero(setpoint[1:] != setpoint[:-1]) + 1
+        bounds = [0] + changes.tolist() + [len(t)]
+        if self.setpoint is None or setpoint[0] != self.setpoint:
+            self.finish()
+            self.begin(t[0], setpoint[0], measured[0])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if lo > 0:
+                self.finish()
+                self.begin(t[lo], setpoint[lo], measured[lo - 1])
+            error = self.setpoint - measured[lo:hi]
+            outside = np.flatnonzero(np.abs(error) > self.band)
+            if len(outside):
+                self.last_outside = t[lo + outside[-1]]
+            beyond = float(np.max(-error * self.sign)) if self.size > 0 else float(np.max(np.abs(error)))
+            self.overshoot = max(self.overshoot, beyond)
+    def result(self):
+        self.finish()
+        self.start_time = None
+        return self.steps
+class WelchSpectrum:
+    def __init__(self, nfft=1024):
+        self.nfft = nfft
+        self.window = np.hanning(nfft)
+        self.power = np.zeros(nfft // 2 + 1)
+        self.segments = 0
+        self.carry = np.zeros(0)
+    def feed(self, values):
+        data = np.concatenate([self.carry, np.asarray(values, dtype=np.float64)])
+        count = len(data) // self.nfft
+        if count:
+            frames = data[:count * self.nfft].reshape(count, self.nfft)
+            frames = (frames - frames.mean(axis=1, keepdims=True)) * self.window
+            self.power += np.sum(np.abs(np.fft.rfft(frames, axis=1)) ** 2, axis=0)
+            self.segments += count
+        self.carry = data[count * self.nfft:]
+    def result(self, sample_rate):
+        freqs = np.fft.rfftfreq(self.nfft, 1.0 / sample_rate)
+        if not self.segments:
+            return freqs, np.zeros_like(freqs)
+        psd = self.power / self.segments / (sample_rate * np.sum(self.window ** 2))
+        psd[1:-1] *= 2.0
+        return freqs, psd
+def analyze(source, chunk_records=1000000, nfft=1024, start=None, end=None):
+    samples = 0
+    dt_sum = 0.0
+    dt_count = 0
+    last_time = None
+    first_time = None
+    clipped_low = np.zeros(len(MOTORS))
+    clipped_high = np.zeros(len(MOTORS))
+    clipped_any = 0
+    term_sums = {axis: np.zeros(3) for axis in AXES}
+    has_terms = False
+    trackers = {axis: StepTracker(axis) for axis in AXES}
+    spectra = {name: WelchSpectrum(nfft) for name in SPECTRUM_CHANNELS}
+    for chunk in iter_chunks(source, chunk_records, start, end):
+        t = np.asarray(chunk["timestamp"], dtype=np.float64)
+        n = len(t)
+        if n == 0:
+            continue
+        if first_time is None:
+            first_time = t[0]
+        diffs = np.diff(t) if last_time is None else np.diff(t, prepend=last_time)
+        dt_sum += float(np.sum(diffs))
+        dt_count += len(diffs)
+        last_time = t[-1]
+        samples += n
+        motors = np.stack([np.asarray(chunk[m]) for m in MOTORS], axis=1)
+        low = motors <= 0.0
+        high = motors >= 1.0
+        clipped_low += low.sum(axis=0)
+        clipped_high += high.sum(axis=0)
+        clipped_any += int(np.count_nonzero((low | high).any(axis=1)))
+        for axis in AXES:
+            if f"{axis}_p" in chunk:
+                has_terms = True
+                term_sums[axis] += [float(np.sum(np.abs(chunk[f"{axis}_{k}"]), dtype=np.float64)) for k in "pid"]
+            if f"setpoint_{axis}" in chunk:
+                trackers[axis].feed(t, np.asarray(chunk[f"setpoint_{axis}"], dtype=np.float64), np.asarray(chunk[axis], dtype=np.float64))
+        for name in SPECTRUM_CHANNELS:
+            spectra[name].feed(chunk[name])
+    if not samples:
+        raise ValueError(f"没有可分析的记录: {source}")
+    sample_rate = dt_count / dt_sum if dt_sum > 0 else 0.0
+    report = {
+        "samples": samples,
+        "duration": float(last_time - first_time),
+        "sample_rate": sample_rate,
+        "motor_clip_pct": {
+            m: {"low": 100.0 * clipped_low[i] / samples, "high": 100.0 * clipped_high[i] / samples}
+            for i, m in enumerate(MOTORS)
+        },
+        "any_motor_clipped_pct": 100.0 * clipped_any / samples,
+        "steps": {axis: trackers[axis].result() for axis in AXES},
+        "spectra": {}
+    }
+    if has_terms:
+        report["pid_contribution_pct"] = {
+            axis: dict(zip(("p", "i", "d"), (100.0 * sums / sums.sum() if sums.sum() > 0 else sums).tolist()))
+            for axis, sums in term_sums.items()
+        }
+    if sample_rate > 0:
+        for name, spectrum in spectra.items():
+            freqs, psd = spectrum.result(sample_rate)
+            peak = int(np.argmax(psd[1:]) + 1) if len(psd) > 1 else 0
+            report["spectra"][name] = {"freqs": freqs, "psd": psd, "peak_hz": float(freqs[peak]), "rms": float(np.sqrt(np.sum(psd) * (freqs[1] - freqs[0])))}
+    return report
+def export(source, output, chunk_records=1000000):
+    if output.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("导出 Parquet 需要安装 pyarrow")
+        writer = None
+        try:
+            for chunk in iter_chunks(source, chunk_records):
+                table = pa.table({name: np.asarray(values) for name, values in chunk.items()})
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        np.savez(output, **load_columns(source))
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="飞行记录离线分析")
+    parser.add_argument("source", help="黑匣子日志目录或CSV日志文件")
+    parser.add_argument("--chunk", type=int, default=1000000, help="每次流式读取的记录数")
+    parser.add_argument("--fft-size", type=int, default=1024, help="频谱分析的FFT点数")
+    parser.add_argument("--start", type=float, default=None, help="起始时间戳（仅黑匣子）")
+    parser.add_argument("--end", type=float, default=None, help="结束时间戳（仅黑匣子）")
+    parser.add_argument("--export", default=None, help="导出列式数据（.npz 或 .parquet）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出分析结果（不含频谱数组）")
+    args = parser.parse_args()
+    if args.export:
+        export(args.source, args.export, args.chunk)
+        print(f"已导出到 {args.export}")
+        return 0
+    report = analyze(args.source, args.chunk, args.fft_size, args.start, args.end)
+    if args.json:
+        for spectrum in report["spectra"].values():
+            del spectrum["freqs"]
+            del spectrum["psd"]
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+    print(f"样本数 {report['samples']}，时长 {report['duration']:.2f}s，采样率 {report['sample_rate']:.1f}Hz")
+    print(f"电机饱和时间占比 {report['any_motor_clipped_pct']:.1f}%")
+    for motor, clip in report["motor_clip_pct"].items():
+        print(f"  {motor}: 下限 {clip['low']:.1f}%  上限 {clip['high']:.1f}%")
+    for axis in AXES:
+        steps = report["steps"][axis]
+        if steps:
+            worst = max(steps, key=lambda s: s["settling_time"])
+            print(f"{axis}: {len(steps)} 次设定值变化，最长稳定时间 {worst['settling_time']:.3f}s，最大超调 {max(s['overshoot'] for s in steps):.2f}°")
+    for axis, share in report.get("pid_contribution_pct", {}).items():
+        print(f"{axis} PID 贡献: P {share['p']:.1f}%  I {share['i']:.1f}%  D {share['d']:.1f}%")
+    for name, spectrum in report["spectra"].items():
+        print(f"{name}: 峰值频率 {spectrum['peak_hz']:.1f}Hz  RMS {spectrum['rms']:.4f}")
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,199 @@
+import json
+import sys
+import time
+import numpy as np
+from flight_batch import BatchSimulator, GAIN_KEYS, AXES, load_base_params, run_batch
+from flight_store import ParamStore, validate_params
+TUNING_RULES = {
+    "zn": (0.6, 0.5, 0.125),
+    "some_overshoot": (0.33, 0.5, 0.33),
+    "no_overshoot": (0.2, 0.5, 0.33),
+    "tyreus_luyben": (0.45, 2.2, 1 / 6.3)
+}
+class RelaySimulator(BatchSimulator):
+    def __init__(self, axes, amplitude=0.1, hysteresis=0.2, dt=0.01, seed=0, base_params=None):
+        super().__init__(scenarios=[{"target_roll": 0.0, "target_pitch": 0.0, "target_yaw": 0.0}] * len(axes), dt=dt, seed=seed, base_params=base_params)
+        self.rows = np.arange(len(axes))
+        self.axes = np.array([AXES.index(axis) for axis in axes])
+        self.amplitude = amplitude
+        self.hysteresis = hysteresis
+        self.relay = np.ones(len(axes))
+        self.output = np.zeros((len(axes), 3))
+        self.trace = []
+        self.switches = []
+    def compute_pid(self, attitude):
+        error = (self.target - attitude)[self.rows, self.axes]
+        self.relay = np.where(error > self.hysteresis, 1.0, np.where(error < -self.hysteresis, -1.0, self.relay))
+        self.output[self.rows, self.axes] = self.amplitude * self.relay
+        self.trace.append(attitude[self.rows, self.axes])
+        self.switches.append(self.relay.copy())
+        return self.output
+def oscillation(signal, relay, dt, skip=1):
+    rising = np.flatnonzero((relay[:-1] < 0) & (relay[1:] > 0))[skip:]
+    if len(rising) < 3:
+        raise ValueError("继电反馈没有产生稳定振荡，请增大继电幅值或延长试验时间")
+    periods = np.diff(rising) * dt
+    cycles = [signal[lo:hi] for lo, hi in zip(rising[:-1], rising[1:])]
+    amplitude = np.median([(c.max() - c.min()) / 2 for c in cycles])
+    return float(np.median(periods)), float(amplitude), len(periods)
+def relay_identify(axes=AXES, amplitude=0.1, hysteresis=0.2, duration=6.0, dt=0.01, seed=0, base_params=None):
+    sim = RelaySimulator(axes, amplitude, hysteresis, dt, seed, base_params)
+    sim.run(duration)
+    trace = np.array(sim.trace)
+    switches = np.array(sim.switches)
+    result = {}
+    for i, axis in enumerate(axes):
+        tu, a, cycles = oscillation(trace[:, i], switches[:, i], dt)
+        if a <= 0:
+            raise ValueError(f"{axis} 轴振幅为零，无法辨识")
+        ku = 4 * amplitude / (np.pi * a)
+        result[axis] = {"ku": float(ku), "tu": tu, "amplitude": a, "cycles": cycles}
+    return result
+def rule_gains(ku, tu, rule="zn"):
+    if rule not in TUNING_RULES:
+        raise ValueError(f"未知整定规则: {rule}")
+    kp_factor, ti_factor, td_factor = TUNING_RULES[rule]
+    kp = kp_factor * ku
+    return kp, kp / (ti_factor * tu), kp * td_factor * tu
+class StepCost:
+    def __init__(self, axis, base_params, step=10.0, duration=3.0, dt=0.01, seed=0, overshoot_weight=1.0, saturation_weight=0.5, settling_weight=1.0):
+        self.axis = axis
+        self.keys = tuple(f"{axis}_{k}" for k in ("kp", "ki", "kd"))
+        self.base = dict(base_params)
+        self.scenario = {"target_roll": 0.0, "target_pitch": 0.0, "target_yaw": 0.0, f"target_{axis}": step,
+                         "initial_roll": 0.0, "initial_pitch": 0.0, "initial_yaw": 0.0}
+        self.step = abs(step)
+        self.duration = duration
+        self.dt = dt
+        self.seed = seed
+        self.overshoot_weight = overshoot_weight
+        self.saturation_weight = saturation_weight
+        self.settling_weight = settling_weight
+        self.evaluations = 0
+        self.batches = 0
+    def __call__(self, candidates):
+        candidates = np.atleast_2d(candidates)
+        gains = {key: candidates[:, i] for i, key in enumerate(self.keys)}
+        for key in GAIN_KEYS:
+            if key not in gains:
+                gains[key] = np.full(len(candidates), float(self.base[key]))
+        metrics = run_batch(gains, self.scenario, self.duration, self.dt, self.seed, base_params=self.base)
+        self.evaluations += len(candidates)
+        self.batches += 1
+        m = metrics[self.axis]
+        cost = (m["iae"] / self.step + self.overshoot_weight * m["overshoot"] / self.step
+                + self.settling_weight * m["settling_time"] / self.duration + self.saturation_weight * metrics["saturation"])
+        return np.where(np.isfinite(cost), cost, np.inf), metrics
+def nelder_mead(cost, x0, lower, upper, initial_step=0.5, max_evals=200, xtol=1e-3, ftol=1e-4):
+    n = len(x0)
+    clip = lambda x: np.clip(x, lower, upper)
+    simplex = np.array([clip(x0)] + [clip(x0 + initial_step * np.eye(n)[i] * np.maximum(np.abs(x0), 1e-3)) for i in range(n)])
+    values = cost(simplex)[0]
+    evaluations = len(simplex)
+    history = [float(values.min())]
+    iterations = 0
+    converged = False
+    while evaluations < max_evals:
+        order = np.argsort(values)
+        simplex = simplex[order]
+        values = values[order]
+        spread = np.max(np.abs(simplex[1:] - simplex[0]) / np.maximum(np.abs(simplex[0]), 1e-3))
+        if values[-1] - values[0] <= ftol * max(abs(values[0]), 1e-12) and spread <= xtol:
+            converged = True
+            break
+        iterations += 1
+        centroid = simplex[:-1].mean(axis=0)
+        worst = simplex[-1]
+        candidates = np.array([clip(centroid + (centroid - worst)), clip(centroid + 2.0 * (centroid - worst)),
+                               clip(centroid + 0.5 * (centroid - worst)), clip(centroid - 0.5 * (centroid - worst))])
+        reflected, expanded, outside, inside = cost(candidates)[0]
+        evaluations += len(candidates)
+        if reflected < values[0]:
+            simplex[-1], values[-1] = (candidates[1], expanded) if expanded < reflected else (candidates[0], reflected)
+        elif reflected < values[-2]:
+            simplex[-1], values[-1] = candidates[0], reflected
+        elif reflected < values[-1] and outside <= reflected:
+            simplex[-1], values[-1] = candidates[2], outside
+        elif reflected >= values[-1] and inside < values[-1]:
+            simplex[-1], values[-1] = candidates[3], inside
+        else:
+            simplex[1:] = clip(simplex[0] + 0.5 * (simplex[1:] - simplex[0]))
+            values[1:] = cost(simplex[1:])[0]
+            evaluations += n
+        history.append(float(values.min()))
+    best = int(np.argmin(values))
+    return simplex[best], float(values[best]), {"iterations": iterations, "evaluations": evaluations, "converged": converged, "history": history}
+def tune_axis(axis, relay, base_params, rule="zn", step=10.0, duration=3.0, dt=0.01, seed=0, max_evals=200, bound_factor=10.0):
+    start = time.perf_counter()
+    initial = np.array(rule_gains(relay["ku"], relay["tu"], rule))
+    cost = StepCost(axis, base_params, step, duration, dt, seed)
+    initial_cost, _ = cost(initial)
+    scale = np.maximum(initial, 1e-4)
+    x, best_cost, info = nelder_mead(lambda xs: cost(xs * scale), np.ones(3), np.zeros(3), np.full(3, bound_factor), max_evals=max_evals)
+    tuned = x * scale
+    final_cost, metrics = cost(tuned)
+    m = metrics[axis]
+    return {
+        "relay": relay,
+        "rule": rule,
+        "initial_gains": dict(zip(cost.keys, initial.tolist())),
+        "tuned_gains": dict(zip(cost.keys, tuned.tolist())),
+        "initial_cost": float(initial_cost[0]),
+        "final_cost": float(final_cost[0]),
+        "iterations": info["iterations"],
+        "evaluations": cost.evaluations,
+        "batches": cost.batches,
+        "converged": info["converged"],
+        "cost_history": info["history"],
+        "settling_time": float(m["settling_time"][0]),
+        "overshoot_pct": float(m["overshoot_pct"][0]),
+        "iae": float(m["iae"][0]),
+        "elapsed": time.perf_counter() - start
+    }
+def autotune(axes=AXES, base_params=None, rule="zn", relay_amplitude=0.1, hysteresis=0.2, step=10.0, duration=3.0, dt=0.01, seed=0, max_evals=200):
+    base_params = load_base_params() if base_params is None else base_params
+    relay = relay_identify(axes, relay_amplitude, hysteresis, dt=dt, seed=seed, base_params=base_params)
+    return {axis: tune_axis(axis, relay[axis], base_params, rule, step, duration, dt, seed, max_evals) for axis in axes}
+def tuned_updates(report):
+    return validate_params({key: round(value, 6) for result in report.values() for key, value in result["tuned_gains"].items()})
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="PID增益自动整定（继电反馈辨识 + Nelder-Mead 优化）")
+    parser.add_argument("--axes", nargs="+", choices=AXES, default=list(AXES), help="要整定的轴")
+    parser.add_argument("--rule", choices=sorted(TUNING_RULES), default="zn", help="由临界增益和周期计算初始增益的规则")
+    parser.add_argument("--relay-amplitude", type=float, default=0.1, help="继电输出幅值（电机指令单位）")
+    parser.add_argument("--hysteresis", type=float, default=0.2, help="继电滞环宽度（度）")
+    parser.add_argument("--step", type=float, default=10.0, help="评价用的阶跃幅值（度）")
+    parser.add_argument("--duration", type=float, default=3.0, help="每次阶跃仿真时长（秒）")
+    parser.add_argument("--dt", type=float, default=0.01, help="仿真步长（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（所有评价使用同一噪声序列）")
+    parser.add_argument("--max-evals", type=int, default=200, help="每个轴最多仿真的增益组数")
+    parser.add_argument("--report", default=None, help="把完整整定报告写入JSON文件")
+    parser.add_argument("--dry-run", action="store_true", help="只输出结果，不写入 flight_params.json")
+    parser.add_argument("--broadcast", action="store_true", help="写入后把新增益整批发送给正在运行的飞控")
+    args = parser.parse_args()
+    report = autotune(args.axes, None, args.rule, args.relay_amplitude, args.hysteresis, args.step, args.duration, args.dt, args.seed, args.max_evals)
+    for axis, r in report.items():
+        relay = r["relay"]
+        print(f"{axis}: 临界增益 Ku={relay['ku']:.4g} 周期 Tu={relay['tu']:.3f}s（{relay['cycles']} 个周期）")
+        print(f"  初始 {' '.join(f'{k}={v:.4g}' for k, v in r['initial_gains'].items())}  代价 {r['initial_cost']:.4f}")
+        print(f"  优化 {' '.join(f'{k}={v:.4g}' for k, v in r['tuned_gains'].items())}  代价 {r['final_cost']:.4f}")
+        print(f"  {r['iterations']} 次迭代，{r['evaluations']} 次评价（{r['batches']} 批），{'已收敛' if r['converged'] else '达到评价次数上限'}，"
+              f"耗时 {r['elapsed']:.2f}s；稳定时间 {r['settling_time']:.2f}s 超调 {r['overshoot_pct']:.1f}%")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.dry_run:
+        return 0
+    from flight_debugger import broadcast_parameter_changes
+    updates = tuned_updates(report)
+    version = ParamStore().update(updates)
+    print(f"已写入 flight_params.json（版本 {version}）: {', '.join(sorted(updates))}")
+    if args.broadcast:
+        ack = broadcast_parameter_changes(updates)
+        print("飞控已确认" if ack is not None else "未收到飞控确认")
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,379 @@
+import json
+import math
+import sys
+import time
+import numpy as np
+from flight_estimator import AttitudeEstimator, GRAVITY
+from flight_plant import DEFAULT_QUAD, quad_derivative
+from flight_schema import DEFAULT_PARAMS as SCHEMA_DEFAULTS
+GAIN_KEYS = ("roll_kp", "roll_ki", "roll_kd", "pitch_kp", "pitch_ki", "pitch_kd", "yaw_kp", "yaw_ki", "yaw_kd")
+DEFAULT_PARAMS = dict(SCHEMA_DEFAULTS, initial_roll=0.0, initial_pitch=0.0, initial_yaw=0.0)
+FAILURE_CODES = {"none": 0, "motor1": 1, "motor2": 2, "motor3": 3, "motor4": 4, "sensor": 5}
+FAILED_MOTORS = {
+    1: (0.0, 0.7, 0.3, 0.7),
+    2: (0.7, 0.0, 0.7, 0.3),
+    3: (0.3, 0.7, 0.0, 0.7),
+    4: (0.7, 0.3, 0.7, 0.0)
+}
+BATCH_ESTIMATORS = ("accel", "complementary", "mahony")
+AXES = ("roll", "pitch", "yaw")
+def load_base_params(path="flight_params.json"):
+    params = dict(DEFAULT_PARAMS)
+    try:
+        with open(path, "r") as f:
+            params.update(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return params
+def gain_grid(**ranges):
+    keys = list(ranges)
+    mesh = np.meshgrid(*[np.asarray(ranges[k], dtype=float) for k in keys], indexing="ij")
+    return {k: m.ravel() for k, m in zip(keys, mesh)}
+def column(values, key, n):
+    array = np.array([v.get(key, DEFAULT_PARAMS.get(key)) for v in values], dtype=float)
+    return np.broadcast_to(array, (n,)) if array.size == 1 else array
+def scenario_arrays(scenarios, gains, n, base=None):
+    if base is None:
+        base = load_base_params()
+    if scenarios is None:
+        scenarios = [{}]
+    elif isinstance(scenarios, dict):
+        scenarios = [scenarios]
+    if len(scenarios) not in (1, n):
+        raise ValueError(f"场景数量 {len(scenarios)} 与批量大小 {n} 不匹配")
+    merged = [dict(base, **s) for s in scenarios]
+    arrays = {key: column(merged, key, n) for key in DEFAULT_PARAMS if key != "failure_type"}
+    for key, values in gains.items():
+        if key not in GAIN_KEYS:
+            raise ValueError(f"未知增益参数: {key}")
+        arrays[key] = np.broadcast_to(np.asarray(values, dtype=float), (n,))
+    failure = np.array([FAILURE_CODES.get(s.get("failure_type", "none"), 0) if s.get("simulate_failure") else 0 for s in merged])
+    arrays["failure"] = np.broadcast_to(failure, (n,)) if failure.size == 1 else failure
+    return arrays
+def batch_size(gains, scenarios):
+    sizes = {np.size(v) for v in gains.values()}
+    if isinstance(scenarios, list) and len(scenarios) > 1:
+        sizes.add(len(scenarios))
+    sizes.discard(1)
+    if len(sizes) > 1:
+        raise ValueError(f"批量大小不一致: {sorted(sizes)}")
+    return sizes.pop() if sizes else 1
+class BatchSimulator:
+    def __init__(self, gains=None, scenarios=None, dt=0.01, seed=0, plant=None, base_params=None, estimator="complementary"):
+        if estimator not in BATCH_ESTIMATORS:
+            raise ValueError(f"批量仿真不支持姿态估计模式: {estimator}")
+        gains = gains or {}
+        self.n = batch_size(gains, scenarios)
+        self.dt = dt
+        self.rng = np.random.default_rng(seed)
+        self.plant = dict(DEFAULT_QUAD, **(plant or {}))
+        p = scenario_arrays(scenarios, gains, self.n, base_params)
+        self.p = p
+        n = self.n
+        self.kp = np.stack([p["roll_kp"], p["pitch_kp"], p["yaw_kp"]], axis=1)
+        self.ki = np.stack([p["roll_ki"], p["pitch_ki"], p["yaw_ki"]], axis=1)
+        self.kd = np.stack([p["roll_kd"], p["pitch_kd"], p["yaw_kd"]], axis=1)
+        self.target = np.stack([p["target_roll"], p["target_pitch"], p["target_yaw"]], axis=1)
+        self.throttle = np.asarray(p["target_throttle"], dtype=float)
+        self.accel_noise = np.asarray(p["accel_noise"], dtype=float)[:, None]
+        self.gyro_noise = np.asarray(p["gyro_noise"], dtype=float)[:, None]
+        wind_on = np.asarray(p["simulate_wind"], dtype=float)
+        c = self.plant
+        ixx, iyy, izz = c["inertia"]
+        self.constants = (c["mass"], c["drag"], wind_on * p["wind_strength"] * np.cos(p["wind_direction"]),
+                          wind_on * p["wind_strength"] * np.sin(p["wind_direction"]), c["gravity"], ixx, iyy, izz, c["rate_damping"])
+        self.lever = c["arm"] / math.sqrt(2.0) * c["max_thrust"]
+        tau = c["motor_time_constant"]
+        self.motor_alpha = 1.0 - math.exp(-dt / tau) if tau > 0 else None
+        self.failure = np.asarray(p["failure"])
+        self.sensor_failure = self.failure == FAILURE_CODES["sensor"]
+        self.angle = np.stack([p["initial_roll"], p["initial_pitch"], p["initial_yaw"]], axis=1).astype(float)
+        half = np.radians(self.angle) / 2
+        cr, cp, cy = np.cos(half).T
+        sr, sp, sy = np.sin(half).T
+        self.state = [np.zeros(n) for _ in range(6)] + [cr * cp * cy + sr * sp * sy, sr * cp * cy - cr * sp * sy,
+                                                       cr * sp * cy + sr * cp * sy, cr * cp * sy - sr * sp * cy] + [np.zeros(n) for _ in range(3)]
+        self.motor_state = np.full((n, 4), 0.25 * c["mass"] * c["gravity"] / c["max_thrust"])
+        self.grounded = np.ones(n, dtype=bool)
+        self.thrust = None
+        self.torque = None
+        self.specific_force = np.empty((n, 3))
+        self.update_forces()
+        self.update_specific_force()
+        self.estimator = estimator
+        reference = AttitudeEstimator("complementary" if estimator == "accel" else estimator)
+        self.estimator_kp = reference.kp
+        self.estimator_ki = reference.ki
+        self.accel_gate = reference.accel_gate
+        self.q = None
+        self.bias = [np.zeros(n) for _ in range(3)]
+        self.i_limit = np.abs(np.asarray(p["pid_integral_limit"], dtype=float))[:, None]
+        cutoff = np.asarray(p["pid_derivative_cutoff"], dtype=float)
+        tau = np.where(cutoff > 0, 1.0 / (2.0 * np.pi * np.where(cutoff > 0, cutoff, 1.0)), 0.0)
+        self.d_alpha = (dt / (dt + tau))[:, None]
+        self.aw_gain = np.asarray(p["pid_antiwindup_gain"], dtype=float)[:, None]
+        self.i_terms = np.zeros((n, 3))
+        self.prev_error = np.zeros((n, 3))
+        self.derivative = np.zeros((n, 3))
+        self.pid_output = np.zeros((n, 3))
+        self.achieved = np.empty((n, 3))
+        self.motors = np.zeros((n, 4))
+        self.accel = np.empty((n, 3))
+        self.gyro = np.empty((n, 3))
+        self.noise = np.empty((n, 3))
+        self.time = 0.0
+        self.steps = 0
+        step = self.target - self.angle
+        self.step_size = np.abs(step)
+        self.step_sign = np.where(step >= 0, 1.0, -1.0)
+        self.settle_band = np.maximum(0.02 * self.step_size, 0.5)
+        self.last_unsettled = np.zeros((n, 3))
+        self.overshoot = np.zeros((n, 3))
+        self.iae = np.zeros((n, 3))
+        self.ise = np.zeros((n, 3))
+        self.saturated_steps = np.zeros(n)
+    def read_sensors(self):
+        accel = self.accel
+        gyro = self.gyro
+        noise = self.noise
+        s = self.state
+        self.rng.standard_normal(out=noise)
+        np.multiply(self.accel_noise, noise, out=accel)
+        accel += self.specific_force
+        self.rng.standard_normal(out=noise)
+        np.multiply(self.gyro_noise, noise, out=gyro)
+        gyro[:, 0] += s[10]
+        gyro[:, 1] += s[11]
+        gyro[:, 2] += s[12]
+        return accel, gyro
+    def initialize_estimator(self, ax, ay, az):
+        roll = np.arctan2(ay, az)
+        pitch = np.arctan2(-ax, np.sqrt(ay * ay + az * az))
+        cr, sr = np.cos(roll / 2), np.sin(roll / 2)
+        cp, sp = np.cos(pitch / 2), np.sin(pitch / 2)
+        self.q = [cr * cp, sr * cp, cr * sp, -sr * sp]
+    def calculate_attitude(self, accel, gyro):
+        ax, ay, az = accel[:, 0], accel[:, 1], accel[:, 2]
+        attitude = np.empty((self.n, 3))
+        if self.estimator == "accel":
+            attitude[:, 0] = np.arctan2(ay, np.sqrt(ax ** 2 + az ** 2)) * 180 / np.pi
+            attitude[:, 1] = np.arctan2(-ax, np.sqrt(ay ** 2 + az ** 2)) * 180 / np.pi
+            attitude[:, 2] = 0.0
+        else:
+            self.update_mahony(ax, ay, az, gyro[:, 0], gyro[:, 1], gyro[:, 2])
+            w, x, y, z = self.q
+            attitude[:, 0] = np.degrees(np.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y)))
+            attitude[:, 1] = np.degrees(np.arcsin(np.clip(2.0 * (w * y - z * x), -1.0, 1.0)))
+            attitude[:, 2] = np.degrees(np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z)))
+        if self.sensor_failure.any():
+            attitude[self.sensor_failure, :2] += 10.0 * self.rng.random((int(self.sensor_failure.sum()), 2))
+        return attitude
+    def update_mahony(self, ax, ay, az, gx, gy, gz):
+        if self.q is None:
+            self.initialize_estimator(ax, ay, az)
+        dt = self.dt
+        norm = np.sqrt(ax * ax + ay * ay + az * az)
+        valid = (norm > 0) & (np.abs(norm - GRAVITY) < self.accel_gate * GRAVITY)
+        scale = np.where(norm > 0, norm, 1.0)
+        ax = ax / scale
+        ay = ay / scale
+        az = az / scale
+        w, x, y, z = self.q
+        vx = 2.0 * (x * z - w * y)
+        vy = 2.0 * (w * x + y * z)
+        vz = w * w - x * x - y * y + z * z
+        ex = ay * vz - az * vy
+        ey = az * vx - ax * vz
+        ez = ax * vy - ay * vx
+        ki = self.estimator_ki
+        kp = self.estimator_kp
+        if ki > 0.0:
+            bias = self.bias
+            for i, e in enumerate((ex, ey, ez)):
+                bias[i] = np.where(valid, bias[i] + ki * e * dt, bias[i])
+            gx = np.where(valid, gx + bias[0], gx)
+            gy = np.where(valid, gy + bias[1], gy)
+            gz = np.where(valid, gz + bias[2], gz)
+        gx = np.where(valid, gx + kp * ex, gx)
+        gy = np.where(valid, gy + kp * ey, gy)
+        gz = np.where(valid, gz + kp * ez, gz)
+        h = 0.5 * dt
+        nw = w + (-x * gx - y * gy - z * gz) * h
+        nx = x + (w * gx + y * gz - z * gy) * h
+        ny = y + (w * gy - x * gz + z * gx) * h
+        nz = z + (w * gz + x * gy - y * gx) * h
+        n = 1.0 / np.sqrt(nw * nw + nx * nx + ny * ny + nz * nz)
+        self.q = [nw * n, nx * n, ny * n, nz * n]
+    def compute_pid(self, attitude):
+        dt = self.dt
+        error = self.target - attitude
+        i_terms = self.i_terms
+        i_terms += self.ki * error * dt
+        np.clip(i_terms, -self.i_limit, self.i_limit, out=i_terms)
+        self.derivative += self.d_alpha * ((error - self.prev_error) / dt - self.derivative)
+        self.prev_error = error
+        output = self.pid_output
+        np.multiply(self.kp, error, out=output)
+        output += i_terms
+        output += self.kd * self.derivative
+        return output
+    def back_calculate(self, motors, saturated):
+        rows = saturated & (self.failure == 0)
+        if not rows.any():
+            return
+        m1, m2, m3, m4 = motors[:, 0], motors[:, 1], motors[:, 2], motors[:, 3]
+        achieved = self.achieved
+        achieved[:, 0] = (m1 - m2 - m3 + m4) * 0.25
+        achieved[:, 1] = (m1 + m2 - m3 - m4) * 0.25
+        achieved[:, 2] = (m2 + m4 - m1 - m3) * 0.25
+        excess = achieved - self.pid_output
+        excess[np.abs(excess) < 1e-9] = 0.0
+        excess[~rows] = 0.0
+        i_terms = self.i_terms
+        i_terms += np.where(self.ki != 0, self.aw_gain * excess * self.dt, 0.0)
+        np.clip(i_terms, -self.i_limit, self.i_limit, out=i_terms)
+    def mix(self, output):
+        roll, pitch, yaw = output[:, 0], output[:, 1], output[:, 2]
+        t = self.throttle
+        motors = self.motors
+        motors[:, 0] = t + roll + pitch - yaw
+        motors[:, 1] = t - roll + pitch + yaw
+        motors[:, 2] = t - roll - pitch - yaw
+        motors[:, 3] = t + roll - pitch + yaw
+        for code, values in FAILED_MOTORS.items():
+            failed = self.failure == code
+            if failed.any():
+                motors[failed] = values
+        saturated = ((motors <= 0.0) | (motors >= 1.0)).any(axis=1)
+        clipped = ((motors < 0.0) | (motors > 1.0)).any(axis=1)
+        np.clip(motors, 0.0, 1.0, out=motors)
+        return motors, saturated, clipped
+    def update_forces(self):
+        max_thrust = self.plant["max_thrust"]
+        motor = self.motor_state
+        m1, m2, m3, m4 = motor[:, 0], motor[:, 1], motor[:, 2], motor[:, 3]
+        self.thrust = max_thrust * (m1 + m2 + m3 + m4)
+        lever = self.lever
+        self.torque = (lever * (m1 - m2 - m3 + m4), lever * (m1 + m2 - m3 - m4),
+                       self.plant["yaw_coefficient"] * max_thrust * (-m1 + m2 - m3 + m4))
+    def update_specific_force(self):
+        s = self.state
+        mass, drag, wind_x, wind_y, gravity = self.constants[:5]
+        qw, qx, qy, qz = s[6], s[7], s[8], s[9]
+        f = self.thrust / mass
+        k = drag / mass
+        grounded = self.grounded
+        fx = np.where(grounded, 0.0, f * 2.0 * (qx * qz + qw * qy) - k * (s[3] - wind_x))
+        fy = np.where(grounded, 0.0, f * 2.0 * (qy * qz - qw * qx) - k * (s[4] - wind_y))
+        fz = f * (1.0 - 2.0 * (qx * qx + qy * qy)) - k * s[5]
+        fz = np.where(grounded & (fz < gravity), gravity, fz)
+        force = self.specific_force
+        force[:, 0] = (1.0 - 2.0 * (qy * qy + qz * qz)) * fx + 2.0 * (qx * qy + qw * qz) * fy + 2.0 * (qx * qz - qw * qy) * fz
+        force[:, 1] = 2.0 * (qx * qy - qw * qz) * fx + (1.0 - 2.0 * (qx * qx + qz * qz)) * fy + 2.0 * (qy * qz + qw * qx) * fz
+        force[:, 2] = 2.0 * (qx * qz + qw * qy) * fx + 2.0 * (qy * qz - qw * qx) * fy + (1.0 - 2.0 * (qx * qx + qy * qy)) * fz
+    def integrate(self, motors):
+        dt = self.dt
+        if self.motor_alpha is None:
+            self.motor_state[:] = motors
+        else:
+            self.motor_state += self.motor_alpha * (motors - self.motor_state)
+        self.update_forces()
+        s = self.state
+        thrust = self.thrust
+        torque = self.torque
+        c = self.constants
+        h = 0.5 * dt
+        k1 = quad_derivative(s, thrust, torque, c)
+        k2 = quad_derivative([a + h * b for a, b in zip(s, k1)], thrust, torque, c)
+        k3 = quad_derivative([a + h * b for a, b in zip(s, k2)], thrust, torque, c)
+        k4 = quad_derivative([a + dt * b for a, b in zip(s, k3)], thrust, torque, c)
+        w = dt / 6.0
+        s[:] = [a + w * (b1 + 2.0 * (b2 + b3) + b4) for a, b1, b2, b3, b4 in zip(s, k1, k2, k3, k4)]
+        qw, qx, qy, qz = s[6], s[7], s[8], s[9]
+        n = 1.0 / np.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+        s[6:10] = [qw * n, qx * n, qy * n, qz * n]
+        grounded = self.grounded = (s[2] <= 0.0) & (s[5] <= 0.0)
+        if grounded.any():
+            s[2] = np.where(grounded, 0.0, s[2])
+            for i in (3, 4, 5):
+                s[i] = np.where(grounded, 0.0, s[i])
+        self.update_specific_force()
+        qw, qx, qy, qz = s[6], s[7], s[8], s[9]
+        angle = self.angle
+        angle[:, 0] = np.degrees(np.arctan2(2.0 * (qw * qx + qy * qz), 1.0 - 2.0 * (qx * qx + qy * qy)))
+        angle[:, 1] = np.degrees(np.arcsin(np.clip(2.0 * (qw * qy - qz * qx), -1.0, 1.0)))
+        angle[:, 2] = np.degrees(np.arctan2(2.0 * (qw * qz + qx * qy), 1.0 - 2.0 * (qy * qy + qz * qz)))
+    def step(self):
+        accel, gyro = self.read_sensors()
+        attitude = self.calculate_attitude(accel, gyro)
+        motors, saturated, clipped = self.mix(self.compute_pid(attitude))
+        self.back_calculate(motors, clipped)
+        self.integrate(motors)
+        self.steps += 1
+        self.time = self.steps * self.dt
+        error = self.target - self.angle
+        abs_error = np.abs(error)
+        self.iae += abs_error * self.dt
+        self.ise += error * error * self.dt
+        self.last_unsettled = np.where(abs_error > self.settle_band, self.time, self.last_unsettled)
+        beyond = np.where(self.step_size > 0, -error * self.step_sign, abs_error)
+        np.maximum(self.overshoot, beyond, out=self.overshoot)
+        self.saturated_steps += saturated
+    def run(self, duration):
+        for _ in range(int(round(duration / self.dt))):
+            self.step()
+        return self.metrics()
+    def metrics(self):
+        result = {}
+        for i, axis in enumerate(AXES):
+            step_size = self.step_size[:, i]
+            result[axis] = {
+                "settling_time": self.last_unsettled[:, i].copy(),
+                "overshoot": self.overshoot[:, i].copy(),
+                "overshoot_pct": np.where(step_size > 0, 100.0 * self.overshoot[:, i] / np.where(step_size > 0, step_size, 1.0), np.nan),
+                "iae": self.iae[:, i].copy(),
+                "ise": self.ise[:, i].copy(),
+                "final_error": (self.target[:, i] - self.angle[:, i]).copy()
+            }
+        result["saturation"] = self.saturated_steps / max(self.steps, 1)
+        result["duration"] = self.time
+        return result
+def run_batch(gains, scenarios=None, duration=5.0, dt=0.01, seed=0, plant=None, base_params=None, estimator="complementary"):
+    return BatchSimulator(gains, scenarios, dt, seed, plant, base_params, estimator).run(duration)
+def parse_range(text):
+    name, _, spec = text.partition("=")
+    parts = spec.split(":")
+    if len(parts) == 3:
+        return name, np.linspace(float(parts[0]), float(parts[1]), int(parts[2]))
+    return name, np.array([float(x) for x in spec.split(",")])
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="批量PID增益仿真")
+    parser.add_argument("grid", nargs="+", help="增益网格，格式 参数=起始:结束:个数 或 参数=值1,值2,...")
+    parser.add_argument("--scenario", default=None, help="场景JSON文件（flight_params.json 的键）")
+    parser.add_argument("--duration", type=float, default=5.0, help="仿真时长（秒）")
+    parser.add_argument("--dt", type=float, default=0.01, help="仿真步长（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--estimator", choices=BATCH_ESTIMATORS, default="complementary", help="姿态估计算法（与飞控的 --estimator 相同，不支持 ekf）")
+    parser.add_argument("--top", type=int, default=10, help="显示积分误差最小的前 N 组")
+    args = parser.parse_args()
+    scenario = None
+    if args.scenario:
+        with open(args.scenario, "r") as f:
+            scenario = json.load(f)
+    gains = gain_grid(**dict(parse_range(g) for g in args.grid))
+    n = batch_size(gains, scenario)
+    start = time.perf_counter()
+    metrics = run_batch(gains, scenario, args.duration, args.dt, args.seed, estimator=args.estimator)
+    elapsed = time.perf_counter() - start
+    print(f"共 {n} 组，仿真 {args.duration:.1f}s，耗时 {elapsed:.2f}s")
+    cost = metrics["roll"]["iae"] + metrics["pitch"]["iae"] + metrics["yaw"]["iae"]
+    for i in np.argsort(cost)[:args.top]:
+        gain_text = " ".join(f"{k}={gains[k][i]:.3g}" for k in gains)
+        print(f"  {gain_text}  IAE={cost[i]:.3f} 滚转稳定时间={metrics['roll']['settling_time'][i]:.2f}s "
+              f"超调={metrics['roll']['overshoot'][i]:.2f}° 饱和={100 * metrics['saturation'][i]:.1f}%")
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
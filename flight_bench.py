@@ -0,0 +1,264 @@
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+HISTORY_PATH = "bench_history.json"
+class NullCanvas:
+    def __init__(self, width=300, height=300):
+        self.size = {"width": width, "height": height}
+        self.items = 0
+        self.calls = 0
+    def __getitem__(self, key):
+        return self.size[key]
+    def create(self, *args, **kwargs):
+        self.items += 1
+        return self.items
+    create_polygon = create_line = create_oval = create_text = create
+    def coords(self, item, *args):
+        self.calls += 1
+    def itemconfig(self, item, **kwargs):
+        self.calls += 1
+    def bind(self, event, callback):
+        pass
+    def delete(self, tag):
+        pass
+    def tag_raise(self, tag, above=None):
+        pass
+    def tag_lower(self, tag, below=None):
+        pass
+class NullEndpoint:
+    def send(self, data, addr=None):
+        return True
+def bench_pid_bank():
+    from flight_pid import PIDBank
+    bank = PIDBank(gains=((2.5, 0.1, 0.5), (2.5, 0.1, 0.5), (1.0, 0.05, 0.2)))
+    setpoints = [5.0, -3.0, 10.0]
+    measured = [1.0, 0.5, 9.0]
+    return lambda: bank.compute(setpoints, measured, 0.01), 1
+def bench_pid_bank_saturated():
+    from flight_pid import PIDBank
+    bank = PIDBank(gains=((2.5, 0.1, 0.5), (2.5, 0.1, 0.5), (1.0, 0.05, 0.2)))
+    setpoints = [30.0, -20.0, 10.0]
+    measured = [1.0, 0.5, 9.0]
+    achieved = [0.25, -0.25, 0.1]
+    def run():
+        bank.compute(setpoints, measured, 0.01)
+        bank.back_calculate(achieved, 0.01)
+    return run, 1
+def bench_read_sensors():
+    from flight_controller import FlightController
+    controller = FlightController(params={"simulate_wind": True, "enable_gps": True})
+    p = controller.refresh_params()
+    return lambda: controller.read_sensors(p), 1
+def bench_sensor_source(kind):
+    def setup():
+        from flight_schema import ParamSnapshot
+        from flight_sensors import create_sensor_source
+        source = create_sensor_source(kind, 0)
+        p = ParamSnapshot(simulate_wind=True, enable_gps=True)
+        source.apply_params(p)
+        return lambda: source.read(p), 1
+    return setup
+def bench_attitude(mode):
+    def setup():
+        from flight_controller import FlightController
+        controller = FlightController(estimator=mode)
+        accel = [0.05, -0.03, 9.8]
+        gyro = [0.01, -0.02, 0.005]
+        return lambda: controller.calculate_attitude(accel, gyro, 0.01), 1
+    return setup
+def bench_control_step():
+    from flight_controller import FlightController
+    controller = FlightController(params={})
+    controller.refresh_params()
+    sensors = controller.read_sensors()
+    return lambda: controller.control_step(sensors, 0.01), 1
+def bench_plant_step():
+    from flight_plant import QuadPlant
+    plant = QuadPlant()
+    motors = [0.52, 0.51, 0.5, 0.49]
+    return lambda: plant.step(motors, 0.001), 1
+def bench_telemetry(mode, batch):
+    def setup():
+        from flight_telemetry import TelemetryPublisher
+        publisher = TelemetryPublisher(mode=mode, batch=batch, endpoint=NullEndpoint())
+        sample = (1.0, 1.5, -2.0, 30.0, 0.5, 0.51, 0.49, 0.5, 0.1, -0.1, 9.8, 0.01, 0.02, -0.01, 1013.25)
+        return lambda: publisher.publish_sample(sample), 1
+    return setup
+def bench_render_draw():
+    from flight_render import AttitudeRenderer
+    renderer = AttitudeRenderer(NullCanvas(), 300, 300, stats_interval=1e9)
+    state = [0]
+    def draw():
+        state[0] += 1
+        renderer.draw(state[0] % 90 - 45.0, 10.0)
+    return draw, 1
+def bench_chart_push_frame():
+    import numpy as np
+    from flight_charts import HistoryBuffer, SAMPLE_DTYPE
+    from flight_telemetry import HEADER, FRAME_MAGIC, FRAME_VERSION
+    count = 10
+    frames = np.zeros(count, SAMPLE_DTYPE)
+    frames["timestamp"] = np.arange(count) * 0.01
+    buffer = HEADER.pack(FRAME_MAGIC, FRAME_VERSION, count, 0) + frames.tobytes()
+    history = HistoryBuffer(60000)
+    targets = {"target_roll": 0.0, "target_pitch": 0.0, "target_yaw": 0.0}
+    return lambda: history.push_frame(buffer, targets), count
+def bench_chart_draw():
+    import numpy as np
+    from flight_charts import HistoryBuffer, StripChart
+    history = HistoryBuffer(60000)
+    n = 20000
+    t = np.arange(n) * 0.0005
+    history.push_columns({"timestamp": t, "roll": np.sin(t * 7), "target_roll": np.sign(np.sin(t)),
+                          "pitch": np.cos(t * 5), "target_pitch": np.zeros(n)}, n)
+    chart = StripChart(NullCanvas(560, 90), history, [("roll", ""), ("target_roll", ""), ("pitch", ""), ("target_pitch", "")])
+    return lambda: chart.draw(t[-1], 10.0), 1
+def bench_headless(steps=2000):
+    def setup():
+        from flight_headless import load_scenario, run_headless
+        scenario = load_scenario(None)
+        return lambda: run_headless(scenario, None, steps / scenario["rate"]), steps
+    return setup
+BENCHMARKS = {
+    "controller.pid_bank": bench_pid_bank,
+    "controller.pid_bank_saturated": bench_pid_bank_saturated,
+    "controller.read_sensors": bench_read_sensors,
+    "sensors.synthetic": bench_sensor_source("synthetic"),
+    "sensors.plant": bench_sensor_source("plant"),
+    "controller.attitude.accel": bench_attitude("accel"),
+    "controller.attitude.complementary": bench_attitude("complementary"),
+    "controller.attitude.mahony": bench_attitude("mahony"),
+    "controller.attitude.ekf": bench_attitude("ekf"),
+    "controller.control_step": bench_control_step,
+    "plant.rk4_step": bench_plant_step,
+    "telemetry.binary": bench_telemetry("binary", 1),
+    "telemetry.binary_batch10": bench_telemetry("binary", 10),
+    "telemetry.json": bench_telemetry("json", 1),
+    "ui.render_draw": bench_render_draw,
+    "ui.chart_push_frame": bench_chart_push_frame,
+    "ui.chart_draw": bench_chart_draw,
+    "loop.headless": bench_headless(),
+}
+def measure(setup, repeat=5):
+    func, ops = setup()
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = sorted(t / (number * ops) for t in timer.repeat(repeat, number))
+    best = times[0]
+    return {"best_us": 1e6 * best, "median_us": 1e6 * times[len(times) // 2], "ops_per_sec": 1.0 / best if best > 0 else 0.0, "calls": number * repeat}
+def run_benchmarks(names=None, repeat=5, report=None):
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and not any(part in name for part in names):
+            continue
+        results[name] = measure(setup, repeat)
+        if report is not None:
+            report(name, results[name])
+    return results
+def load_history(path=HISTORY_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+    except json.JSONDecodeError:
+        raise ValueError(f"基准历史文件格式错误: {path}")
+def save_history(history, path=HISTORY_PATH):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+def find_run(history, ref):
+    if ref is None:
+        return None
+    for run in reversed(history):
+        if run.get("label") == ref:
+            return run
+    try:
+        return history[int(ref)]
+    except (ValueError, IndexError):
+        raise ValueError(f"找不到基准记录: {ref}")
+def compare_runs(baseline, current, threshold=10.0):
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["best_us"] <= 0:
+            continue
+        change = 100.0 * (result["best_us"] - base["best_us"]) / base["best_us"]
+        rows.append((name, base["best_us"], result["best_us"], change, change > threshold))
+    return rows
+def format_us(us):
+    return f"{us / 1000:.2f}ms" if us >= 1000 else f"{us:.2f}us"
+def cmd_run(args):
+    print(f"{'基准':<36}{'最佳':>12}{'中位数':>12}{'次/秒':>14}")
+    def report(name, r):
+        print(f"{name:<36}{format_us(r['best_us']):>12}{format_us(r['median_us']):>12}{r['ops_per_sec']:>14.0f}")
+    results = run_benchmarks(args.filter, args.repeat, report)
+    if not results:
+        print("没有匹配的基准")
+        return 1
+    if args.no_save:
+        return 0
+    history = load_history(args.history)
+    history.append({
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "label": args.label,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    })
+    save_history(history, args.history)
+    print(f"结果已追加到 {args.history}（第 {len(history) - 1} 条）")
+    return 0
+def cmd_compare(args):
+    history = load_history(args.history)
+    if len(history) < 2:
+        print("历史记录不足两条，无法比较")
+        return 1
+    current = find_run(history, args.current) or history[-1]
+    baseline = find_run(history, args.baseline)
+    if baseline is None:
+        index = history.index(current)
+        if index == 0:
+            print("当前记录之前没有可比较的记录")
+            return 1
+        baseline = history[index - 1]
+    rows = compare_runs(baseline, current, args.threshold)
+    print(f"基准 {baseline['time']} {baseline.get('label') or ''} -> 当前 {current['time']} {current.get('label') or ''}，阈值 {args.threshold:.1f}%")
+    regressions = 0
+    for name, before, after, change, regressed in rows:
+        regressions += regressed
+        print(f"{name:<36}{format_us(before):>12}{format_us(after):>12}{change:>+9.1f}%  {'退化' if regressed else ''}")
+    print(f"{regressions} 项退化超过 {args.threshold:.1f}%" if regressions else "没有超过阈值的退化")
+    return 1 if regressions else 0
+def cmd_list(args):
+    for i, run in enumerate(load_history(args.history)):
+        print(f"{i:>4}  {run['time']}  {run.get('label') or '-':<20} {len(run['results'])} 项  Python {run.get('python', '?')}")
+    return 0
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="控制循环与界面绘制热点基准测试")
+    parser.add_argument("--history", default=HISTORY_PATH, help="基准历史JSON文件")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("run", help="运行基准并把结果追加到历史文件")
+    p.add_argument("filter", nargs="*", help="只运行名称包含这些字符串的基准")
+    p.add_argument("--repeat", type=int, default=5, help="每个基准的重复次数（取最佳值）")
+    p.add_argument("--label", default=None, help="本次运行的标签，如提交号")
+    p.add_argument("--no-save", action="store_true", help="只打印结果，不写入历史文件")
+    p.set_defaults(run=cmd_run)
+    p = commands.add_parser("compare", help="比较两次运行并标出退化")
+    p.add_argument("--baseline", default=None, help="基准记录（序号或标签），默认当前记录的前一条")
+    p.add_argument("--current", default=None, help="当前记录（序号或标签），默认最后一条")
+    p.add_argument("--threshold", type=float, default=10.0, help="耗时增加超过该百分比即视为退化")
+    p.set_defaults(run=cmd_compare)
+    p = commands.add_parser("list", help="列出历史记录")
+    p.set_defaults(run=cmd_list)
+    args = parser.parse_args()
+    return args.run(args)
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
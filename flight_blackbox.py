@@ -0,0 +1,207 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from flight_telemetry import SAMPLE_FIELDS
+RECORD_FIELDS = SAMPLE_FIELDS + (
+    "gps_x", "gps_y", "gps_z",
+    "setpoint_roll", "setpoint_pitch", "setpoint_yaw", "setpoint_throttle",
+    "roll_p", "roll_i", "roll_d", "pitch_p", "pitch_i", "pitch_d", "yaw_p", "yaw_i", "yaw_d",
+    "param_version"
+)
+RECORD = struct.Struct("<d" + "f" * (len(RECORD_FIELDS) - 2) + "I")
+HEADER = struct.Struct("<4sHHIQQdd")
+HEADER_SIZE = 4096
+MAGIC = b"FBBX"
+FORMAT_VERSION = 2
+SESSION = struct.Struct("<Q")
+COUNT_OFFSET = struct.calcsize("<4sHHIQ")
+def segment_path(directory, prefix, index):
+    return os.path.join(directory, f"{prefix}_{index:06d}.bbx")
+def next_session(paths):
+    session = -1
+    for path in paths:
+        try:
+            segment = Segment(path)
+        except (OSError, ValueError):
+            continue
+        session = max(session, segment.session)
+        segment.close()
+    return session + 1
+class BlackboxWriter:
+    def __init__(self, directory, prefix="blackbox", segment_records=60000, max_segments=None, flush_every=1000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self.flush_every = flush_every
+        existing = sorted(glob.glob(os.path.join(directory, f"{prefix}_*.bbx")))
+        self.segment_index = int(existing[-1][-10:-4]) + 1 if existing else 0
+        self.segments = existing
+        self.session = next_session(existing)
+        self.mm = None
+        self.file = None
+        self.count = 0
+        self.first_ts = 0.0
+        self.records_written = 0
+        self.open_segment()
+    def open_segment(self):
+        path = segment_path(self.directory, self.prefix, self.segment_index)
+        self.segment_index += 1
+        size = HEADER_SIZE + RECORD.size * self.segment_records
+        self.file = open(path, "w+b")
+        self.file.truncate(size)
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        fields = json.dumps(RECORD_FIELDS).encode()
+        HEADER.pack_into(self.mm, 0, MAGIC, FORMAT_VERSION, RECORD.size, len(RECORD_FIELDS), self.segment_records, 0, 0.0, 0.0)
+        SESSION.pack_into(self.mm, HEADER.size, self.session)
+        offset = HEADER.size + SESSION.size
+        self.mm[offset:offset + len(fields)] = fields
+        self.count = 0
+        self.segments.append(path)
+        if self.max_segments is not None:
+            while len(self.segments) > self.max_segments:
+                os.remove(self.segments.pop(0))
+    def close_segment(self):
+        if self.mm is None:
+            return
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+        self.mm = None
+    def __call__(self, sample):
+        if self.count >= self.segment_records:
+            self.close_segment()
+            self.open_segment()
+        mm = self.mm
+        count = self.count
+        timestamp = sample[0]
+        RECORD.pack_into(mm, HEADER_SIZE + RECORD.size * count, *sample[:-1], int(sample[-1]))
+        if count == 0:
+            self.first_ts = timestamp
+        self.count = count + 1
+        struct.pack_into("<Qdd", mm, COUNT_OFFSET, self.count, self.first_ts, timestamp)
+        self.records_written += 1
+        if self.records_written % self.flush_every == 0:
+            mm.flush()
+    def close(self):
+        self.close_segment()
+class Segment:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, field_count, capacity, count, first_ts, last_ts = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version not in (1, FORMAT_VERSION) or record_size != RECORD.size:
+            self.mm.close()
+            raise ValueError(f"黑匣子文件格式错误: {path}")
+        self.count = count
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+        offset = HEADER.size
+        self.session = 0
+        if version >= 2:
+            self.session = SESSION.unpack_from(self.mm, offset)[0]
+            offset += SESSION.size
+        raw = self.mm[offset:HEADER_SIZE].split(b"\0", 1)[0]
+        self.fields = tuple(json.loads(raw.decode()))
+    def timestamp(self, i):
+        return struct.unpack_from("<d", self.mm, HEADER_SIZE + RECORD.size * i)[0]
+    def bisect(self, t):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp(mid) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    def record(self, i):
+        return RECORD.unpack_from(self.mm, HEADER_SIZE + RECORD.size * i)
+    def close(self):
+        self.mm.close()
+class BlackboxReader:
+    def __init__(self, directory, prefix="blackbox", session=None):
+        segments = []
+        for path in sorted(glob.glob(os.path.join(directory, f"{prefix}_*.bbx"))):
+            segment = Segment(path)
+            if segment.count:
+                segments.append(segment)
+            else:
+                segment.close()
+        self.sessions = sorted({s.session for s in segments})
+        if session is None and self.sessions:
+            session = self.sessions[-1]
+        self.session = session
+        self.segments = [s for s in segments if s.session == session]
+        for s in segments:
+            if s.session != session:
+                s.close()
+        for prev, segment in zip(self.segments, self.segments[1:]):
+            if segment.first_ts < prev.last_ts:
+                self.close()
+                raise ValueError(f"黑匣子时间戳不单调: {segment.path} 起始 {segment.first_ts:.3f} 早于上一分段结束 {prev.last_ts:.3f}")
+        self.fields = self.segments[0].fields if self.segments else RECORD_FIELDS
+    def __len__(self):
+        return sum(s.count for s in self.segments)
+    def time_range(self):
+        if not self.segments:
+            return None
+        return self.segments[0].first_ts, self.segments[-1].last_ts
+    def spans(self, start=None, end=None):
+        for segment in self.segments:
+            if start is not None and segment.last_ts < start:
+                continue
+            if end is not None and segment.first_ts > end:
+                break
+            lo = 0 if start is None else segment.bisect(start)
+            hi = segment.count if end is None else segment.bisect(end)
+            while hi < segment.count and end is not None and segment.timestamp(hi) == end:
+                hi += 1
+            if lo < hi:
+                yield segment, lo, hi
+    def records(self, start=None, end=None):
+        for segment, lo, hi in self.spans(start, end):
+            for i in range(lo, hi):
+                yield segment.record(i)
+    def columns(self, start=None, end=None, names=None):
+        names = names or self.fields
+        indices = [self.fields.index(name) for name in names]
+        result = {name: [] for name in names}
+        for record in self.records(start, end):
+            for name, i in zip(names, indices):
+                result[name].append(record[i])
+        return result
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="黑匣子日志查看")
+    parser.add_argument("directory", help="黑匣子日志目录")
+    parser.add_argument("--start", type=float, default=None, help="起始时间戳")
+    parser.add_argument("--end", type=float, default=None, help="结束时间戳")
+    parser.add_argument("--fields", default="timestamp,roll,pitch,yaw,motor1,motor2,motor3,motor4", help="输出字段，逗号分隔")
+    parser.add_argument("--session", type=int, default=None, help="读取第几次记录（同一目录中每次启动记录器为一个会话），默认最新一次")
+    args = parser.parse_args()
+    reader = BlackboxReader(args.directory, session=args.session)
+    time_range = reader.time_range()
+    if time_range is None:
+        print("没有记录")
+        return 1
+    print(f"# 会话 {reader.session}（共 {len(reader.sessions)} 个），{len(reader.segments)} 个分段，{len(reader)} 条记录，时间 {time_range[0]:.3f} - {time_range[1]:.3f}", file=sys.stderr)
+    names = args.fields.split(",")
+    indices = [reader.fields.index(name) for name in names]
+    print(",".join(names))
+    for record in reader.records(args.start, args.end):
+        print(",".join(repr(record[i]) for i in indices))
+    reader.close()
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
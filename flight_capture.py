@@ -0,0 +1,317 @@
+import bisect
+import mmap
+import struct
+import sys
+import threading
+import time
+MAGIC = b"FCAP"
+INDEX_MAGIC = b"FIDX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHdd")
+HEADER_SIZE = 64
+MAX_PORTS = (HEADER_SIZE - HEADER.size) // 2
+RECORD = struct.Struct("<dHBH")
+INDEX_ENTRY = struct.Struct("<dQQ")
+FOOTER = struct.Struct("<4sQQQ")
+RECEIVED = 0
+SENT = 1
+DEFAULT_PORTS = (5005, 5006)
+def is_capture(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+class CaptureWriter:
+    def __init__(self, path, ports=DEFAULT_PORTS, index_interval=0.5, clock=time.monotonic):
+        if len(ports) > MAX_PORTS:
+            raise ValueError(f"最多记录 {MAX_PORTS} 个端口")
+        self.path = path
+        self.ports = tuple(ports)
+        self.index_interval = index_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.file = open(path, "wb")
+        self.start = clock()
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.ports), time.time(), index_interval))
+        self.file.write(struct.pack(f"<{MAX_PORTS}H", *(self.ports + (0,) * (MAX_PORTS - len(self.ports)))))
+        self.offset = HEADER_SIZE
+        self.index = []
+        self.next_index = 0.0
+        self.count = 0
+        self.bytes = 0
+    def channel(self, first, second):
+        if first in self.ports:
+            return first
+        if second in self.ports:
+            return second
+        return None
+    def received(self, endpoint, data, addr):
+        channel = self.channel(endpoint.port, addr[1] if addr else None)
+        if channel is not None:
+            self.write(channel, RECEIVED, data)
+    def sent(self, endpoint, data, addr):
+        peer = addr or endpoint.peer
+        channel = self.channel(peer[1] if peer else None, endpoint.port)
+        if channel is not None:
+            self.write(channel, SENT, data)
+    def write(self, channel, direction, data):
+        with self.lock:
+            if self.file is None:
+                return
+            t = self.clock() - self.start
+            if t >= self.next_index:
+                self.index.append((t, self.offset, self.count))
+                self.next_index = t + self.index_interval
+            self.file.write(RECORD.pack(t, channel, direction, len(data)))
+            self.file.write(data)
+            self.offset += RECORD.size + len(data)
+            self.count += 1
+            self.bytes += len(data)
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+            for entry in self.index:
+                self.file.write(INDEX_ENTRY.pack(*entry))
+            self.file.write(FOOTER.pack(INDEX_MAGIC, self.offset, len(self.index), self.count))
+            self.file.close()
+            self.file = None
+class CaptureReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER_SIZE:
+            self.mm.close()
+            raise ValueError(f"抓包文件格式错误: {path}")
+        magic, version, port_count, self.wall_start, self.index_interval = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.mm.close()
+            raise ValueError(f"抓包文件格式错误: {path}")
+        self.ports = struct.unpack_from(f"<{port_count}H", self.mm, HEADER.size)
+        self.end = len(self.mm)
+        self.index = []
+        self.count = 0
+        if not self.load_index():
+            self.scan()
+        self.index_times = [entry[0] for entry in self.index]
+    def load_index(self):
+        mm = self.mm
+        if len(mm) < HEADER_SIZE + FOOTER.size:
+            return False
+        magic, index_offset, index_count, count = FOOTER.unpack_from(mm, len(mm) - FOOTER.size)
+        if magic != INDEX_MAGIC or index_offset + index_count * INDEX_ENTRY.size + FOOTER.size != len(mm):
+            return False
+        self.index = [INDEX_ENTRY.unpack_from(mm, index_offset + i * INDEX_ENTRY.size) for i in range(index_count)]
+        self.end = index_offset
+        self.count = count
+        return True
+    def scan(self):
+        mm = self.mm
+        offset = HEADER_SIZE
+        next_index = 0.0
+        while offset + RECORD.size <= len(mm):
+            t, _, _, length = RECORD.unpack_from(mm, offset)
+            if offset + RECORD.size + length > len(mm):
+                break
+            if t >= next_index:
+                self.index.append((t, offset, self.count))
+                next_index = t + self.index_interval
+            offset += RECORD.size + length
+            self.count += 1
+        self.end = offset
+    def __len__(self):
+        return self.count
+    def time_range(self):
+        if not self.count:
+            return None
+        last = None
+        for last in self.records(self.index[-1][0]):
+            pass
+        return self.index[0][0], last[0]
+    def records(self, start=None, end=None, channels=None):
+        mm = self.mm
+        offset = HEADER_SIZE
+        if start is not None and self.index:
+            i = bisect.bisect_right(self.index_times, start) - 1
+            if i >= 0:
+                offset = self.index[i][1]
+        limit = self.end
+        while offset < limit:
+            t, channel, direction, length = RECORD.unpack_from(mm, offset)
+            data_offset = offset + RECORD.size
+            offset = data_offset + length
+            if end is not None and t > end:
+                break
+            if start is not None and t < start:
+                continue
+            if channels is not None and channel not in channels:
+                continue
+            yield t, channel, direction, mm[data_offset:offset]
+    def close(self):
+        self.mm.close()
+class Replayer:
+    def __init__(self, reader, emit, speed=1.0, channels=None, start=None, end=None, predicate=None, clock=time.monotonic):
+        self.reader = reader
+        self.emit = emit
+        self.speed = speed
+        self.channels = channels
+        self.start_time = start
+        self.end_time = end
+        self.predicate = predicate
+        self.clock = clock
+        self.running = False
+        self.finished = False
+        self.thread = None
+        self.error = None
+        self.iterator = None
+        self.emitted = 0
+        self.bytes = 0
+        self.max_lag = 0.0
+    def records(self):
+        predicate = self.predicate
+        for record in self.reader.records(self.start_time, self.end_time, self.channels):
+            if predicate is None or predicate(record[3]):
+                yield record
+    def emit_record(self, record):
+        self.emit(record[1], record[3])
+        self.emitted += 1
+        self.bytes += len(record[3])
+    def step(self):
+        if self.iterator is None:
+            self.iterator = self.records()
+        record = next(self.iterator, None)
+        if record is None:
+            self.finished = True
+            return None
+        self.emit_record(record)
+        return record
+    def run(self):
+        base = None
+        origin = None
+        for record in self.records():
+            if not self.running:
+                return
+            if self.speed > 0:
+                if base is None:
+                    base, origin = record[0], self.clock()
+                delay = origin + (record[0] - base) / self.speed - self.clock()
+                if delay > 0:
+                    time.sleep(delay)
+                elif -delay > self.max_lag:
+                    self.max_lag = -delay
+            self.emit_record(record)
+        self.finished = True
+    def guarded_run(self):
+        try:
+            self.run()
+        except Exception as e:
+            self.error = e
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.guarded_run, name="capture-replay", daemon=True)
+        self.thread.start()
+        return self
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+    def stats(self):
+        return {"emitted": self.emitted, "bytes": self.bytes, "max_lag_ms": 1000 * self.max_lag, "finished": self.finished}
+def parse_target(text):
+    channel, _, address = text.partition("=")
+    host, _, port = address.rpartition(":")
+    if not address or not port:
+        raise ValueError(f"回放目标格式错误: {text}（应为 通道=主机:端口）")
+    return int(channel), (host or "127.0.0.1", int(port))
+def record(args):
+    from flight_net import shared_network
+    network = shared_network()
+    writer = CaptureWriter(args.output, args.ports)
+    network.capture = writer
+    for port in args.ports:
+        network.open(f"capture:{port}", local_addr=("0.0.0.0", port), broadcast=True)
+    print(f"正在记录端口 {', '.join(map(str, args.ports))} 到 {args.output}，Ctrl+C 结束")
+    start = time.monotonic()
+    try:
+        while not args.duration or time.monotonic() - start < args.duration:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    network.stop()
+    writer.close()
+    print(f"共记录 {writer.count} 个数据包，{writer.bytes / 1024:.1f}KB")
+    return 0
+def replay(args):
+    from flight_net import shared_network
+    reader = CaptureReader(args.input)
+    targets = {channel: ("127.0.0.1", channel) for channel in reader.ports}
+    targets.update(parse_target(text) for text in args.to)
+    channels = tuple(args.channels) if args.channels else tuple(targets)
+    network = shared_network()
+    endpoint = network.open("replay", local_addr=("0.0.0.0", 0), broadcast=True)
+    replayer = Replayer(reader, lambda channel, data: endpoint.send(data, targets[channel]), args.speed, channels, args.start, args.end)
+    try:
+        if args.step:
+            print("回车发送下一个数据包，q 退出")
+            while input() != "q":
+                record = replayer.step()
+                if record is None:
+                    break
+                t, channel, direction, data = record
+                print(f"{t:.3f}s 通道 {channel} {'收' if direction == RECEIVED else '发'} {len(data)} 字节")
+        else:
+            replayer.running = True
+            replayer.run()
+    except (KeyboardInterrupt, EOFError):
+        pass
+    stats = replayer.stats()
+    print(f"已回放 {stats['emitted']} 个数据包，{stats['bytes'] / 1024:.1f}KB，最大滞后 {stats['max_lag_ms']:.1f}ms")
+    network.stop()
+    reader.close()
+    return 0
+def info(args):
+    reader = CaptureReader(args.input)
+    time_range = reader.time_range()
+    if time_range is None:
+        print("没有记录")
+        return 1
+    counts = {}
+    for _, channel, direction, data in reader.records():
+        count = counts.setdefault((channel, direction), [0, 0])
+        count[0] += 1
+        count[1] += len(data)
+    print(f"{len(reader)} 个数据包，时长 {time_range[1] - time_range[0]:.3f}s，索引 {len(reader.index)} 项")
+    for (channel, direction), (packets, size) in sorted(counts.items()):
+        print(f"  通道 {channel} {'收' if direction == RECEIVED else '发'}: {packets} 包 {size / 1024:.1f}KB")
+    reader.close()
+    return 0
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="参数/遥测通道抓包与回放")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("record", help="监听端口并记录所有数据包")
+    p.add_argument("output", help="抓包文件路径")
+    p.add_argument("--ports", type=int, nargs="+", default=list(DEFAULT_PORTS), help="监听的UDP端口")
+    p.add_argument("--duration", type=float, default=0, help="记录时长（秒），0 表示直到 Ctrl+C")
+    p.set_defaults(run=record)
+    p = commands.add_parser("replay", help="按时间重新发送抓包文件中的数据包")
+    p.add_argument("input", help="抓包文件路径")
+    p.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 表示尽快发送")
+    p.add_argument("--step", action="store_true", help="逐包回放，每按一次回车发送一个数据包")
+    p.add_argument("--channels", type=int, nargs="+", default=None, help="只回放这些通道")
+    p.add_argument("--to", action="append", default=[], help="通道发送目标，如 5006=127.0.0.1:5016，默认发往本机同一端口")
+    p.add_argument("--start", type=float, default=None, help="起始时间（秒，相对抓包开始）")
+    p.add_argument("--end", type=float, default=None, help="结束时间（秒，相对抓包开始）")
+    p.set_defaults(run=replay)
+    p = commands.add_parser("info", help="显示抓包文件统计")
+    p.add_argument("input", help="抓包文件路径")
+    p.set_defaults(run=info)
+    args = parser.parse_args()
+    return args.run(args)
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,156 @@
+import numpy as np
+from flight_telemetry import SAMPLE_FIELDS, frame_header
+CHART_FIELDS = ("timestamp", "roll", "pitch", "yaw", "target_roll", "target_pitch", "target_yaw",
+                "motor1", "motor2", "motor3", "motor4", "gyro_x", "gyro_y", "gyro_z")
+SAMPLE_DTYPE = np.dtype([("seq", "<u4"), ("timestamp", "<f8")] + [(name, "<f4") for name in SAMPLE_FIELDS[1:]])
+class HistoryBuffer:
+    def __init__(self, capacity=60000, fields=CHART_FIELDS):
+        self.capacity = capacity
+        self.fields = fields
+        self.rows = {name: i for i, name in enumerate(fields)}
+        self.data = np.zeros((len(fields), capacity))
+        self.count = 0
+    def __len__(self):
+        return min(self.count, self.capacity)
+    def clear(self):
+        self.count = 0
+    def write(self, row, values, start, k):
+        data = self.data[row]
+        first = min(k, self.capacity - start)
+        data[start:start + first] = values if np.isscalar(values) else values[:first]
+        if first < k:
+            data[:k - first] = values if np.isscalar(values) else values[first:k]
+    def push(self, values):
+        i = self.count % self.capacity
+        self.data[:, i] = values
+        self.count += 1
+    def push_columns(self, columns, k):
+        k = min(k, self.capacity)
+        start = self.count % self.capacity
+        for name, values in columns.items():
+            self.write(self.rows[name], values, start, k)
+        self.count += k
+    def push_frame(self, buffer, targets):
+        _, count, offset = frame_header(buffer)
+        if not count:
+            return None
+        frames = np.frombuffer(buffer, SAMPLE_DTYPE, count, offset)
+        k = min(count, self.capacity)
+        frames = frames[count - k:]
+        start = self.count % self.capacity
+        for name in self.fields:
+            if name in SAMPLE_DTYPE.names:
+                self.write(self.rows[name], frames[name], start, k)
+            else:
+                self.write(self.rows[name], targets[name], start, k)
+        self.count += k
+        return frames[-1]
+    def latest_time(self):
+        if not self.count:
+            return None
+        return self.data[0, (self.count - 1) % self.capacity]
+    def oldest_time(self):
+        if not self.count:
+            return None
+        return self.data[0, (self.count - len(self)) % self.capacity]
+    def take(self, row, lo, hi):
+        first = self.count - len(self)
+        a = (first + lo) % self.capacity
+        b = a + (hi - lo)
+        data = self.data[row]
+        if b <= self.capacity:
+            return data[a:b]
+        return np.concatenate((data[a:], data[:b - self.capacity]))
+    def window(self, start, end):
+        n = len(self)
+        if not n:
+            return 0, 0
+        times = self.take(0, 0, n)
+        return int(np.searchsorted(times, start, "left")), int(np.searchsorted(times, end, "right"))
+def decimate(t, y, t0, span, width):
+    n = len(t)
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+    x = (t - t0) * (width / span)
+    if n <= 2 * width:
+        return x, y
+    edges = np.searchsorted(x, np.arange(width + 1))
+    starts = edges[:-1]
+    nonempty = starts < edges[1:]
+    starts = starts[nonempty]
+    columns = np.flatnonzero(nonempty)
+    if not len(starts):
+        return np.zeros(0), np.zeros(0)
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    xs = np.repeat(columns.astype(np.float64), 2)
+    ys = np.empty(2 * len(starts))
+    ys[0::2] = highs
+    ys[1::2] = lows
+    return xs, ys
+class StripChart:
+    def __init__(self, canvas, history, channels, title="", min_range=1.0, margin=4):
+        self.canvas = canvas
+        self.history = history
+        self.channels = [(history.rows[name], name) for name, _ in channels]
+        self.min_range = min_range
+        self.margin = margin
+        self.width = int(canvas["width"])
+        self.height = int(canvas["height"])
+        self.lines = [canvas.create_line(0, 0, 0, 0, fill=color, tags="trace") for _, color in channels]
+        self.title = canvas.create_text(4, 2, anchor="nw", text=title, fill="#888888")
+        self.scale_item = canvas.create_text(self.width - 4, 2, anchor="ne", text="", fill="#888888")
+        self.zero_line = canvas.create_line(0, 0, 0, 0, fill="#333344", dash=(2, 4))
+        self.points = 0
+        canvas.tag_lower(self.zero_line)
+        canvas.bind("<Configure>", self.on_configure)
+    def on_configure(self, event):
+        if event.width > 1 and event.height > 1:
+            self.width = event.width
+            self.height = event.height
+            self.canvas.coords(self.scale_item, self.width - 4, 2)
+    def draw(self, end, span):
+        self.render(self.collect(end, span))
+    def collect(self, end, span):
+        history = self.history
+        lo, hi = history.window(end - span, end)
+        t = history.take(0, lo, hi)
+        t0 = end - span
+        traces = []
+        for row, _ in self.channels:
+            xs, ys = decimate(t, history.take(row, lo, hi), t0, span, self.width)
+            traces.append((xs, ys.copy()))
+        return traces
+    def render(self, traces):
+        canvas = self.canvas
+        width = self.width
+        y_min = np.inf
+        y_max = -np.inf
+        for xs, ys in traces:
+            if len(ys):
+                y_min = min(y_min, float(ys.min()))
+                y_max = max(y_max, float(ys.max()))
+        if y_min > y_max:
+            y_min, y_max = -self.min_range / 2, self.min_range / 2
+        if y_max - y_min < self.min_range:
+            mid = (y_max + y_min) / 2
+            y_min, y_max = mid - self.min_range / 2, mid + self.min_range / 2
+        scale = (self.height - 2 * self.margin) / (y_max - y_min)
+        offset = self.height - self.margin + y_min * scale
+        self.points = 0
+        for item, (xs, ys) in zip(self.lines, traces):
+            if len(xs) < 2:
+                canvas.coords(item, -1, -1, -1, -1)
+                continue
+            coords = np.empty(2 * len(xs))
+            coords[0::2] = xs
+            coords[1::2] = offset - ys * scale
+            canvas.coords(item, coords.tolist())
+            self.points += len(xs)
+        if y_min < 0 < y_max:
+            canvas.coords(self.zero_line, 0, offset, width, offset)
+        else:
+            canvas.coords(self.zero_line, -1, -1, -1, -1)
+        canvas.itemconfig(self.scale_item, text=f"{y_min:.2f} ~ {y_max:.2f}")
+
+# x0r_fl0w
\ No newline at end of file
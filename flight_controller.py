@@ -1,172 +1,167 @@
 import math
-import json
-import socket
 import threading
 import random
-sensor_data = {"accelerometer": [0.0, 0.0, 0.0], "gyroscope": [0.0, 0.0, 0.0], "barometer": 1013.25, "gps": [0.0, 0.0, 0.0]}
-setpoint = {"roll": 0.0, "pitch": 0.0, "yaw": 0.0, "throttle": 0.0}
-params = {}
-param_lock = threading.Lock()
-class PIDController:
-    def __init__(self, kp, ki, kd):
-        self.kp = kp
-        self.ki = ki
-        self.kd = kd
-        self.prev_error = 0.0
-        self.integral = 0.0
-    def compute(self, setpoint, process_value, dt):
-        error = setpoint - process_value
-        self.integral += error * dt
-        derivative = (error - self.prev_error) / dt if dt > 0 else 0.0
-        output = self.kp * error + self.ki * self.integral + self.kd * derivative
-        self.prev_error = error
-        return output
-    def update_params(self, kp, ki, kd):
-        self.kp = kp
-        self.ki = ki
-        self.kd = kd
-
-roll_pid = PIDController(2.5, 0.1, 0.5)
-pitch_pid = PIDController(2.5, 0.1, 0.5)
-yaw_pid = PIDController(1.0, 0.05, 0.2)
-throttle_pid = PIDController(5.0, 0.2, 1.0)
-
-def load_params():
-    global params
-    try:
-        with open('flight_params.json', 'r') as f:
-            with param_lock:
-                params = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        pass
-
-def start_param_server():
-    def param_listener():
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.bind(('0.0.0.0', 5005))
-            while True:
-                data, _ = s.recvfrom(1024)
-                try:
-                    msg = json.loads(data.decode())
-                    param_name = msg.get('param')
-                    value = msg.get('value')
-                    if param_name:
-                        with param_lock:
-                            params[param_name] = value
-                except json.JSONDecodeError:
-                    pass
-    thread = threading.Thread(target=param_listener, daemon=True)
-    thread.start()
-
-load_params()
-start_param_server()
-def read_sensors():
-    with param_lock:
-        current_params = params.copy()
-    accel_noise = current_params.get('accel_noise', 0.01)
-    gyro_noise = current_params.get('gyro_noise', 0.01)
-    simulate_wind = current_params.get('simulate_wind', False)
-    
-    accel = [
-        random.gauss(0, accel_noise),
-        random.gauss(0, accel_noise),
-        9.8 + random.gauss(0, accel_noise)
-    ]
-    
-    gyro = [
-        random.gauss(0, gyro_noise),
-        random.gauss(0, gyro_noise),
-        random.gauss(0, gyro_noise)
-    ]
-    
-    if simulate_wind:
-        wind_strength = current_params.get('wind_strength', 0.1)
-        wind_dir = current_params.get('wind_direction', 0.0)
-        accel[0] += wind_strength * math.cos(wind_dir)
-        accel[1] += wind_strength * math.sin(wind_dir)
-    
-    return {
-        "accelerometer": accel,
-        "gyroscope": gyro,
-        "barometer": 1013.25 + random.gauss(0, 0.1),
-        "gps": [0.0, 0.0, 0.0] if not current_params.get('enable_gps', True) else [
-            random.gauss(0, current_params.get('gps_accuracy', 0.5)),
-            random.gauss(0, current_params.get('gps_accuracy', 0.5)),
-            random.gauss(0, current_params.get('gps_accuracy', 0.5))
-        ]
-    }
-def calculate_attitude(accel, gyro, dt):
-    ax, ay, az = accel
-    gx, gy, gz = gyro
-    roll = math.atan2(ay, math.sqrt(ax**2 + az**2)) * 180 / math.pi
-    pitch = math.atan2(-ax, math.sqrt(ay**2 + az**2)) * 180 / math.pi
-    return roll, pitch, 0.0
-def send_motor_commands(motors):
-    pass
-
-def send_flight_data_to_ui(roll, pitch, yaw, motors, sensors):
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            message = json.dumps({
-                "roll": roll,
-                "pitch": pitch,
-                "yaw": yaw,
-                "motors": motors,
-                "sensors": {
-                    "accel": sensors["accelerometer"],
-                    "gyro": sensors["gyroscope"],
-                    "baro": sensors["barometer"]
-                }
-            }).encode()
-            s.sendto(message, ('localhost', 5006))
-    except Exception:
+import sys
+import time
+from flight_scheduler import LoopScheduler
+from flight_ring import SampleRing, RingWorker
+from flight_estimator import AttitudeEstimator, ESTIMATOR_MODES
+from flight_schema import ParamSnapshot
+from flight_pid import PIDBank
+from flight_sensors import SENSOR_SOURCES, create_sensor_source
+class FlightController:
+    def __init__(self, vehicle_id=0, params=None, estimator="complementary", rate_hz=100.0, seed=None, clock=time.monotonic, sleep=time.sleep,
+                 network=None, telemetry=None, sinks=None, ring_size=256, ring_policy="drop_oldest", stats_interval=0.0, plant=None, sensors=None):
+        self.vehicle_id = vehicle_id
+        self.rate_hz = rate_hz
+        self.clock = clock
+        self.sleep = sleep
+        self.stats_interval = stats_interval
+        self.param_lock = threading.Lock()
+        self.params = ParamSnapshot()
+        self.applied = None
+        self.setpoint = {"roll": 0.0, "pitch": 0.0, "yaw": 0.0, "throttle": 0.0}
+        self.pids = PIDBank(gains=((2.5, 0.1, 0.5), (2.5, 0.1, 0.5), (1.0, 0.05, 0.2)))
+        self.pid_targets = [0.0, 0.0, 0.0]
+        self.pid_achieved = [0.0, 0.0, 0.0]
+        self.rng = random.Random(seed)
+        self.plant = plant
+        if sensors is None:
+            sensors = create_sensor_source("plant" if plant is not None else "synthetic", seed, plant)
+        self.sensor_source = sensors
+        self.estimator = None
+        self.set_estimator(estimator)
+        self.network = network
+        self.owns_network = False
+        self.param_endpoint = None
+        self.param_store = None
+        self.filtered_messages = 0
+        self.telemetry = telemetry
+        self.sinks = list(sinks or ())
+        self.ring_size = ring_size
+        self.ring_policy = ring_policy
+        self.ring = None
+        self.sample = None
+        self.sensors = None
+        self.scheduler = None
+        self.worker = None
+        self.thread = None
+        self.running = False
+        if params is not None:
+            self.set_params(params)
+    def load_params(self, path="flight_params.json"):
+        from flight_store import ParamStore
+        self.param_store = ParamStore(path)
+        return self.set_params(self.param_store.snapshot())
+    def watch_params(self, interval=0.5):
+        if self.param_store is None:
+            self.load_params()
+        self.param_store.watch(self.on_param_file_change, interval)
+    def on_param_file_change(self, changes, version):
+        self.apply_param_updates(changes)
+    def set_params(self, values):
+        with self.param_lock:
+            self.params = ParamSnapshot.from_dict(values, self.params.version + 1)
+        return self.params
+    def apply_param_updates(self, updates):
+        with self.param_lock:
+            self.params, applied, rejected = self.params.with_updates(updates)
+            return self.params.version, applied, rejected
+    def start_network(self):
+        if self.network is None:
+            from flight_net import NetworkLoop
+            self.network = NetworkLoop(f"controller-net-{self.vehicle_id}").start()
+            self.owns_network = True
+        return self.network
+    def on_param_message(self, endpoint, data, addr):
+        from flight_protocol import decode_param_message, encode_ack
+        seq, updates, vehicle = decode_param_message(data)
+        if vehicle is not None and vehicle != self.vehicle_id:
+            self.filtered_messages += 1
+            return
+        if not updates:
+            return
+        version, applied, rejected = self.apply_param_updates(updates)
+        if seq is not None:
+            endpoint.send(encode_ack(seq, version, applied, rejected, self.vehicle_id), addr)
+    def start_param_server(self, port):
+        self.param_endpoint = self.start_network().open("params", self.on_param_message, local_addr=('0.0.0.0', port))
+        return self.param_endpoint
+    def read_sensors(self, p=None):
+        if p is None:
+            p = self.params
+        return self.sensor_source.read(p)
+    def calculate_attitude(self, accel, gyro, dt):
+        if self.estimator is not None:
+            return self.estimator.update(accel, gyro, dt)
+        ax, ay, az = accel
+        roll = math.atan2(ay, math.sqrt(ax**2 + az**2)) * 180 / math.pi
+        pitch = math.atan2(-ax, math.sqrt(ay**2 + az**2)) * 180 / math.pi
+        return roll, pitch, 0.0
+    def set_estimator(self, mode):
+        self.estimator = None if mode == "accel" else AttitudeEstimator(mode)
+    def send_motor_commands(self, motors):
         pass
-def update_setpoint(new_setpoint):
-    setpoint.update(new_setpoint)
-def main():
-    dt = 0.01
-    last_param_update = time.time()
-    while True:
-        current_time = time.time()
-        if current_time - last_param_update > 1.0:
-            with param_lock:
-                current_params = params.copy()
-            roll_pid.update_params(
-                current_params.get('roll_kp', 2.5),
-                current_params.get('roll_ki', 0.1),
-                current_params.get('roll_kd', 0.5)
-            )
-            pitch_pid.update_params(
-                current_params.get('pitch_kp', 2.5),
-                current_params.get('pitch_ki', 0.1),
-                current_params.get('pitch_kd', 0.5)
-            )
-            yaw_pid.update_params(
-                current_params.get('yaw_kp', 1.0),
-                current_params.get('yaw_ki', 0.05),
-                current_params.get('yaw_kd', 0.2)
-            )
-            throttle_pid.update_params(
-                current_params.get('throttle_kp', 5.0),
-                current_params.get('throttle_ki', 0.2),
-                current_params.get('throttle_kd', 1.0)
-            )
-            setpoint["roll"] = current_params.get('target_roll', 0.0)
-            setpoint["pitch"] = current_params.get('target_pitch', 0.0)
-            setpoint["yaw"] = current_params.get('target_yaw', 0.0)
-            setpoint["throttle"] = current_params.get('target_throttle', 0.5)
-            last_param_update = current_time
-        
-        sensors = read_sensors()
+    def send_flight_data_to_ui(self, roll, pitch, yaw, motors, sensors):
+        if self.telemetry is None:
+            from flight_telemetry import TelemetryPublisher
+            self.telemetry = TelemetryPublisher(vehicle=self.vehicle_id)
+        self.telemetry.publish(roll, pitch, yaw, motors, sensors)
+    def fill_record(self, sample, timestamp, roll, pitch, yaw, motors, sensors, p):
+        fill_sample(sample, timestamp, roll, pitch, yaw, motors, sensors)
+        setpoint = self.setpoint
+        gps = sensors["gps"]
+        sample[15] = gps[0]
+        sample[16] = gps[1]
+        sample[17] = gps[2]
+        sample[18] = setpoint["roll"]
+        sample[19] = setpoint["pitch"]
+        sample[20] = setpoint["yaw"]
+        sample[21] = setpoint["throttle"]
+        self.pids.fill_terms(sample, 22)
+        sample[31] = p.version
+    def motor_sink(self, sample):
+        self.send_motor_commands(sample[4:8])
+    def telemetry_sink(self, sample):
+        self.telemetry.publish_sample(sample)
+    def update_setpoint(self, new_setpoint):
+        setpoint = self.setpoint
+        setpoint.update(new_setpoint)
+        self.pid_targets[:] = (setpoint["roll"], setpoint["pitch"], setpoint["yaw"])
+    def apply_params(self, p):
+        self.pids.set_gains(((p.roll_kp, p.roll_ki, p.roll_kd), (p.pitch_kp, p.pitch_ki, p.pitch_kd), (p.yaw_kp, p.yaw_ki, p.yaw_kd)),
+                            p.pid_integral_limit, p.pid_derivative_cutoff, p.pid_antiwindup_gain)
+        setpoint = self.setpoint
+        setpoint["roll"] = p.target_roll
+        setpoint["pitch"] = p.target_pitch
+        setpoint["yaw"] = p.target_yaw
+        setpoint["throttle"] = p.target_throttle
+        self.pid_targets[:] = (p.target_roll, p.target_pitch, p.target_yaw)
+        self.sensor_source.apply_params(p)
+        if self.plant is not None:
+            self.plant.apply_params(p)
+        self.applied = p
+    def refresh_params(self):
+        p = self.params
+        if p is not self.applied:
+            self.apply_params(p)
+        return p
+    def reset_controllers(self):
+        self.pids.reset()
+        if self.estimator is not None:
+            self.estimator.reset()
+    def control_step(self, sensors, dt, p=None):
+        if p is None:
+            p = self.params
         accel = sensors["accelerometer"]
         gyro = sensors["gyroscope"]
-        current_roll, current_pitch, current_yaw = calculate_attitude(accel, gyro, dt)
-        
-        with param_lock:
-            simulate_failure = params.get('simulate_failure', False)
-            failure_type = params.get('failure_type', 'none')
-        
-        if simulate_failure and failure_type != 'none':
+        attitude = self.calculate_attitude(accel, gyro, dt)
+        current_roll, current_pitch, current_yaw = attitude
+
+        simulate_failure = p.simulate_failure
+        failure_type = p.failure_type
+
+        if simulate_failure and failure_type in ('motor1', 'motor2', 'motor3', 'motor4'):
             if failure_type == 'motor1':
                 motor1 = 0.0
                 motor2 = motor4 = 0.7
@@ -179,30 +174,221 @@ def main():
                 motor3 = 0.0
                 motor2 = motor4 = 0.7
                 motor1 = 0.3
-            elif failure_type == 'motor4':
+            else:
                 motor4 = 0.0
                 motor1 = motor3 = 0.7
                 motor2 = 0.3
-            elif failure_type == 'sensor':
-                current_roll += 10.0 * random.random()
-                current_pitch += 10.0 * random.random()
         else:
-            roll_output = roll_pid.compute(setpoint["roll"], current_roll, dt)
-            pitch_output = pitch_pid.compute(setpoint["pitch"], current_pitch, dt)
-            yaw_output = yaw_pid.compute(setpoint["yaw"], current_yaw, dt)
-            throttle_output = setpoint["throttle"]
+            if simulate_failure and failure_type == 'sensor':
+                rng = self.rng
+                current_roll += 10.0 * rng.random()
+                current_pitch += 10.0 * rng.random()
+                attitude = (current_roll, current_pitch, current_yaw)
+            roll_output, pitch_output, yaw_output = self.pids.compute(self.pid_targets, attitude, dt)
+            throttle_output = self.setpoint["throttle"]
             motor1 = throttle_output + roll_output + pitch_output - yaw_output
             motor2 = throttle_output - roll_output + pitch_output + yaw_output
             motor3 = throttle_output - roll_output - pitch_output - yaw_output
             motor4 = throttle_output + roll_output - pitch_output + yaw_output
-        
+            motors = [max(0, min(1, m)) for m in (motor1, motor2, motor3, motor4)]
+            m1, m2, m3, m4 = motors
+            if m1 != motor1 or m2 != motor2 or m3 != motor3 or m4 != motor4:
+                achieved = self.pid_achieved
+                achieved[0] = (m1 - m2 - m3 + m4) * 0.25
+                achieved[1] = (m1 + m2 - m3 - m4) * 0.25
+                achieved[2] = (m2 + m4 - m1 - m3) * 0.25
+                self.pids.back_calculate(achieved, dt)
+            return current_roll, current_pitch, current_yaw, motors
+
         motors = [motor1, motor2, motor3, motor4]
-        motors = [max(0, min(1, m)) for m in motors]
-        send_motor_commands(motors)
-        send_flight_data_to_ui(current_roll, current_pitch, current_yaw, motors, sensors)
-        time.sleep(dt)
+        return current_roll, current_pitch, current_yaw, motors
+    def step(self, dt, timestamp=None):
+        p = self.refresh_params()
+        sensors = self.sensors = self.read_sensors(p)
+        current_roll, current_pitch, current_yaw, motors = self.control_step(sensors, dt, p)
+        if self.plant is not None:
+            self.plant.step(motors, dt)
+        if self.ring is not None:
+            self.fill_record(self.sample, self.clock() if timestamp is None else timestamp, current_roll, current_pitch, current_yaw, motors, sensors, p)
+            self.ring.push(self.sample)
+        return current_roll, current_pitch, current_yaw, motors
+    def prepare(self):
+        from flight_blackbox import RECORD_FIELDS
+        if self.ring is None:
+            self.ring = SampleRing(self.ring_size, len(RECORD_FIELDS), self.ring_policy)
+            self.sample = [0.0] * len(RECORD_FIELDS)
+        sinks = [self.motor_sink]
+        if self.telemetry is not None:
+            sinks.append(self.telemetry_sink)
+        self.worker = RingWorker(self.ring, sinks + self.sinks, name=f"ring-worker-{self.vehicle_id}")
+        self.worker.start()
+        self.scheduler = LoopScheduler(self.rate_hz, self.clock, self.sleep, spin=0.0005 if self.sleep is time.sleep else 0.0)
+        self.running = True
+    def start(self):
+        if self.running:
+            return self
+        self.prepare()
+        self.thread = threading.Thread(target=self.run_loop, name=f"controller-{self.vehicle_id}", daemon=True)
+        self.thread.start()
+        return self
+    def run(self):
+        self.prepare()
+        try:
+            self.run_loop()
+        finally:
+            self.stop()
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+        if self.worker is not None:
+            if not self.worker.stop():
+                print(f"输出线程未在超时内退出，剩余 {self.ring.stats()['pending']} 个样本由输出线程退出时处理")
+            self.worker = None
+        if self.param_endpoint is not None:
+            self.param_endpoint.close()
+            self.param_endpoint = None
+        if self.param_store is not None:
+            self.param_store.stop()
+        if self.owns_network:
+            self.network.stop()
+            self.network = None
+            self.owns_network = False
+    def run_loop(self):
+        scheduler = self.scheduler
+        ring = self.ring
+        sample = self.sample
+        clock = self.clock
+        stats_interval = self.stats_interval
+        last_stats_report = clock()
+        while self.running:
+            dt = scheduler.wait()
+            current_time = clock()
+            p = self.refresh_params()
+            scheduler.mark("params")
+
+            sensors = self.sensors = self.read_sensors(p)
+            scheduler.mark("sensors")
+            current_roll, current_pitch, current_yaw, motors = self.control_step(sensors, dt, p)
+            if self.plant is not None:
+                self.plant.step(motors, dt)
+            scheduler.mark("control")
+            self.fill_record(sample, current_time, current_roll, current_pitch, current_yaw, motors, sensors, p)
+            ring.push(sample)
+            scheduler.mark("io")
+            if stats_interval > 0 and current_time - last_stats_report >= stats_interval:
+                ring_stats = ring.stats()
+                print(f"{scheduler.summary()} 输出队列 {ring_stats['pending']}/{ring_stats['capacity']} 丢弃 {ring_stats['dropped']}")
+                if self.network is not None:
+                    print(f"网络 {self.network.summary()}")
+                last_stats_report = current_time
+def fill_sample(sample, timestamp, roll, pitch, yaw, motors, sensors):
+    accel = sensors["accelerometer"]
+    gyro = sensors["gyroscope"]
+    sample[0] = timestamp
+    sample[1] = roll
+    sample[2] = pitch
+    sample[3] = yaw
+    sample[4] = motors[0]
+    sample[5] = motors[1]
+    sample[6] = motors[2]
+    sample[7] = motors[3]
+    sample[8] = accel[0]
+    sample[9] = accel[1]
+    sample[10] = accel[2]
+    sample[11] = gyro[0]
+    sample[12] = gyro[1]
+    sample[13] = gyro[2]
+    sample[14] = sensors["barometer"]
+def main():
+    import argparse
+    from flight_telemetry import TelemetryPublisher, CsvSampleLog
+    from flight_blackbox import BlackboxWriter
+    from flight_protocol import PARAM_PORT, is_ack
+    from flight_net import NetworkLoop
+    from flight_capture import CaptureWriter, CaptureReader, Replayer
+    parser = argparse.ArgumentParser(description="飞控主程序")
+    parser.add_argument("--rate", type=float, default=100.0, help="控制循环频率 (Hz)，建议 100-1000")
+    parser.add_argument("--stats-interval", type=float, default=0.0, help="每隔多少秒打印一次循环时序统计，0 表示不打印")
+    parser.add_argument("--telemetry", choices=("binary", "json"), default="binary", help="遥测数据格式")
+    parser.add_argument("--decimation", type=int, default=1, help="每隔多少个控制周期发送一次遥测")
+    parser.add_argument("--batch", type=int, default=1, help="每个UDP包打包的遥测样本数")
+    parser.add_argument("--ring-size", type=int, default=256, help="控制线程输出环形缓冲区容量（样本数）")
+    parser.add_argument("--ring-policy", choices=("drop_oldest", "drop_newest"), default="drop_oldest", help="缓冲区满时的丢弃策略")
+    parser.add_argument("--estimator", choices=("accel",) + ESTIMATOR_MODES, default="complementary", help="姿态估计算法：complementary 为积分增益为 0 的 Mahony，mahony 另估计陀螺仪零偏，ekf 为扩展卡尔曼，accel 为仅用加速度计的旧算法")
+    parser.add_argument("--log", default=None, help="将每个控制周期的样本写入CSV日志文件")
+    parser.add_argument("--blackbox", default=None, help="黑匣子日志目录，按分段写入定长二进制记录")
+    parser.add_argument("--blackbox-segment", type=int, default=60000, help="每个黑匣子分段文件的记录数")
+    parser.add_argument("--blackbox-keep", type=int, default=None, help="最多保留的黑匣子分段数，超出时删除最旧的分段")
+    parser.add_argument("--vehicle", type=int, default=0, help="飞行器编号，只接受发给本机或未指定编号的参数消息")
+    parser.add_argument("--param-port", type=int, default=PARAM_PORT, help="参数接收端口")
+    parser.add_argument("--params", default="flight_params.json", help="参数文件")
+    parser.add_argument("--param-poll", type=float, default=0.5, help="每隔多少秒检查一次参数文件的修改并应用变化的参数，0 表示只在启动时读取")
+    parser.add_argument("--telemetry-host", default="localhost", help="遥测发送目标地址")
+    parser.add_argument("--telemetry-port", type=int, default=5006, help="遥测发送目标端口")
+    parser.add_argument("--capture", default=None, help="把参数和遥测通道收发的所有数据包记录到抓包文件")
+    parser.add_argument("--replay-params", default=None, help="从抓包文件回放参数消息驱动飞控")
+    parser.add_argument("--replay-channel", type=int, default=PARAM_PORT, help="抓包文件中参数通道的端口")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="参数回放倍速，0 表示尽快发送")
+    parser.add_argument("--plant", action="store_true", help="用四旋翼刚体动力学模型闭环仿真：电机指令驱动模型，传感器读数来自模型状态")
+    parser.add_argument("--plant-gains", action="store_true", help="改用适合动力学模型的增益 flight_plant.PLANT_GAINS（同时启用 --plant）")
+    parser.add_argument("--sensors", choices=SENSOR_SOURCES, default=None, help="传感器数据源，默认 synthetic（加 --plant 时为 plant）")
+    parser.add_argument("--sensor-file", default=None, help="file 数据源读取的飞行记录（黑匣子目录或CSV），读完后从头循环")
+    parser.add_argument("--sensor-block", type=int, default=1024, help="传感器噪声或记录每次批量生成/读取的采样数")
+    args = parser.parse_args()
+    if args.sensors == "file" and not args.sensor_file:
+        parser.error("--sensors file 需要同时指定 --sensor-file")
+    network = NetworkLoop("controller-net").start()
+    capture = None
+    if args.capture:
+        capture = CaptureWriter(args.capture, (args.param_port, args.telemetry_port))
+        network.capture = capture
+    sinks = []
+    if args.log:
+        sinks.append(CsvSampleLog(args.log))
+    if args.blackbox:
+        sinks.append(BlackboxWriter(args.blackbox, segment_records=args.blackbox_segment, max_segments=args.blackbox_keep))
+    plant = None
+    if args.plant or args.plant_gains:
+        from flight_plant import QuadPlant
+        plant = QuadPlant()
+    sensors = create_sensor_source(args.sensors or ("plant" if plant is not None else "synthetic"), plant=plant, path=args.sensor_file,
+                                   block=args.sensor_block)
+    controller = FlightController(args.vehicle, estimator=args.estimator, rate_hz=args.rate, network=network, sinks=sinks,
+                                  ring_size=args.ring_size, ring_policy=args.ring_policy, stats_interval=args.stats_interval, plant=plant, sensors=sensors)
+    controller.load_params(args.params)
+    if args.plant_gains:
+        from flight_plant import PLANT_GAINS
+        controller.apply_param_updates(PLANT_GAINS)
+    if args.param_poll > 0:
+        controller.param_store.subscribe(lambda changes, version: print(f"参数文件已更新（版本 {version}）: {', '.join(sorted(changes))}"))
+        controller.watch_params(args.param_poll)
+    param_endpoint = controller.start_param_server(args.param_port)
+    controller.telemetry = TelemetryPublisher((args.telemetry_host, args.telemetry_port), args.telemetry, args.decimation, args.batch,
+                                              endpoint=param_endpoint, vehicle=args.vehicle)
+    replayer = None
+    if args.replay_params:
+        replay_endpoint = network.open("param_replay", local_addr=("0.0.0.0", 0))
+        replay_target = ("127.0.0.1", args.param_port)
+        replayer = Replayer(CaptureReader(args.replay_params), lambda channel, data: replay_endpoint.send(data, replay_target),
+                            args.replay_speed, (args.replay_channel,), predicate=lambda data: not is_ack(data)).start()
+    try:
+        controller.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sink in sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+        if replayer is not None:
+            replayer.stop()
+        controller.telemetry.close()
+        network.stop()
+        if capture is not None:
+            capture.close()
+    return 0
 if __name__ == "__main__":
-    import time
-    main()
+    sys.exit(main())
 
 # x0r_fl0w
\ No newline at end of file
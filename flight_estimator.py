@@ -0,0 +1,225 @@
+import math
+import sys
+import time
+ESTIMATOR_MODES = ("complementary", "mahony", "ekf")
+COST_BUDGET_US = {"complementary": 30.0, "mahony": 35.0, "ekf": 200.0}
+GRAVITY = 9.8
+SEA_LEVEL_PRESSURE = 1013.25
+MODE_NOTES = {
+    "complementary": "Mahony 结构、积分增益为 0 的互补滤波",
+    "mahony": "互补滤波加陀螺仪零偏积分",
+    "ekf": "扩展卡尔曼滤波"
+}
+class AttitudeEstimator:
+    def __init__(self, mode="complementary", kp=1.0, ki=0.05, gyro_noise=0.01, accel_noise=0.05, accel_gate=0.15):
+        if mode not in ESTIMATOR_MODES:
+            raise ValueError(f"未知姿态估计模式: {mode}")
+        self.mode = mode
+        self.kp = kp
+        self.ki = ki if mode == "mahony" else 0.0
+        self.gyro_var = gyro_noise * gyro_noise
+        self.accel_var = accel_noise * accel_noise
+        self.accel_gate = accel_gate
+        self.q = [1.0, 0.0, 0.0, 0.0]
+        self.bias = [0.0, 0.0, 0.0]
+        self.P = [[0.0] * 4 for _ in range(4)]
+        self.FP = [[0.0] * 4 for _ in range(4)]
+        self.HP = [[0.0] * 4 for _ in range(3)]
+        self.K = [[0.0] * 3 for _ in range(4)]
+        self.H = [[0.0] * 4 for _ in range(3)]
+        self.initialized = False
+        self.updates = 0
+        self.update_time = 0.0
+        self.max_update_time = 0.0
+    def reset(self):
+        self.q[:] = [1.0, 0.0, 0.0, 0.0]
+        self.bias[:] = [0.0, 0.0, 0.0]
+        for row in self.P:
+            row[:] = [0.0, 0.0, 0.0, 0.0]
+        self.initialized = False
+        self.updates = 0
+        self.update_time = 0.0
+        self.max_update_time = 0.0
+    def initialize(self, ax, ay, az):
+        roll = math.atan2(ay, az)
+        pitch = math.atan2(-ax, math.sqrt(ay * ay + az * az))
+        cr, sr = math.cos(roll / 2), math.sin(roll / 2)
+        cp, sp = math.cos(pitch / 2), math.sin(pitch / 2)
+        self.q[:] = [cr * cp, sr * cp, cr * sp, -sr * sp]
+        P = self.P
+        for i in range(4):
+            P[i][:] = [0.0, 0.0, 0.0, 0.0]
+            P[i][i] = 0.01
+        self.initialized = True
+    def update(self, accel, gyro, dt):
+        start = time.perf_counter()
+        ax, ay, az = accel
+        if not self.initialized:
+            self.initialize(ax, ay, az)
+        norm = math.sqrt(ax * ax + ay * ay + az * az)
+        accel_valid = norm > 0 and abs(norm - GRAVITY) < self.accel_gate * GRAVITY
+        if norm > 0:
+            ax /= norm
+            ay /= norm
+            az /= norm
+        if self.mode == "ekf":
+            self.update_ekf(ax, ay, az, gyro, dt, accel_valid, norm)
+        else:
+            self.update_mahony(ax, ay, az, gyro, dt, accel_valid)
+        elapsed = time.perf_counter() - start
+        self.updates += 1
+        self.update_time += elapsed
+        if elapsed > self.max_update_time:
+            self.max_update_time = elapsed
+        return self.euler()
+    def update_mahony(self, ax, ay, az, gyro, dt, accel_valid):
+        w, x, y, z = self.q
+        gx, gy, gz = gyro
+        if accel_valid:
+            vx = 2.0 * (x * z - w * y)
+            vy = 2.0 * (w * x + y * z)
+            vz = w * w - x * x - y * y + z * z
+            ex = ay * vz - az * vy
+            ey = az * vx - ax * vz
+            ez = ax * vy - ay * vx
+            if self.ki > 0.0:
+                bias = self.bias
+                bias[0] += self.ki * ex * dt
+                bias[1] += self.ki * ey * dt
+                bias[2] += self.ki * ez * dt
+                gx += bias[0]
+                gy += bias[1]
+                gz += bias[2]
+            gx += self.kp * ex
+            gy += self.kp * ey
+            gz += self.kp * ez
+        self.integrate(w, x, y, z, gx, gy, gz, dt)
+    def integrate(self, w, x, y, z, gx, gy, gz, dt):
+        h = 0.5 * dt
+        nw = w + (-x * gx - y * gy - z * gz) * h
+        nx = x + (w * gx + y * gz - z * gy) * h
+        ny = y + (w * gy - x * gz + z * gx) * h
+        nz = z + (w * gz + x * gy - y * gx) * h
+        n = 1.0 / math.sqrt(nw * nw + nx * nx + ny * ny + nz * nz)
+        q = self.q
+        q[0] = nw * n
+        q[1] = nx * n
+        q[2] = ny * n
+        q[3] = nz * n
+    def update_ekf(self, ax, ay, az, gyro, dt, accel_valid, norm):
+        gx, gy, gz = gyro
+        h = 0.5 * dt
+        F = ((1.0, -gx * h, -gy * h, -gz * h),
+             (gx * h, 1.0, gz * h, -gy * h),
+             (gy * h, -gz * h, 1.0, gx * h),
+             (gz * h, gy * h, -gx * h, 1.0))
+        w, x, y, z = self.q
+        self.integrate(w, x, y, z, gx, gy, gz, dt)
+        P = self.P
+        FP = self.FP
+        for i in range(4):
+            Fi = F[i]
+            row = FP[i]
+            for j in range(4):
+                row[j] = Fi[0] * P[0][j] + Fi[1] * P[1][j] + Fi[2] * P[2][j] + Fi[3] * P[3][j]
+        qn = self.gyro_var * h * h
+        for i in range(4):
+            FPi = FP[i]
+            for j in range(i, 4):
+                Fj = F[j]
+                value = FPi[0] * Fj[0] + FPi[1] * Fj[1] + FPi[2] * Fj[2] + FPi[3] * Fj[3]
+                P[i][j] = value
+                P[j][i] = value
+            P[i][i] += qn
+        if not accel_valid:
+            return
+        w, x, y, z = self.q
+        H = self.H
+        H[0][:] = [-2.0 * y, 2.0 * z, -2.0 * w, 2.0 * x]
+        H[1][:] = [2.0 * x, 2.0 * w, 2.0 * z, 2.0 * y]
+        H[2][:] = [2.0 * w, -2.0 * x, -2.0 * y, 2.0 * z]
+        residual = (ax - 2.0 * (x * z - w * y), ay - 2.0 * (w * x + y * z), az - (w * w - x * x - y * y + z * z))
+        HP = self.HP
+        for i in range(3):
+            Hi = H[i]
+            row = HP[i]
+            for j in range(4):
+                row[j] = Hi[0] * P[0][j] + Hi[1] * P[1][j] + Hi[2] * P[2][j] + Hi[3] * P[3][j]
+        r = self.accel_var / (GRAVITY * GRAVITY) * (1.0 + 100.0 * abs(norm - GRAVITY) / GRAVITY)
+        S = [[HP[i][0] * H[j][0] + HP[i][1] * H[j][1] + HP[i][2] * H[j][2] + HP[i][3] * H[j][3] for j in range(3)] for i in range(3)]
+        S[0][0] += r
+        S[1][1] += r
+        S[2][2] += r
+        a, b, c = S[0]
+        d, e, f = S[1]
+        g, hh, k = S[2]
+        det = a * (e * k - f * hh) - b * (d * k - f * g) + c * (d * hh - e * g)
+        if abs(det) < 1e-18:
+            return
+        inv = 1.0 / det
+        Si = ((( e * k - f * hh) * inv, (c * hh - b * k) * inv, (b * f - c * e) * inv),
+              ((f * g - d * k) * inv, (a * k - c * g) * inv, (c * d - a * f) * inv),
+              ((d * hh - e * g) * inv, (b * g - a * hh) * inv, (a * e - b * d) * inv))
+        K = self.K
+        for i in range(4):
+            PHt0 = HP[0][i]
+            PHt1 = HP[1][i]
+            PHt2 = HP[2][i]
+            row = K[i]
+            for j in range(3):
+                row[j] = PHt0 * Si[0][j] + PHt1 * Si[1][j] + PHt2 * Si[2][j]
+        q = self.q
+        for i in range(4):
+            Ki = K[i]
+            q[i] += Ki[0] * residual[0] + Ki[1] * residual[1] + Ki[2] * residual[2]
+        n = 1.0 / math.sqrt(q[0] * q[0] + q[1] * q[1] + q[2] * q[2] + q[3] * q[3])
+        for i in range(4):
+            q[i] *= n
+        for i in range(4):
+            Ki = K[i]
+            Pi = P[i]
+            for j in range(4):
+                Pi[j] -= Ki[0] * HP[0][j] + Ki[1] * HP[1][j] + Ki[2] * HP[2][j]
+    def euler(self):
+        w, x, y, z = self.q
+        roll = math.atan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+        sin_pitch = 2.0 * (w * y - z * x)
+        pitch = math.asin(max(-1.0, min(1.0, sin_pitch)))
+        yaw = math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+        return math.degrees(roll), math.degrees(pitch), math.degrees(yaw)
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "updates": self.updates,
+            "mean_us": 1e6 * self.update_time / self.updates if self.updates else 0.0,
+            "max_us": 1e6 * self.max_update_time,
+            "budget_us": COST_BUDGET_US[self.mode]
+        }
+def benchmark(mode, iterations=20000, dt=0.001):
+    import random
+    rng = random.Random(0)
+    estimator = AttitudeEstimator(mode)
+    samples = [([rng.gauss(0, 0.05), rng.gauss(0, 0.05), GRAVITY + rng.gauss(0, 0.05)],
+                [rng.gauss(0, 0.01), rng.gauss(0, 0.01), rng.gauss(0, 0.01)]) for _ in range(1000)]
+    start = time.perf_counter()
+    for i in range(iterations):
+        accel, gyro = samples[i % 1000]
+        estimator.update(accel, gyro, dt)
+    return 1e6 * (time.perf_counter() - start) / iterations
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="姿态估计器单次更新耗时基准")
+    parser.add_argument("--iterations", type=int, default=20000, help="每种模式的更新次数")
+    args = parser.parse_args()
+    over_budget = False
+    for mode in ESTIMATOR_MODES:
+        cost = benchmark(mode, args.iterations)
+        budget = COST_BUDGET_US[mode]
+        status = "正常" if cost <= budget else "超出预算"
+        over_budget = over_budget or cost > budget
+        print(f"{mode:<14} {cost:7.1f}us/次  预算 {budget:.0f}us  {status}  （{MODE_NOTES[mode]}）")
+    return 1 if over_budget else 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
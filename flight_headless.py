@@ -0,0 +1,102 @@
+import json
+import sys
+import time
+from flight_controller import FlightController
+from flight_telemetry import CsvSampleLog
+from flight_blackbox import BlackboxWriter, RECORD_FIELDS
+from flight_sensors import create_sensor_source
+from flight_store import validate_params
+SCENARIO_KEYS = ("duration", "rate", "seed", "events", "estimator", "plant", "sensor_file")
+def load_scenario(path, base_path="flight_params.json"):
+    scenario = {"params": {}, "duration": 10.0, "rate": 100.0, "seed": 0, "events": [], "estimator": "complementary", "plant": None, "sensor_file": None}
+    try:
+        with open(base_path, "r") as f:
+            scenario["params"].update(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    if path:
+        with open(path, "r") as f:
+            data = json.load(f)
+        params = {}
+        for key, value in data.items():
+            if key in SCENARIO_KEYS:
+                scenario[key] = value
+            else:
+                params[key] = value
+        try:
+            scenario["params"].update(validate_params(params))
+            for event in scenario["events"]:
+                event["params"] = validate_params(event["params"])
+        except ValueError as e:
+            raise ValueError(f"场景文件 {path}: {e}")
+    scenario["events"] = sorted(scenario["events"], key=lambda e: e["time"])
+    return scenario
+def run_headless(scenario, sink=None, duration=None, rate_hz=None, seed=None):
+    duration = scenario["duration"] if duration is None else duration
+    rate_hz = scenario["rate"] if rate_hz is None else rate_hz
+    seed = scenario["seed"] if seed is None else seed
+    if rate_hz <= 0:
+        raise ValueError(f"循环频率必须为正数: {rate_hz}")
+    dt = 1.0 / rate_hz
+    steps = int(round(duration * rate_hz))
+    events = list(scenario["events"])
+    plant = None
+    if scenario.get("plant"):
+        from flight_plant import QuadPlant
+        plant = QuadPlant(scenario["plant"] if isinstance(scenario["plant"], dict) else None)
+    sensors = None
+    if scenario.get("sensor_file"):
+        sensors = create_sensor_source("file", path=scenario["sensor_file"])
+    controller = FlightController(params=scenario["params"], estimator=scenario.get("estimator", "complementary"), seed=seed, plant=plant, sensors=sensors)
+    sample = [0.0] * len(RECORD_FIELDS)
+    for i in range(1, steps + 1):
+        sim_time = i * dt
+        if events and events[0]["time"] <= sim_time:
+            while events and events[0]["time"] <= sim_time:
+                controller.apply_param_updates(events.pop(0)["params"])
+        roll, pitch, yaw, motors = controller.step(dt)
+        if sink is not None:
+            controller.fill_record(sample, sim_time, roll, pitch, yaw, motors, controller.sensors, controller.params)
+            sink(sample)
+    return steps
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="无界面超实时飞控仿真")
+    parser.add_argument("scenario", nargs="?", default=None, help="场景JSON文件（flight_params.json 的键，另支持 duration/rate/seed/events/estimator/plant/sensor_file）")
+    parser.add_argument("-o", "--output", default="trajectory.csv", help="轨迹输出文件（CSV），或 --blackbox 时的黑匣子目录")
+    parser.add_argument("--blackbox", action="store_true", help="以黑匣子二进制格式输出轨迹")
+    parser.add_argument("--duration", type=float, default=None, help="仿真时长（秒），覆盖场景设置")
+    parser.add_argument("--rate", type=float, default=None, help="控制循环频率（Hz），覆盖场景设置")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，覆盖场景设置")
+    parser.add_argument("--plant", action="store_true", help="用四旋翼刚体动力学模型闭环仿真")
+    parser.add_argument("--plant-gains", action="store_true", help="改用适合动力学模型的增益 flight_plant.PLANT_GAINS（同时启用 --plant）")
+    parser.add_argument("--sensor-file", default=None, help="回放飞行记录（黑匣子目录或CSV）中的传感器数据，覆盖场景设置")
+    args = parser.parse_args()
+    try:
+        scenario = load_scenario(args.scenario)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.plant or args.plant_gains:
+        scenario["plant"] = scenario["plant"] or True
+    if args.plant_gains:
+        from flight_plant import PLANT_GAINS
+        scenario["params"].update(PLANT_GAINS)
+    if args.sensor_file:
+        scenario["sensor_file"] = args.sensor_file
+    if args.blackbox:
+        log = BlackboxWriter(args.output, flush_every=100000)
+    else:
+        log = CsvSampleLog(args.output, flush_every=10000, fields=RECORD_FIELDS)
+    start = time.perf_counter()
+    try:
+        steps = run_headless(scenario, log, args.duration, args.rate, args.seed)
+    finally:
+        log.close()
+    elapsed = time.perf_counter() - start
+    sim_time = steps / (args.rate or scenario["rate"])
+    print(f"仿真 {sim_time:.2f}s 共 {steps} 步，耗时 {elapsed:.3f}s（{sim_time / elapsed if elapsed > 0 else 0:.0f}x 实时），轨迹已写入 {args.output}")
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,185 @@
+import asyncio
+import socket
+import threading
+import time
+shared = None
+shared_lock = threading.Lock()
+class Endpoint(asyncio.DatagramProtocol):
+    def __init__(self, network, name, handler=None, max_pending=1024):
+        self.network = network
+        self.name = name
+        self.handler = handler
+        self.max_pending = max_pending
+        self.transport = None
+        self.port = None
+        self.peer = None
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.paused = False
+        self.packets_in = 0
+        self.bytes_in = 0
+        self.packets_out = 0
+        self.bytes_out = 0
+        self.decode_errors = 0
+        self.send_errors = 0
+        self.drops = 0
+        self.backpressure = 0
+        self.snapshot = (time.monotonic(), 0, 0, 0, 0)
+    def connection_made(self, transport):
+        self.transport = transport
+        self.port = transport.get_extra_info("sockname")[1]
+        self.peer = transport.get_extra_info("peername")
+    def connection_lost(self, exc):
+        self.transport = None
+    def datagram_received(self, data, addr):
+        self.packets_in += 1
+        self.bytes_in += len(data)
+        capture = self.network.capture
+        if capture is not None:
+            capture.received(self, data, addr)
+        if self.handler is None:
+            return
+        try:
+            self.handler(self, data, addr)
+        except (ValueError, KeyError, TypeError, IndexError):
+            self.decode_errors += 1
+    def error_received(self, exc):
+        self.send_errors += 1
+    def pause_writing(self):
+        self.paused = True
+        self.backpressure += 1
+    def resume_writing(self):
+        self.paused = False
+    def send(self, data, addr=None):
+        if self.transport is None or self.paused:
+            self.drops += 1
+            return False
+        if self.network.in_loop():
+            return self.send_now(data, addr)
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.drops += 1
+                return False
+            self.pending += 1
+        self.network.loop.call_soon_threadsafe(self.send_queued, bytes(data), addr)
+        return True
+    def send_queued(self, data, addr):
+        with self.lock:
+            self.pending -= 1
+        self.send_now(data, addr)
+    def send_now(self, data, addr):
+        transport = self.transport
+        if transport is None or transport.is_closing():
+            self.drops += 1
+            return False
+        try:
+            transport.sendto(data, addr)
+        except OSError:
+            self.send_errors += 1
+            return False
+        self.packets_out += 1
+        self.bytes_out += len(data)
+        capture = self.network.capture
+        if capture is not None:
+            capture.sent(self, data, addr)
+        return True
+    def stats(self):
+        now = time.monotonic()
+        then, packets_in, packets_out, bytes_in, bytes_out = self.snapshot
+        elapsed = max(now - then, 1e-9)
+        self.snapshot = (now, self.packets_in, self.packets_out, self.bytes_in, self.bytes_out)
+        return {
+            "packets_in": self.packets_in,
+            "packets_out": self.packets_out,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "in_rate": (self.packets_in - packets_in) / elapsed,
+            "out_rate": (self.packets_out - packets_out) / elapsed,
+            "byte_rate": (self.bytes_in - bytes_in + self.bytes_out - bytes_out) / elapsed,
+            "decode_errors": self.decode_errors,
+            "send_errors": self.send_errors,
+            "drops": self.drops,
+            "backpressure": self.backpressure,
+            "pending": self.pending
+        }
+    def close(self):
+        transport = self.transport
+        if transport is not None:
+            self.network.call_soon(transport.close)
+        self.network.remove(self)
+class NetworkLoop:
+    def __init__(self, name="flight-net"):
+        self.name = name
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+        self.thread_id = None
+        self.endpoints = []
+        self.capture = None
+    def start(self):
+        started = threading.Event()
+        def run():
+            self.thread_id = threading.get_ident()
+            asyncio.set_event_loop(self.loop)
+            self.loop.call_soon(started.set)
+            self.loop.run_forever()
+        self.thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self.thread.start()
+        started.wait()
+        return self
+    def in_loop(self):
+        return threading.get_ident() == self.thread_id
+    def call_soon(self, callback, *args):
+        if self.in_loop():
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+    def call(self, coro, timeout=5.0):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+    def open(self, name, handler=None, local_addr=None, remote_addr=None, broadcast=False, max_pending=1024):
+        async def create():
+            family = 0 if local_addr or remote_addr else socket.AF_INET
+            _, protocol = await self.loop.create_datagram_endpoint(
+                lambda: Endpoint(self, name, handler, max_pending),
+                local_addr=local_addr, remote_addr=remote_addr, family=family, allow_broadcast=broadcast)
+            return protocol
+        endpoint = self.call(create())
+        self.endpoints.append(endpoint)
+        return endpoint
+    def remove(self, endpoint):
+        if endpoint in self.endpoints:
+            self.endpoints.remove(endpoint)
+    def stats(self):
+        result = {}
+        for endpoint in list(self.endpoints):
+            name = endpoint.name
+            index = 2
+            while name in result:
+                name = f"{endpoint.name}#{index}"
+                index += 1
+            result[name] = endpoint.stats()
+        return result
+    def summary(self):
+        parts = []
+        for name, s in self.stats().items():
+            parts.append(f"{name} 入 {s['in_rate']:.0f}包/s 出 {s['out_rate']:.0f}包/s {s['byte_rate'] / 1024:.1f}KB/s "
+                         f"解码错误 {s['decode_errors']} 丢弃 {s['drops']}")
+        return " | ".join(parts)
+    def stop(self):
+        for endpoint in list(self.endpoints):
+            endpoint.close()
+        if self.thread is not None:
+            def shutdown():
+                for task in asyncio.all_tasks(self.loop):
+                    task.cancel()
+                self.loop.call_soon(self.loop.stop)
+            self.loop.call_soon_threadsafe(shutdown)
+            self.thread.join(1.0)
+            self.thread = None
+def shared_network():
+    global shared
+    with shared_lock:
+        if shared is None:
+            shared = NetworkLoop().start()
+        return shared
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,85 @@
+import math
+PID_AXES = ("roll", "pitch", "yaw")
+class PIDBank:
+    __slots__ = ("axes", "size", "config", "step", "i_terms", "prev_error", "derivative", "output", "saturated")
+    def __init__(self, axes=PID_AXES, gains=None, i_limit=0.5, d_cutoff=30.0, aw_gain=10.0):
+        self.axes = tuple(axes)
+        self.size = len(self.axes)
+        self.config = None
+        self.step = None
+        self.i_terms = [0.0] * self.size
+        self.prev_error = [0.0] * self.size
+        self.derivative = [0.0] * self.size
+        self.output = [0.0] * self.size
+        self.saturated = 0
+        self.set_gains(gains or [(0.0, 0.0, 0.0)] * self.size, i_limit, d_cutoff, aw_gain)
+    def set_gains(self, gains, i_limit=0.5, d_cutoff=30.0, aw_gain=10.0):
+        if len(gains) != self.size:
+            raise ValueError(f"增益组数应为 {self.size}: {len(gains)}")
+        limits = i_limit if isinstance(i_limit, (list, tuple)) else [i_limit] * self.size
+        rows = tuple((float(kp), float(ki), float(kd), abs(float(limit))) for (kp, ki, kd), limit in zip(gains, limits))
+        tau = 1.0 / (2.0 * math.pi * d_cutoff) if d_cutoff > 0 else 0.0
+        self.config = (rows, tau, float(aw_gain))
+        self.step = None
+    def prepare(self, dt):
+        rows, tau, _ = self.config
+        alpha = dt / (dt + tau) if dt > 0 else 0.0
+        self.step = (dt, alpha, alpha / dt if dt > 0 else 0.0, tuple((kp, ki * dt, kd, limit) for kp, ki, kd, limit in rows))
+        return self.step
+    def gains(self):
+        return {axis: row[:3] for axis, row in zip(self.axes, self.config[0])}
+    def reset(self):
+        for i in range(self.size):
+            self.i_terms[i] = 0.0
+            self.prev_error[i] = 0.0
+            self.derivative[i] = 0.0
+            self.output[i] = 0.0
+    def compute(self, setpoints, measurements, dt):
+        step = self.step
+        if step is None or step[0] != dt:
+            step = self.prepare(dt)
+        _, alpha, d_gain, rows = step
+        i_terms = self.i_terms
+        prev_error = self.prev_error
+        derivative = self.derivative
+        output = self.output
+        for i in range(self.size):
+            kp, ki, kd, limit = rows[i]
+            error = setpoints[i] - measurements[i]
+            i_term = i_terms[i] + ki * error
+            i_term = limit if i_term > limit else -limit if i_term < -limit else i_term
+            d = derivative[i]
+            d += (error - prev_error[i]) * d_gain - alpha * d
+            derivative[i] = d
+            prev_error[i] = error
+            i_terms[i] = i_term
+            output[i] = kp * error + i_term + kd * d
+        return output
+    def fill_terms(self, sample, offset):
+        rows = self.config[0]
+        for i in range(self.size):
+            row = rows[i]
+            sample[offset] = row[0] * self.prev_error[i]
+            sample[offset + 1] = self.i_terms[i]
+            sample[offset + 2] = row[2] * self.derivative[i]
+            offset += 3
+    def back_calculate(self, achieved, dt):
+        rows, _, aw_gain = self.config
+        i_terms = self.i_terms
+        output = self.output
+        for i in range(self.size):
+            excess = achieved[i] - output[i]
+            if -1e-9 < excess < 1e-9:
+                continue
+            self.saturated += 1
+            kp, ki, kd, limit = rows[i]
+            if not ki:
+                continue
+            i_term = i_terms[i] + aw_gain * excess * dt
+            if i_term > limit:
+                i_term = limit
+            elif i_term < -limit:
+                i_term = -limit
+            i_terms[i] = i_term
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,181 @@
+import math
+import sys
+import time
+from flight_estimator import GRAVITY, SEA_LEVEL_PRESSURE
+DEFAULT_QUAD = {
+    "mass": 1.0,
+    "max_thrust": 4.9,
+    "arm": 0.25,
+    "inertia": (0.331, 0.331, 0.6),
+    "yaw_coefficient": 0.08,
+    "drag": 0.25,
+    "rate_damping": 2.0,
+    "motor_time_constant": 0.02,
+    "gravity": GRAVITY
+}
+PLANT_GAINS = {
+    "roll_kp": 0.16,
+    "roll_ki": 0.24,
+    "roll_kd": 0.006,
+    "pitch_kp": 0.16,
+    "pitch_ki": 0.24,
+    "pitch_kd": 0.006,
+    "yaw_kp": 0.3,
+    "yaw_ki": 0.24,
+    "yaw_kd": 0.014
+}
+STATE_SIZE = 13
+def quad_derivative(s, thrust, torque, c):
+    x, y, z, vx, vy, vz, qw, qx, qy, qz, p, q, r = s
+    mass, drag, wind_x, wind_y, gravity, ixx, iyy, izz, damping = c
+    bx = 2.0 * (qx * qz + qw * qy)
+    by = 2.0 * (qy * qz - qw * qx)
+    bz = 1.0 - 2.0 * (qx * qx + qy * qy)
+    f = thrust / mass
+    k = drag / mass
+    return (vx, vy, vz,
+            f * bx - k * (vx - wind_x),
+            f * by - k * (vy - wind_y),
+            f * bz - k * vz - gravity,
+            0.5 * (-qx * p - qy * q - qz * r),
+            0.5 * (qw * p + qy * r - qz * q),
+            0.5 * (qw * q + qz * p - qx * r),
+            0.5 * (qw * r + qx * q - qy * p),
+            (torque[0] - (izz - iyy) * q * r) / ixx - damping * p,
+            (torque[1] - (ixx - izz) * r * p) / iyy - damping * q,
+            (torque[2] - (iyy - ixx) * p * q) / izz - damping * r)
+class QuadPlant:
+    def __init__(self, config=None):
+        self.config = dict(DEFAULT_QUAD, **(config or {}))
+        c = self.config
+        self.lever = c["arm"] / math.sqrt(2.0)
+        self.wind = (0.0, 0.0)
+        self.motor = [0.0, 0.0, 0.0, 0.0]
+        self.torque = [0.0, 0.0, 0.0]
+        self.thrust = 0.0
+        self.specific_force = [0.0, 0.0, c["gravity"]]
+        self.constants = None
+        self.update_constants()
+        self.reset()
+    def update_constants(self):
+        c = self.config
+        ixx, iyy, izz = c["inertia"]
+        self.constants = (c["mass"], c["drag"], self.wind[0], self.wind[1], c["gravity"], ixx, iyy, izz, c["rate_damping"])
+    def reset(self, roll=0.0, pitch=0.0, yaw=0.0, position=(0.0, 0.0, 0.0), hover=True):
+        cr, sr = math.cos(math.radians(roll) / 2), math.sin(math.radians(roll) / 2)
+        cp, sp = math.cos(math.radians(pitch) / 2), math.sin(math.radians(pitch) / 2)
+        cy, sy = math.cos(math.radians(yaw) / 2), math.sin(math.radians(yaw) / 2)
+        self.state = [position[0], position[1], position[2], 0.0, 0.0, 0.0,
+                      cr * cp * cy + sr * sp * sy, sr * cp * cy - cr * sp * sy, cr * sp * cy + sr * cp * sy, cr * cp * sy - sr * sp * cy,
+                      0.0, 0.0, 0.0]
+        c = self.config
+        level = 0.25 * c["mass"] * c["gravity"] / c["max_thrust"] if hover else 0.0
+        self.motor[:] = [level, level, level, level]
+        self.time = 0.0
+        self.steps = 0
+        self.grounded = position[2] <= 0.0
+        self.update_forces()
+        self.update_specific_force()
+    def apply_params(self, p):
+        if p.simulate_wind:
+            self.wind = (p.wind_strength * math.cos(p.wind_direction), p.wind_strength * math.sin(p.wind_direction))
+        else:
+            self.wind = (0.0, 0.0)
+        self.update_constants()
+    def update_forces(self):
+        c = self.config
+        max_thrust = c["max_thrust"]
+        m1, m2, m3, m4 = self.motor
+        self.thrust = max_thrust * (m1 + m2 + m3 + m4)
+        lever = self.lever * max_thrust
+        torque = self.torque
+        torque[0] = lever * (m1 - m2 - m3 + m4)
+        torque[1] = lever * (m1 + m2 - m3 - m4)
+        torque[2] = c["yaw_coefficient"] * max_thrust * (-m1 + m2 - m3 + m4)
+    def set_motors(self, motors, dt):
+        tau = self.config["motor_time_constant"]
+        motor = self.motor
+        if tau > 0:
+            alpha = 1.0 - math.exp(-dt / tau)
+            for i in range(4):
+                m = motors[i]
+                m = 0.0 if m < 0.0 else 1.0 if m > 1.0 else m
+                motor[i] += alpha * (m - motor[i])
+        else:
+            for i in range(4):
+                m = motors[i]
+                motor[i] = 0.0 if m < 0.0 else 1.0 if m > 1.0 else m
+        self.update_forces()
+    def step(self, motors, dt):
+        self.set_motors(motors, dt)
+        s = self.state
+        thrust = self.thrust
+        torque = self.torque
+        c = self.constants
+        h = 0.5 * dt
+        k1 = quad_derivative(s, thrust, torque, c)
+        k2 = quad_derivative([a + h * b for a, b in zip(s, k1)], thrust, torque, c)
+        k3 = quad_derivative([a + h * b for a, b in zip(s, k2)], thrust, torque, c)
+        k4 = quad_derivative([a + dt * b for a, b in zip(s, k3)], thrust, torque, c)
+        w = dt / 6.0
+        s[:] = [a + w * (b1 + 2.0 * (b2 + b3) + b4) for a, b1, b2, b3, b4 in zip(s, k1, k2, k3, k4)]
+        qw, qx, qy, qz = s[6], s[7], s[8], s[9]
+        n = 1.0 / math.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+        s[6] = qw * n
+        s[7] = qx * n
+        s[8] = qy * n
+        s[9] = qz * n
+        self.grounded = s[2] <= 0.0 and s[5] <= 0.0
+        if self.grounded:
+            s[2] = 0.0
+            s[3] = s[4] = s[5] = 0.0
+        self.update_specific_force()
+        self.steps += 1
+        self.time += dt
+        return s
+    def update_specific_force(self):
+        s = self.state
+        mass, drag, wind_x, wind_y, gravity = self.constants[:5]
+        qw, qx, qy, qz = s[6], s[7], s[8], s[9]
+        f = self.thrust / mass
+        k = drag / mass
+        fx = f * 2.0 * (qx * qz + qw * qy) - k * (s[3] - wind_x)
+        fy = f * 2.0 * (qy * qz - qw * qx) - k * (s[4] - wind_y)
+        fz = f * (1.0 - 2.0 * (qx * qx + qy * qy)) - k * s[5]
+        if self.grounded:
+            fx = fy = 0.0
+            if fz < gravity:
+                fz = gravity
+        force = self.specific_force
+        force[0] = (1.0 - 2.0 * (qy * qy + qz * qz)) * fx + 2.0 * (qx * qy + qw * qz) * fy + 2.0 * (qx * qz - qw * qy) * fz
+        force[1] = 2.0 * (qx * qy - qw * qz) * fx + (1.0 - 2.0 * (qx * qx + qz * qz)) * fy + 2.0 * (qy * qz + qw * qx) * fz
+        force[2] = 2.0 * (qx * qz + qw * qy) * fx + 2.0 * (qy * qz - qw * qx) * fy + (1.0 - 2.0 * (qx * qx + qy * qy)) * fz
+    def attitude(self):
+        s = self.state
+        w, x, y, z = s[6], s[7], s[8], s[9]
+        roll = math.atan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+        pitch = math.asin(max(-1.0, min(1.0, 2.0 * (w * y - z * x))))
+        yaw = math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+        return math.degrees(roll), math.degrees(pitch), math.degrees(yaw)
+    def pressure(self):
+        return SEA_LEVEL_PRESSURE * (1.0 - self.state[2] / 44330.0) ** (1.0 / 0.1903)
+def benchmark(steps=20000, dt=0.001):
+    plant = QuadPlant()
+    motors = [0.52, 0.51, 0.5, 0.49]
+    start = time.perf_counter()
+    for _ in range(steps):
+        plant.step(motors, dt)
+    return steps / (time.perf_counter() - start)
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="四旋翼刚体动力学模型步进速率基准")
+    parser.add_argument("--steps", type=int, default=20000, help="积分步数")
+    parser.add_argument("--dt", type=float, default=0.001, help="积分步长（秒）")
+    args = parser.parse_args()
+    rate = benchmark(args.steps, args.dt)
+    print(f"RK4 积分 {rate:.0f} 步/秒（{1e6 / rate:.1f}us/步）")
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,183 @@
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+from flight_net import shared_network
+PARAM_PORT = 5005
+def encode_param_batch(seq, updates, vehicle=None):
+    msg = {"type": "params", "seq": seq, "params": updates}
+    if vehicle is not None:
+        msg["vehicle"] = vehicle
+    return json.dumps(msg).encode()
+def encode_ack(seq, version, applied, rejected=(), vehicle=None):
+    msg = {"type": "ack", "seq": seq, "version": version, "applied": list(applied), "rejected": list(rejected)}
+    if vehicle is not None:
+        msg["vehicle"] = vehicle
+    return json.dumps(msg).encode()
+def is_ack(data):
+    return bytes(data).startswith(b'{"type": "ack"')
+def decode_param_message(data):
+    try:
+        msg = json.loads(data.decode())
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("参数消息格式错误")
+    if not isinstance(msg, dict):
+        raise ValueError("参数消息格式错误")
+    if msg.get("type") == "params":
+        updates = msg.get("params")
+        vehicle = msg.get("vehicle")
+        if not isinstance(updates, dict) or not (vehicle is None or isinstance(vehicle, int)):
+            raise ValueError("参数消息格式错误")
+        return msg.get("seq"), updates, vehicle
+    if msg.get("param"):
+        return None, {msg["param"]: msg.get("value")}, None
+    raise ValueError("参数消息格式错误")
+def decode_ack(data):
+    try:
+        msg = json.loads(data.decode())
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if isinstance(msg, dict) and msg.get("type") == "ack":
+        return msg
+    return None
+class ParamClient:
+    def __init__(self, address=("<broadcast>", PARAM_PORT), min_interval=0.05, ack_timeout=0.25, max_retries=3, network=None, vehicle=None):
+        self.address = address
+        self.vehicle = vehicle
+        self.min_interval = min_interval
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.network = network or shared_network()
+        self.endpoint = self.network.open("params", self.on_datagram, local_addr=("0.0.0.0", 0), broadcast=True)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.inflight = None
+        self.waiters = {}
+        self.seq = 0
+        self.version = None
+        self.last_send = 0.0
+        self.sent = 0
+        self.coalesced = 0
+        self.acked = 0
+        self.retransmits = 0
+        self.failed = 0
+        self.running = True
+        self.task = None
+        self.wakeup = None
+    def set(self, name, value):
+        self.update({name: value})
+    def update(self, updates):
+        with self.lock:
+            for name, value in updates.items():
+                if name in self.pending:
+                    self.coalesced += 1
+                self.pending[name] = value
+        self.network.call_soon(self.kick)
+    def kick(self):
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = self.network.loop.create_task(self.run())
+        self.wakeup.set()
+    def send(self, updates, timeout=0.3):
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+        waiter = concurrent.futures.Future()
+        self.waiters[seq] = waiter
+        try:
+            self.transmit(seq, updates)
+            return waiter.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return None
+        finally:
+            self.waiters.pop(seq, None)
+    def transmit(self, seq, updates):
+        if self.endpoint.send(encode_param_batch(seq, updates, self.vehicle), self.address):
+            self.sent += 1
+        else:
+            self.failed += 1
+        self.last_send = time.monotonic()
+    def on_datagram(self, endpoint, data, addr):
+        ack = decode_ack(data)
+        if ack is None:
+            raise ValueError("不是参数确认消息")
+        if self.vehicle is not None and ack.get("vehicle", self.vehicle) != self.vehicle:
+            return
+        self.acked += 1
+        if isinstance(ack.get("version"), int) and (self.version is None or ack["version"] > self.version):
+            self.version = ack["version"]
+        seq = ack.get("seq")
+        with self.lock:
+            if self.inflight is not None and seq == self.inflight[0]:
+                self.inflight = None
+        waiter = self.waiters.get(seq)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(ack)
+        if self.wakeup is not None:
+            self.wakeup.set()
+    async def run(self):
+        retries = 0
+        while self.running:
+            now = time.monotonic()
+            batch = None
+            with self.lock:
+                if self.inflight is not None and now - self.inflight[2] >= self.ack_timeout:
+                    seq, updates, _, retries = self.inflight
+                    self.inflight = None
+                    if retries < self.max_retries:
+                        self.retransmits += 1
+                        retries += 1
+                        for name, value in updates.items():
+                            self.pending.setdefault(name, value)
+                    else:
+                        self.failed += 1
+                        retries = 0
+                if self.pending and now - self.last_send >= self.min_interval:
+                    batch = self.pending
+                    self.pending = {}
+                    if self.inflight is not None:
+                        for name, value in self.inflight[1].items():
+                            batch.setdefault(name, value)
+                    self.seq += 1
+                    seq = self.seq
+                    self.inflight = (seq, batch, now, retries)
+                    retries = 0
+                if self.pending:
+                    wait = self.min_interval - (now - self.last_send)
+                elif self.inflight is not None:
+                    wait = self.ack_timeout - (now - self.inflight[2])
+                else:
+                    wait = None
+            if batch is not None:
+                self.transmit(seq, batch)
+                wait = self.min_interval if wait is None else min(wait, self.min_interval)
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), None if wait is None else max(wait, 0.001))
+            except asyncio.TimeoutError:
+                pass
+    def flush(self, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if not self.pending and self.inflight is None:
+                    return True
+            time.sleep(0.01)
+        return False
+    def stats(self):
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "acked": self.acked,
+            "retransmits": self.retransmits,
+            "failed": self.failed,
+            "version": self.version
+        }
+    def close(self):
+        self.running = False
+        if self.task is not None:
+            self.network.call_soon(self.task.cancel)
+        self.endpoint.close()
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,188 @@
+import math
+import time
+DIAL_COLOR = "#444466"
+class AttitudeRenderer:
+    def __init__(self, canvas, width=400, height=400, stats_interval=0.5):
+        self.canvas = canvas
+        self.stats_interval = stats_interval
+        self.center_x = width // 2
+        self.center_y = height // 2
+        self.body = []
+        self.wing = []
+        self.tail = []
+        self.roll = 0.0
+        self.pitch = 0.0
+        self.frames = 0
+        self.frame_time = 0.0
+        self.max_frame_time = 0.0
+        self.last_frame_time = 0.0
+        self.dial_builds = 0
+        self.last_stats = 0.0
+        self.plane = canvas.create_polygon(0, 0, 0, 0, 0, 0, fill="#FF4444", outline="#FF0000", tags="attitude")
+        self.wing_item = canvas.create_polygon(0, 0, 0, 0, 0, 0, 0, 0, fill="#4444FF", outline="#0000FF", tags="attitude")
+        self.tail_item = canvas.create_polygon(0, 0, 0, 0, 0, 0, 0, 0, fill="#44FF44", outline="#00FF00", tags="attitude")
+        self.stats_item = canvas.create_text(6, 6, anchor="nw", text="", fill=DIAL_COLOR, tags="attitude")
+        self.plane_coords = [0.0] * 6
+        self.wing_coords = [0.0] * 8
+        self.tail_coords = [0.0] * 8
+        canvas.bind("<Configure>", self.on_configure)
+        self.build(width, height)
+    def on_configure(self, event):
+        if event.width > 1 and event.height > 1:
+            self.build(event.width, event.height)
+            self.draw(self.roll, self.pitch)
+    def build(self, width, height):
+        canvas = self.canvas
+        canvas.delete("dial")
+        center_x = width // 2
+        center_y = height // 2
+        radius = min(width, height) // 2 - 20
+        self.center_x = center_x
+        self.center_y = center_y
+        canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius, outline=DIAL_COLOR, fill="#000022", tags="dial")
+        for i in range(-90, 91, 15):
+            angle_rad = math.radians(i)
+            c, s = math.cos(angle_rad), math.sin(angle_rad)
+            canvas.create_line(center_x + radius * c, center_y + radius * s, center_x + (radius - 10) * c, center_y + (radius - 10) * s, fill=DIAL_COLOR, tags="dial")
+            if i % 30 == 0:
+                canvas.create_text(center_x + (radius - 20) * c, center_y + (radius - 20) * s, text=str(i), fill=DIAL_COLOR, tags="dial")
+            c, s = math.cos(angle_rad + math.pi/2), math.sin(angle_rad + math.pi/2)
+            canvas.create_line(center_x + radius * c, center_y + radius * s, center_x + (radius - 10) * c, center_y + (radius - 10) * s, fill=DIAL_COLOR, tags="dial")
+        canvas.tag_raise("attitude", "dial")
+        plane_size = radius * 0.4
+        wing_length = plane_size * 0.8
+        tail_length = plane_size * 0.4
+        self.body = [(0, -plane_size/2), (plane_size/2, plane_size/2), (-plane_size/2, plane_size/2)]
+        self.wing = [(-wing_length/2, 0), (wing_length/2, 0), (wing_length/2, 5), (-wing_length/2, 5)]
+        self.tail = [(0, -plane_size/2), (0, -plane_size/2 - tail_length), (5, -plane_size/2 - tail_length), (5, -plane_size/2)]
+        self.dial_builds += 1
+    def draw(self, roll, pitch):
+        start = time.perf_counter()
+        self.roll = roll
+        self.pitch = pitch
+        roll_rad = math.radians(roll)
+        pitch_rad = math.radians(pitch)
+        cr, sr = math.cos(roll_rad), math.sin(roll_rad)
+        cp, sp = math.cos(pitch_rad), math.sin(pitch_rad)
+        cx = self.center_x
+        cy = self.center_y
+        coords = self.plane_coords
+        for i, (x, y) in enumerate(self.body):
+            coords[2 * i] = cx + x * cp + y * sp * sr
+            coords[2 * i + 1] = cy + y * cr
+        self.canvas.coords(self.plane, coords)
+        coords = self.wing_coords
+        for i, (x, y) in enumerate(self.wing):
+            coords[2 * i] = cx + x
+            coords[2 * i + 1] = cy + y * cr
+        self.canvas.coords(self.wing_item, coords)
+        coords = self.tail_coords
+        for i, (x, y) in enumerate(self.tail):
+            coords[2 * i] = cx + x * cp
+            coords[2 * i + 1] = cy + y
+        self.canvas.coords(self.tail_item, coords)
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.frame_time += elapsed
+        self.last_frame_time = elapsed
+        if elapsed > self.max_frame_time:
+            self.max_frame_time = elapsed
+        if start - self.last_stats >= self.stats_interval:
+            self.last_stats = start
+            self.canvas.itemconfig(self.stats_item, text=f"帧耗时 {1000 * elapsed:.2f}ms  平均 {1000 * self.frame_time / self.frames:.2f}ms  最大 {1000 * self.max_frame_time:.2f}ms")
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "last_ms": 1000 * self.last_frame_time,
+            "mean_ms": 1000 * self.frame_time / self.frames if self.frames else 0.0,
+            "max_ms": 1000 * self.max_frame_time,
+            "dial_builds": self.dial_builds
+        }
+class RenderScheduler:
+    def __init__(self, root, render, fps=30.0, clock=time.monotonic):
+        self.root = root
+        self.render = render
+        self.interval = 1.0 / fps
+        self.clock = clock
+        self.dirty = False
+        self.running = False
+        self.after_id = None
+        self.deadline = 0.0
+        self.marks = 0
+        self.frames = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.idle = 0
+        self.render_time = 0.0
+        self.max_render_time = 0.0
+    def mark_dirty(self):
+        self.marks += 1
+        if self.dirty:
+            self.coalesced += 1
+        self.dirty = True
+    def start(self):
+        self.running = True
+        self.deadline = self.clock() + self.interval
+        self.after_id = self.root.after(int(1000 * self.interval), self.tick)
+    def stop(self):
+        self.running = False
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+    def tick(self):
+        if not self.running:
+            return
+        now = self.clock()
+        late = now - self.deadline
+        if late >= self.interval:
+            missed = int(late / self.interval)
+            self.dropped += missed
+            self.deadline += missed * self.interval
+        self.deadline += self.interval
+        if self.dirty:
+            self.dirty = False
+            start = time.perf_counter()
+            self.render()
+            elapsed = time.perf_counter() - start
+            self.frames += 1
+            self.render_time += elapsed
+            if elapsed > self.max_render_time:
+                self.max_render_time = elapsed
+        else:
+            self.idle += 1
+        delay = max(0, int(1000 * (self.deadline - self.clock())))
+        self.after_id = self.root.after(delay, self.tick)
+    def stats(self):
+        return {
+            "fps_cap": 1.0 / self.interval,
+            "marks": self.marks,
+            "frames": self.frames,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "idle": self.idle,
+            "mean_ms": 1000 * self.render_time / self.frames if self.frames else 0.0,
+            "max_ms": 1000 * self.max_render_time
+        }
+class WidgetCache:
+    def __init__(self):
+        self.values = {}
+        self.updates = 0
+        self.skipped = 0
+    def text(self, widget, text):
+        if self.values.get(widget) == text:
+            self.skipped += 1
+            return False
+        self.values[widget] = text
+        widget.config(text=text)
+        self.updates += 1
+        return True
+    def value(self, widget, value):
+        if self.values.get(widget) == value:
+            self.skipped += 1
+            return False
+        self.values[widget] = value
+        widget['value'] = value
+        self.updates += 1
+        return True
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,120 @@
+import threading
+import time
+from array import array
+RING_POLICIES = ("drop_oldest", "drop_newest")
+class SampleRing:
+    def __init__(self, capacity, width, policy="drop_oldest"):
+        if capacity < 1 or width < 1:
+            raise ValueError(f"环形缓冲区容量和宽度必须 >= 1: {capacity}x{width}")
+        if policy not in RING_POLICIES:
+            raise ValueError(f"未知丢弃策略: {policy}")
+        self.capacity = capacity
+        self.width = width
+        self.policy = policy
+        self.data = array("d", bytes(8 * capacity * width))
+        self.seq = array("q", [-1]) * capacity
+        self.head = 0
+        self.tail = 0
+        self.pushed = 0
+        self.popped = 0
+        self.dropped_newest = 0
+        self.dropped_oldest = 0
+        self.high_watermark = 0
+    def __len__(self):
+        return min(self.head - self.tail, self.capacity)
+    def push(self, values):
+        head = self.head
+        used = head - self.tail
+        if used >= self.capacity and self.policy == "drop_newest":
+            self.dropped_newest += 1
+            return False
+        data = self.data
+        slot = head % self.capacity
+        base = slot * self.width
+        self.seq[slot] = -1
+        for i in range(self.width):
+            data[base + i] = values[i]
+        self.seq[slot] = head
+        self.head = head + 1
+        self.pushed += 1
+        if used + 1 > self.high_watermark:
+            self.high_watermark = min(used + 1, self.capacity)
+        return True
+    def pop(self, out):
+        data = self.data
+        seq = self.seq
+        width = self.width
+        capacity = self.capacity
+        while True:
+            tail = self.tail
+            head = self.head
+            if tail >= head:
+                return False
+            if head - tail > capacity:
+                self.dropped_oldest += head - tail - capacity
+                tail = head - capacity
+            slot = tail % capacity
+            base = slot * width
+            if seq[slot] == tail:
+                for i in range(width):
+                    out[i] = data[base + i]
+                if seq[slot] == tail:
+                    self.tail = tail + 1
+                    self.popped += 1
+                    return True
+            self.tail = tail + 1
+            self.dropped_oldest += 1
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "policy": self.policy,
+            "pending": len(self),
+            "pushed": self.pushed,
+            "popped": self.popped,
+            "dropped": self.dropped_newest + self.dropped_oldest,
+            "dropped_newest": self.dropped_newest,
+            "dropped_oldest": self.dropped_oldest,
+            "high_watermark": self.high_watermark
+        }
+class RingWorker:
+    def __init__(self, ring, sinks, poll_interval=0.002, name="ring-worker"):
+        self.ring = ring
+        self.sinks = list(sinks)
+        self.poll_interval = poll_interval
+        self.sample = [0.0] * ring.width
+        self.sink_errors = 0
+        self.running = False
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+    def start(self):
+        self.running = True
+        self.thread.start()
+    def run(self):
+        ring = self.ring
+        sample = self.sample
+        while self.running:
+            if not ring.pop(sample):
+                time.sleep(self.poll_interval)
+                continue
+            for sink in self.sinks:
+                try:
+                    sink(sample)
+                except Exception:
+                    self.sink_errors += 1
+        self.drain()
+    def drain(self):
+        while self.ring.pop(self.sample):
+            for sink in self.sinks:
+                try:
+                    sink(self.sample)
+                except Exception:
+                    self.sink_errors += 1
+    def stop(self, timeout=1.0):
+        self.running = False
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                return False
+        self.drain()
+        return True
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,112 @@
+import time
+class LoopScheduler:
+    def __init__(self, rate_hz=100.0, clock=time.monotonic, sleep=time.sleep, spin=0.0005, history=1000, histogram_bins=40):
+        if rate_hz <= 0:
+            raise ValueError(f"循环频率必须为正数: {rate_hz}")
+        self.rate_hz = float(rate_hz)
+        self.period = 1.0 / self.rate_hz
+        self.clock = clock
+        self.sleep = sleep
+        self.spin = spin
+        self.history = history
+        self.histogram_bins = histogram_bins
+        self.bin_width = 2.0 * self.period / histogram_bins
+        self.reset()
+    def reset(self):
+        self.cycles = 0
+        self.overruns = 0
+        self.skipped_deadlines = 0
+        self.periods = [0.0] * self.history
+        self.period_histogram = [0] * (self.histogram_bins + 1)
+        self.phase_totals = {}
+        self.phase_max = {}
+        self.last_phases = {}
+        self.start_time = None
+        self.next_deadline = None
+        self.last_wake = None
+        self.last_mark = None
+    def start(self):
+        now = self.clock()
+        self.start_time = now
+        self.next_deadline = now
+        self.last_wake = None
+        self.last_mark = now
+    def wait(self):
+        if self.next_deadline is None:
+            self.start()
+        deadline = self.next_deadline
+        now = self.clock()
+        remaining = deadline - now
+        if remaining < 0 and self.last_wake is not None:
+            self.overruns += 1
+        elif remaining > self.spin:
+            self.sleep(remaining - self.spin)
+            now = self.clock()
+        while now < deadline:
+            now = self.clock()
+        if self.last_wake is None:
+            dt = self.period
+        else:
+            dt = now - self.last_wake
+            self.record_period(dt)
+        self.last_wake = now
+        self.last_mark = now
+        self.next_deadline = deadline + self.period
+        if now >= self.next_deadline:
+            missed = int((now - deadline) / self.period)
+            self.skipped_deadlines += missed
+            self.next_deadline += missed * self.period
+        self.cycles += 1
+        return dt
+    def record_period(self, dt):
+        self.periods[(self.cycles - 1) % self.history] = dt
+        index = int(dt / self.bin_width)
+        if index > self.histogram_bins:
+            index = self.histogram_bins
+        self.period_histogram[index] += 1
+    def mark(self, phase):
+        now = self.clock()
+        elapsed = now - self.last_mark
+        self.last_mark = now
+        self.last_phases[phase] = elapsed
+        self.phase_totals[phase] = self.phase_totals.get(phase, 0.0) + elapsed
+        if elapsed > self.phase_max.get(phase, 0.0):
+            self.phase_max[phase] = elapsed
+        return elapsed
+    def jitter_percentiles(self, percentiles=(50, 90, 99, 100)):
+        count = min(self.cycles - 1, self.history)
+        if count <= 0:
+            return {p: 0.0 for p in percentiles}
+        jitter = sorted(abs(p - self.period) for p in self.periods[:count])
+        return {p: jitter[min(count - 1, int(round(p / 100.0 * (count - 1))))] for p in percentiles}
+    def stats(self):
+        count = min(self.cycles - 1, self.history)
+        recent = self.periods[:count] if count > 0 else []
+        measured = sum(recent) / len(recent) if recent else self.period
+        return {
+            "target_rate": self.rate_hz,
+            "measured_rate": 1.0 / measured if measured > 0 else 0.0,
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "skipped_deadlines": self.skipped_deadlines,
+            "jitter": self.jitter_percentiles(),
+            "histogram": {
+                "bin_width": self.bin_width,
+                "counts": list(self.period_histogram)
+            },
+            "phases": {
+                name: {
+                    "last": self.last_phases[name],
+                    "mean": total / self.cycles if self.cycles else 0.0,
+                    "max": self.phase_max[name]
+                } for name, total in self.phase_totals.items()
+            }
+        }
+    def summary(self):
+        s = self.stats()
+        jitter = s["jitter"]
+        phases = " ".join(f"{name}={p['mean'] * 1e6:.0f}us" for name, p in s["phases"].items())
+        return (f"频率 {s['measured_rate']:.1f}/{s['target_rate']:.0f}Hz 周期数 {s['cycles']} 超时 {s['overruns']} "
+                f"抖动 p50={jitter[50] * 1e6:.0f}us p99={jitter[99] * 1e6:.0f}us max={jitter[100] * 1e6:.0f}us {phases}")
+
+# x0r_fl0w
\ No newline at end of file
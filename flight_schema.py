@@ -0,0 +1,113 @@
+PARAM_TYPES = {
+    "roll_kp": float,
+    "roll_ki": float,
+    "roll_kd": float,
+    "pitch_kp": float,
+    "pitch_ki": float,
+    "pitch_kd": float,
+    "yaw_kp": float,
+    "yaw_ki": float,
+    "yaw_kd": float,
+    "throttle_kp": float,
+    "throttle_ki": float,
+    "throttle_kd": float,
+    "pid_integral_limit": float,
+    "pid_derivative_cutoff": float,
+    "pid_antiwindup_gain": float,
+    "target_roll": float,
+    "target_pitch": float,
+    "target_yaw": float,
+    "target_throttle": float,
+    "accel_noise": float,
+    "gyro_noise": float,
+    "simulate_wind": bool,
+    "wind_strength": float,
+    "wind_direction": float,
+    "enable_gps": bool,
+    "gps_accuracy": float,
+    "simulate_failure": bool,
+    "failure_type": str
+}
+def convert_param(name, value):
+    if name not in PARAM_TYPES:
+        raise KeyError(name)
+    param_type = PARAM_TYPES[name]
+    if param_type == bool:
+        if isinstance(value, str):
+            return value.lower() in ('true', 'yes', '1', 'y')
+        return bool(value)
+    if param_type == float and isinstance(value, bool):
+        raise ValueError(f"{name} 应为 float")
+    return param_type(value)
+def convert_params(values):
+    converted = {}
+    rejected = []
+    for name, value in values.items():
+        try:
+            converted[name] = convert_param(name, value)
+        except (KeyError, TypeError, ValueError):
+            rejected.append(name)
+    return converted, rejected
+DEFAULT_PARAMS = {
+    "roll_kp": 2.5,
+    "roll_ki": 0.1,
+    "roll_kd": 0.5,
+    "pitch_kp": 2.5,
+    "pitch_ki": 0.1,
+    "pitch_kd": 0.5,
+    "yaw_kp": 1.0,
+    "yaw_ki": 0.05,
+    "yaw_kd": 0.2,
+    "throttle_kp": 5.0,
+    "throttle_ki": 0.2,
+    "throttle_kd": 1.0,
+    "pid_integral_limit": 0.5,
+    "pid_derivative_cutoff": 30.0,
+    "pid_antiwindup_gain": 10.0,
+    "target_roll": 0.0,
+    "target_pitch": 0.0,
+    "target_yaw": 0.0,
+    "target_throttle": 0.5,
+    "accel_noise": 0.01,
+    "gyro_noise": 0.01,
+    "simulate_wind": False,
+    "wind_strength": 0.1,
+    "wind_direction": 0.0,
+    "enable_gps": True,
+    "gps_accuracy": 0.5,
+    "simulate_failure": False,
+    "failure_type": "none"
+}
+class ParamSnapshot:
+    __slots__ = tuple(DEFAULT_PARAMS) + ("version",)
+    def __init__(self, version=0, **values):
+        set_field = object.__setattr__
+        for name, default in DEFAULT_PARAMS.items():
+            set_field(self, name, values.pop(name, default))
+        if values:
+            raise TypeError(f"未知参数: {', '.join(sorted(values))}")
+        set_field(self, "version", version)
+    def __setattr__(self, name, value):
+        raise AttributeError(f"参数快照不可修改: {name}")
+    def __delattr__(self, name):
+        raise AttributeError(f"参数快照不可修改: {name}")
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+    def __repr__(self):
+        return f"ParamSnapshot(version={self.version}, {', '.join(f'{name}={getattr(self, name)!r}' for name in DEFAULT_PARAMS)})"
+    @classmethod
+    def from_dict(cls, values, version=0):
+        return cls(version=version, **convert_params(values)[0])
+    def with_updates(self, updates, version=None):
+        converted, rejected = convert_params(updates)
+        values = self.as_dict()
+        values.update(converted)
+        return self.__class__(self.version + 1 if version is None else version, **values), sorted(converted), rejected
+    def as_dict(self):
+        return {name: getattr(self, name) for name in DEFAULT_PARAMS}
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,214 @@
+import math
+import random
+import sys
+import time
+from array import array
+SENSOR_SOURCES = ("synthetic", "plant", "file")
+SENSOR_CHANNELS = ("accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z", "baro", "gps_x", "gps_y", "gps_z")
+WIDTH = len(SENSOR_CHANNELS)
+def sensor_frame():
+    return {"accelerometer": [0.0, 0.0, 9.8], "gyroscope": [0.0, 0.0, 0.0], "barometer": 1013.25, "gps": [0.0, 0.0, 0.0]}
+class NoiseBlock:
+    def __init__(self, block=1024, seed=None):
+        self.buffer = array("d", bytes(8 * block * WIDTH))
+        self.size = len(self.buffer)
+        self.index = self.size
+        self.refills = 0
+        try:
+            import numpy as np
+        except ImportError:
+            self.view = None
+            self.rng = random.Random(seed)
+        else:
+            self.view = np.frombuffer(self.buffer, dtype=np.float64)
+            self.rng = np.random.default_rng(seed)
+    def refill(self):
+        if self.view is not None:
+            self.rng.standard_normal(out=self.view)
+        else:
+            gauss = self.rng.gauss
+            buffer = self.buffer
+            for i in range(self.size):
+                buffer[i] = gauss(0.0, 1.0)
+        self.refills += 1
+    def take(self):
+        i = self.index
+        if i >= self.size:
+            self.refill()
+            i = 0
+        self.index = i + WIDTH
+        return i
+class SyntheticSource:
+    name = "synthetic"
+    def __init__(self, block=1024, seed=None):
+        self.noise = NoiseBlock(block, seed)
+        self.frame = sensor_frame()
+        self.wind_x = 0.0
+        self.wind_y = 0.0
+    def apply_params(self, p):
+        if p.simulate_wind:
+            self.wind_x = p.wind_strength * math.cos(p.wind_direction)
+            self.wind_y = p.wind_strength * math.sin(p.wind_direction)
+        else:
+            self.wind_x = self.wind_y = 0.0
+    def read(self, p):
+        i = self.noise.take()
+        n = self.noise.buffer
+        frame = self.frame
+        accel = frame["accelerometer"]
+        gyro = frame["gyroscope"]
+        gps = frame["gps"]
+        accel_noise = p.accel_noise
+        gyro_noise = p.gyro_noise
+        accel[0] = accel_noise * n[i] + self.wind_x
+        accel[1] = accel_noise * n[i + 1] + self.wind_y
+        accel[2] = 9.8 + accel_noise * n[i + 2]
+        gyro[0] = gyro_noise * n[i + 3]
+        gyro[1] = gyro_noise * n[i + 4]
+        gyro[2] = gyro_noise * n[i + 5]
+        frame["barometer"] = 1013.25 + 0.1 * n[i + 6]
+        if p.enable_gps:
+            accuracy = p.gps_accuracy
+            gps[0] = accuracy * n[i + 7]
+            gps[1] = accuracy * n[i + 8]
+            gps[2] = accuracy * n[i + 9]
+        else:
+            gps[0] = gps[1] = gps[2] = 0.0
+        return frame
+class PlantSource:
+    name = "plant"
+    def __init__(self, plant, block=1024, seed=None):
+        self.plant = plant
+        self.noise = NoiseBlock(block, seed)
+        self.frame = sensor_frame()
+    def apply_params(self, p):
+        pass
+    def read(self, p):
+        i = self.noise.take()
+        n = self.noise.buffer
+        s = self.plant.state
+        force = self.plant.specific_force
+        frame = self.frame
+        accel = frame["accelerometer"]
+        gyro = frame["gyroscope"]
+        gps = frame["gps"]
+        accel_noise = p.accel_noise
+        gyro_noise = p.gyro_noise
+        accel[0] = force[0] + accel_noise * n[i]
+        accel[1] = force[1] + accel_noise * n[i + 1]
+        accel[2] = force[2] + accel_noise * n[i + 2]
+        gyro[0] = s[10] + gyro_noise * n[i + 3]
+        gyro[1] = s[11] + gyro_noise * n[i + 4]
+        gyro[2] = s[12] + gyro_noise * n[i + 5]
+        frame["barometer"] = self.plant.pressure() + 0.1 * n[i + 6]
+        if p.enable_gps:
+            accuracy = p.gps_accuracy
+            gps[0] = s[0] + accuracy * n[i + 7]
+            gps[1] = s[1] + accuracy * n[i + 8]
+            gps[2] = s[2] + accuracy * n[i + 9]
+        else:
+            gps[0] = gps[1] = gps[2] = 0.0
+        return frame
+class FileSource:
+    name = "file"
+    def __init__(self, path, block=4096, loop=True):
+        self.path = path
+        self.block = block
+        self.loop = loop
+        self.buffer = array("d", bytes(8 * block * WIDTH))
+        self.size = 0
+        self.index = 0
+        self.chunks = None
+        self.blocks = 0
+        self.finished = False
+        self.frame = sensor_frame()
+        self.load()
+        if not self.size:
+            raise ValueError(f"传感器记录为空: {path}")
+    def load(self):
+        import numpy as np
+        from flight_analysis import iter_chunks
+        if self.chunks is None:
+            self.chunks = iter_chunks(self.path, self.block)
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.chunks = None
+            return False
+        n = len(chunk["timestamp"])
+        view = np.frombuffer(self.buffer, dtype=np.float64).reshape(self.block, WIDTH)
+        for j, name in enumerate(SENSOR_CHANNELS):
+            view[:n, j] = chunk[name] if name in chunk else 0.0
+        self.size = n * WIDTH
+        self.index = 0
+        self.blocks += 1
+        return True
+    def apply_params(self, p):
+        pass
+    def read(self, p):
+        i = self.index
+        if i >= self.size and not self.finished:
+            if self.load() or (self.loop and self.load()):
+                i = 0
+            else:
+                self.finished = True
+        if self.finished:
+            return self.frame
+        self.index = i + WIDTH
+        b = self.buffer
+        frame = self.frame
+        accel = frame["accelerometer"]
+        gyro = frame["gyroscope"]
+        gps = frame["gps"]
+        accel[0] = b[i]
+        accel[1] = b[i + 1]
+        accel[2] = b[i + 2]
+        gyro[0] = b[i + 3]
+        gyro[1] = b[i + 4]
+        gyro[2] = b[i + 5]
+        frame["barometer"] = b[i + 6]
+        gps[0] = b[i + 7]
+        gps[1] = b[i + 8]
+        gps[2] = b[i + 9]
+        return frame
+def create_sensor_source(kind="synthetic", seed=None, plant=None, path=None, block=1024):
+    if kind == "synthetic":
+        return SyntheticSource(block, seed)
+    if kind == "plant":
+        if plant is None:
+            from flight_plant import QuadPlant
+            plant = QuadPlant()
+        return PlantSource(plant, block, seed)
+    if kind == "file":
+        if not path:
+            raise ValueError("记录文件数据源需要指定文件路径")
+        return FileSource(path, block)
+    raise ValueError(f"未知传感器数据源: {kind}")
+def benchmark(source, iterations=100000):
+    from flight_schema import ParamSnapshot
+    p = ParamSnapshot(simulate_wind=True)
+    source.apply_params(p)
+    read = source.read
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        read(p)
+    elapsed = time.perf_counter() - start
+    return 1e6 * elapsed / iterations, sys.getallocatedblocks() - blocks
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="传感器数据源单次读取耗时和内存分配基准")
+    parser.add_argument("--iterations", type=int, default=100000, help="每个数据源的读取次数")
+    parser.add_argument("--block", type=int, default=1024, help="每块预生成的采样数")
+    parser.add_argument("--file", default=None, help="同时测试记录文件数据源（黑匣子目录或CSV）")
+    args = parser.parse_args()
+    sources = [create_sensor_source("synthetic", 0, block=args.block), create_sensor_source("plant", 0, block=args.block)]
+    if args.file:
+        sources.append(create_sensor_source("file", path=args.file, block=args.block))
+    for source in sources:
+        us, blocks = benchmark(source, args.iterations)
+        print(f"{source.name:<10} {us:.2f}us/次  新增内存块 {blocks}")
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,186 @@
+import contextlib
+import json
+import os
+import threading
+from flight_schema import PARAM_TYPES, DEFAULT_PARAMS, convert_param
+PARAMS_PATH = "flight_params.json"
+VERSION_KEY = "_version"
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+def validate_params(updates):
+    converted = {}
+    for name, value in updates.items():
+        if name not in PARAM_TYPES:
+            raise ValueError(f"未知参数: {name}")
+        try:
+            converted[name] = convert_param(name, value)
+        except (TypeError, ValueError):
+            raise ValueError(f"参数值类型错误: {name} 应为 {PARAM_TYPES[name].__name__}")
+    return converted
+class ParamStore:
+    def __init__(self, path=PARAMS_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        self.values = {}
+        self.extra = {}
+        self.version = 0
+        self.signature = None
+        self.loaded = False
+        self.pending = None
+        self.batch_depth = 0
+        self.listeners = []
+        self.stopped = threading.Event()
+        self.watcher = None
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+        self.reload()
+    def read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"参数文件格式错误: {self.path}")
+        version = int(data.pop(VERSION_KEY, 0))
+        values = {}
+        extra = {}
+        for name, value in data.items():
+            try:
+                values[name] = convert_param(name, value)
+            except (KeyError, TypeError, ValueError):
+                extra[name] = value
+        return values, extra, version
+    def load_changes(self):
+        signature = file_signature(self.path)
+        if self.loaded and signature == self.signature:
+            return {}
+        if signature is None:
+            if not self.loaded:
+                self.values = dict(DEFAULT_PARAMS)
+                self.loaded = True
+                try:
+                    self.write(self.values, self.version + 1)
+                except OSError:
+                    self.errors += 1
+            return {}
+        try:
+            values, extra, version = self.read()
+        except (OSError, ValueError):
+            self.errors += 1
+            return {}
+        changes = {name: value for name, value in values.items() if name not in self.values or self.values[name] != value}
+        self.values = values
+        self.extra = extra
+        self.version = version
+        self.signature = signature
+        self.loaded = True
+        self.reads += 1
+        return changes
+    def reload(self):
+        with self.lock:
+            changes = self.load_changes()
+            version = self.version
+        if changes:
+            self.notify(changes, version)
+        return changes
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+    def set(self, name, value):
+        return self.update({name: value})
+    def update(self, updates):
+        converted = validate_params(updates)
+        with self.lock:
+            if self.pending is None:
+                self.pending = {}
+            self.pending.update(converted)
+            if self.batch_depth:
+                return self.version
+        return self.flush()
+    @contextlib.contextmanager
+    def batch(self):
+        with self.lock:
+            self.batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self.lock:
+                self.batch_depth -= 1
+                if not self.batch_depth:
+                    self.pending = None
+            raise
+        with self.lock:
+            self.batch_depth -= 1
+            if self.batch_depth:
+                return
+        self.flush()
+    def flush(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = None
+            if not pending:
+                return self.version
+            changes = self.load_changes()
+            written = {name: value for name, value in pending.items() if name not in self.values or self.values[name] != value}
+            if written:
+                values = dict(self.values)
+                values.update(written)
+                self.write(values, self.version + 1)
+                changes.update(written)
+            version = self.version
+        if changes:
+            self.notify(changes, version)
+        return version
+    def write(self, values, version):
+        data = dict(self.extra)
+        data.update(values)
+        data[VERSION_KEY] = version
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.values = values
+        self.version = version
+        self.signature = file_signature(self.path)
+        self.loaded = True
+        self.writes += 1
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+    def notify(self, changes, version):
+        for callback in list(self.listeners):
+            try:
+                callback(changes, version)
+            except Exception:
+                self.errors += 1
+    def watch(self, callback=None, interval=0.5):
+        if callback is not None:
+            self.subscribe(callback)
+        if self.watcher is None:
+            self.stopped.clear()
+            self.watcher = threading.Thread(target=self.run_watch, args=(interval,), name="param-watch", daemon=True)
+            self.watcher.start()
+        return self
+    def run_watch(self, interval):
+        while not self.stopped.wait(interval):
+            self.reload()
+    def stop(self):
+        self.stopped.set()
+        if self.watcher is not None:
+            self.watcher.join(1.0)
+            self.watcher = None
+    def stats(self):
+        return {"version": self.version, "reads": self.reads, "writes": self.writes, "errors": self.errors}
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,161 @@
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from flight_headless import SCENARIO_KEYS, load_scenario, run_headless
+FAILED_MOTOR = {"motor1": 0, "motor2": 1, "motor3": 2, "motor4": 3}
+class RunMetrics:
+    def __init__(self, params, events=()):
+        self.target = (params.get("target_roll", 0.0), params.get("target_pitch", 0.0), params.get("target_yaw", 0.0))
+        self.failure = {"simulate_failure": params.get("simulate_failure", False), "failure_type": params.get("failure_type", "none")}
+        self.events = [e for e in events if "simulate_failure" in e["params"] or "failure_type" in e["params"]]
+        self.failed_motor = None
+        self.update_failure()
+        self.count = 0
+        self.abs_error = [0.0, 0.0, 0.0]
+        self.max_error = [0.0, 0.0, 0.0]
+        self.motor_sum = [0.0, 0.0, 0.0, 0.0]
+        self.saturated = 0
+    def update_failure(self):
+        failure = self.failure
+        self.failed_motor = FAILED_MOTOR.get(failure["failure_type"]) if failure["simulate_failure"] else None
+    def __call__(self, sample):
+        events = self.events
+        if events and events[0]["time"] <= sample[0]:
+            while events and events[0]["time"] <= sample[0]:
+                params = events.pop(0)["params"]
+                self.failure.update((k, params[k]) for k in self.failure if k in params)
+            self.update_failure()
+        self.count += 1
+        for i in range(3):
+            error = abs(self.target[i] - sample[1 + i])
+            self.abs_error[i] += error
+            if error > self.max_error[i]:
+                self.max_error[i] = error
+        saturated = False
+        for i in range(4):
+            m = sample[4 + i]
+            self.motor_sum[i] += m
+            if i != self.failed_motor and (m <= 0.0 or m >= 1.0):
+                saturated = True
+        if saturated:
+            self.saturated += 1
+    def result(self):
+        n = max(self.count, 1)
+        return {
+            "steps": self.count,
+            "mean_abs_error": {axis: self.abs_error[i] / n for i, axis in enumerate(("roll", "pitch", "yaw"))},
+            "max_abs_error": {axis: self.max_error[i] for i, axis in enumerate(("roll", "pitch", "yaw"))},
+            "mean_motors": [m / n for m in self.motor_sum],
+            "saturation": self.saturated / n
+        }
+def expand_grid(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+def case_seed(sweep_seed, index):
+    digest = hashlib.sha256(f"{sweep_seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:4], "little")
+def sweep_id(spec, scenario):
+    return hashlib.sha1(json.dumps({"spec": spec, "base": scenario}, sort_keys=True).encode()).hexdigest()[:12]
+def apply_keys(scenario, values):
+    params = dict(scenario["params"])
+    case = dict(scenario, params=params)
+    for key, value in values.items():
+        if key in SCENARIO_KEYS:
+            case[key] = value
+        else:
+            params[key] = value
+    return case
+def base_scenario(spec, base_path="flight_params.json"):
+    scenario = apply_keys(load_scenario(None, base_path), spec.get("base", {}))
+    scenario["duration"] = spec.get("duration", scenario["duration"])
+    scenario["rate"] = spec.get("rate", scenario["rate"])
+    scenario["events"] = sorted(scenario["events"], key=lambda e: e["time"])
+    return scenario
+def build_cases(spec, scenario):
+    sweep_seed = spec.get("seed", 0)
+    cases = []
+    for index, combo in enumerate(expand_grid(spec["grid"])):
+        case = apply_keys(scenario, combo)
+        case["seed"] = case_seed(sweep_seed, index)
+        cases.append((index, combo, case))
+    return cases
+def run_case(item):
+    index, combo, case = item
+    metrics = RunMetrics(case["params"], case["events"])
+    start = time.perf_counter()
+    run_headless(case, metrics)
+    return {
+        "index": index,
+        "params": combo,
+        "seed": case["seed"],
+        "elapsed": time.perf_counter() - start,
+        "metrics": metrics.result()
+    }
+def completed_indices(path, expected_id):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("sweep") != expected_id:
+                raise ValueError(f"结果文件 {path} 属于另一个扫描配置，无法续跑")
+            done.add(record["index"])
+    return done
+def truncate_partial_line(path):
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+def run_sweep(spec, output, workers=None, resume=True, progress=None):
+    scenario = base_scenario(spec)
+    sid = sweep_id(spec, scenario)
+    cases = build_cases(spec, scenario)
+    if resume:
+        truncate_partial_line(output)
+        done = completed_indices(output, sid)
+    else:
+        done = set()
+    pending = [case for case in cases if case[0] not in done]
+    workers = workers or os.cpu_count() or 1
+    with open(output, "a" if resume else "w", encoding="utf-8") as out:
+        if not pending:
+            return len(cases), 0
+        with multiprocessing.Pool(workers) as pool:
+            chunksize = max(1, len(pending) // (workers * 8))
+            for count, result in enumerate(pool.imap_unordered(run_case, pending, chunksize), 1):
+                result["sweep"] = sid
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                if progress:
+                    progress(count, len(pending), result)
+    return len(cases), len(pending)
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="多进程故障注入场景扫描")
+    parser.add_argument("spec", help="扫描配置JSON：{\"grid\": {参数: [取值...]}, \"base\": {...}, \"duration\": 秒, \"rate\": Hz, \"seed\": 种子}")
+    parser.add_argument("-o", "--output", default="sweep_results.jsonl", help="结果输出文件（JSON Lines，可续跑）")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="工作进程数，默认使用全部CPU核心")
+    parser.add_argument("--restart", action="store_true", help="忽略已有结果，从头开始")
+    args = parser.parse_args()
+    with open(args.spec, "r") as f:
+        spec = json.load(f)
+    def progress(count, total, result):
+        print(f"[{count}/{total}] #{result['index']} {result['params']} 饱和={100 * result['metrics']['saturation']:.1f}%")
+    start = time.perf_counter()
+    total, ran = run_sweep(spec, args.output, args.workers, not args.restart, progress)
+    print(f"共 {total} 个场景，本次运行 {ran} 个，跳过已完成 {total - ran} 个，耗时 {time.perf_counter() - start:.1f}s，结果在 {args.output}")
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import socket
+import struct
+import time
+FRAME_MAGIC = b"FT"
+FRAME_VERSION = 2
+HEADER_V1 = struct.Struct("<2sBB")
+HEADER = struct.Struct("<2sBBH")
+SAMPLE = struct.Struct("<Id14f")
+SAMPLE_FIELDS = ("timestamp", "roll", "pitch", "yaw", "motor1", "motor2", "motor3", "motor4",
+                 "accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z", "baro")
+MAX_BATCH = (65507 - HEADER.size) // SAMPLE.size
+TELEMETRY_MODES = ("binary", "json")
+class TelemetryPublisher:
+    def __init__(self, address=("localhost", 5006), mode="binary", decimation=1, batch=1, clock=time.monotonic, endpoint=None, vehicle=0):
+        if mode not in TELEMETRY_MODES:
+            raise ValueError(f"未知遥测格式: {mode}")
+        if decimation < 1:
+            raise ValueError(f"抽取倍数必须 >= 1: {decimation}")
+        if not 1 <= batch <= MAX_BATCH:
+            raise ValueError(f"每包样本数必须在 1-{MAX_BATCH} 之间: {batch}")
+        self.address = address
+        self.vehicle = vehicle
+        self.mode = mode
+        self.decimation = decimation
+        self.batch = batch
+        self.clock = clock
+        self.endpoint = endpoint
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if endpoint is None else None
+        self.buffer = bytearray(HEADER.size + SAMPLE.size * batch)
+        self.json_samples = []
+        self.pending = 0
+        self.ticks = 0
+        self.seq = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.send_errors = 0
+    def publish(self, roll, pitch, yaw, motors, sensors, timestamp=None):
+        if timestamp is None:
+            timestamp = self.clock()
+        accel = sensors["accelerometer"]
+        gyro = sensors["gyroscope"]
+        return self.publish_sample((timestamp, roll, pitch, yaw, motors[0], motors[1], motors[2], motors[3],
+                                    accel[0], accel[1], accel[2], gyro[0], gyro[1], gyro[2], sensors["barometer"]))
+    def publish_sample(self, v):
+        self.ticks += 1
+        if self.ticks % self.decimation:
+            return False
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        if self.mode == "binary":
+            SAMPLE.pack_into(self.buffer, HEADER.size + SAMPLE.size * self.pending, self.seq,
+                             v[0], v[1], v[2], v[3], v[4], v[5], v[6], v[7],
+                             v[8], v[9], v[10], v[11], v[12], v[13], v[14])
+        else:
+            self.json_samples.append(sample_to_message(self.seq, v, self.vehicle))
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.flush()
+        return True
+    def flush(self):
+        if not self.pending:
+            return
+        if self.mode == "binary":
+            HEADER.pack_into(self.buffer, 0, FRAME_MAGIC, FRAME_VERSION, self.pending, self.vehicle)
+            payload = memoryview(self.buffer)[:HEADER.size + SAMPLE.size * self.pending]
+        elif self.pending == 1:
+            payload = json.dumps(self.json_samples[0]).encode()
+        else:
+            payload = json.dumps({"vehicle": self.vehicle, "samples": self.json_samples}).encode()
+        self.pending = 0
+        self.json_samples = []
+        if self.endpoint is not None:
+            if self.endpoint.send(payload, self.address):
+                self.bytes_sent += len(payload)
+                self.frames_sent += 1
+            else:
+                self.send_errors += 1
+            return
+        try:
+            self.bytes_sent += self.sock.sendto(payload, self.address)
+            self.frames_sent += 1
+        except OSError:
+            self.send_errors += 1
+    def close(self):
+        self.flush()
+        if self.sock is not None:
+            self.sock.close()
+class CsvSampleLog:
+    def __init__(self, path, flush_every=100, fields=SAMPLE_FIELDS):
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(",".join(fields) + "\n")
+        self.width = len(fields)
+        self.flush_every = flush_every
+        self.count = 0
+    def __call__(self, sample):
+        self.file.write(",".join(repr(float(sample[i])) for i in range(self.width)) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.file.flush()
+    def close(self):
+        self.file.close()
+def sample_to_message(seq, v, vehicle=0):
+    return {
+        "vehicle": vehicle,
+        "seq": seq,
+        "timestamp": v[0],
+        "roll": v[1],
+        "pitch": v[2],
+        "yaw": v[3],
+        "motors": [v[4], v[5], v[6], v[7]],
+        "sensors": {
+            "accel": [v[8], v[9], v[10]],
+            "gyro": [v[11], v[12], v[13]],
+            "baro": v[14]
+        }
+    }
+def frame_header(data):
+    if len(data) < HEADER_V1.size:
+        raise ValueError("遥测帧格式错误")
+    magic, version, count = HEADER_V1.unpack_from(data, 0)
+    if magic != FRAME_MAGIC:
+        raise ValueError("遥测帧格式错误")
+    if version == 1:
+        vehicle, offset = 0, HEADER_V1.size
+    elif version == FRAME_VERSION and len(data) >= HEADER.size:
+        vehicle, offset = HEADER.unpack_from(data, 0)[3], HEADER.size
+    else:
+        raise ValueError("遥测帧格式错误")
+    if len(data) != offset + SAMPLE.size * count:
+        raise ValueError(f"遥测帧长度 {len(data)} 与样本数 {count} 不符")
+    return vehicle, count, offset
+def decode_frames(data):
+    if data[:2] == FRAME_MAGIC:
+        vehicle, count, offset = frame_header(data)
+        samples = []
+        for i in range(count):
+            v = SAMPLE.unpack_from(data, offset + SAMPLE.size * i)
+            samples.append(sample_to_message(v[0], v[1:], vehicle))
+        return samples
+    try:
+        message = json.loads(data.decode())
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("遥测帧格式错误")
+    if isinstance(message, dict) and isinstance(message.get("samples"), list):
+        samples = message["samples"]
+        vehicle = message.get("vehicle", 0)
+    elif isinstance(message, dict):
+        return [message]
+    elif isinstance(message, list):
+        samples = message
+        vehicle = 0
+    else:
+        raise ValueError("遥测帧格式错误")
+    for sample in samples:
+        if not isinstance(sample, dict):
+            raise ValueError("遥测帧格式错误")
+        sample.setdefault("vehicle", vehicle)
+    return samples
+
+# x0r_fl0w
\ No newline at end of file
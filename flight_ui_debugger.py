@@ -1,16 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, LabelFrame, Scale
-import math
-import json
-import socket
-import threading
+import bisect
 import time
-import random
+from flight_protocol import ParamClient
+from flight_render import AttitudeRenderer, RenderScheduler, WidgetCache
+from flight_charts import StripChart
+from flight_ui_sources import VehicleRegistry, create_source, SOURCE_MODES
+from flight_net import shared_network
+from flight_capture import CaptureWriter
 class FlightUISimulator:
-    def __init__(self, root):
+    def __init__(self, root, fps=30.0, history=10000, source="live", port=5006, replay_path=None, replay_speed=1.0, stale_ms=500, param_port=5005, capture=None):
         self.root = root
         self.root.title("飞控可视化调试器")
-        self.root.geometry("1000x700")
+        self.root.geometry("1100x900")
         self.root.configure(bg="#f0f0f0")
         self.current_roll = 0.0
         self.current_pitch = 0.0
@@ -22,13 +24,40 @@ class FlightUISimulator:
         self.motor_values = [0.5, 0.5, 0.5, 0.5]
         self.sensor_values = {"accel": [0,0,9.8], "gyro": [0,0,0], "baro": 1013.25}
         self.params = {}
-        self.param_lock = threading.Lock()
         self.running = True
-        self.setup_ui()
-        self.start_udp_server()
-        self.start_simulation_thread()
+        self.network = shared_network()
+        self.capture = None
+        if capture:
+            self.capture = CaptureWriter(capture, (param_port, port))
+            self.network.capture = self.capture
+        self.param_client = None
+        self.param_port = param_port
+        self.widget_cache = WidgetCache()
+        self.drawn_attitude = None
+        self.last_render_stats = 0.0
+        self.vehicles = VehicleRegistry(history)
+        self.selected_vehicle = 0
+        self.pipeline = self.vehicles.get(0)
+        self.history = self.pipeline.history
+        self.overview_rows = {}
+        self.overview_ticks = 0
+        self.port = port
+        self.replay_speed = replay_speed
+        self.stale_timeout = stale_ms / 1000.0
+        self.source = None
+        self.source_error = None
+        self.link_color = None
+        self.chart_paused = False
+        self.chart_end = None
+        self.drawn_chart_view = None
+        self.setup_ui(source, replay_path)
+        self.render_scheduler = RenderScheduler(root, self.update_ui, fps)
+        self.vehicles.on_update = self.render_scheduler.mark_dirty
+        self.render_scheduler.start()
+        self.switch_source(source)
+        self.check_link()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-    def setup_ui(self):
+    def setup_ui(self, source, replay_path):
         main_frame = ttk.Frame(self.root, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
         left_frame = ttk.Frame(main_frame, padding="5")
@@ -37,10 +66,35 @@ class FlightUISimulator:
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH)
         self.attitude_frame = LabelFrame(left_frame, text="飞机姿态", padx=10, pady=10)
         self.attitude_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
-        self.canvas_width = 400
-        self.canvas_height = 400
+        self.canvas_width = 300
+        self.canvas_height = 300
         self.attitude_canvas = tk.Canvas(self.attitude_frame, width=self.canvas_width, height=self.canvas_height, bg="#000022")
         self.attitude_canvas.pack(fill=tk.BOTH, expand=True)
+        self.attitude_renderer = AttitudeRenderer(self.attitude_canvas, self.canvas_width, self.canvas_height)
+        self.chart_frame = LabelFrame(left_frame, text="历史曲线", padx=10, pady=5)
+        self.chart_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        chart_controls = ttk.Frame(self.chart_frame)
+        chart_controls.pack(fill=tk.X)
+        self.pause_button = ttk.Button(chart_controls, text="暂停", command=self.toggle_chart_pause)
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(chart_controls, text="显示时长(s)").pack(side=tk.LEFT)
+        self.span_var = tk.DoubleVar(value=10.0)
+        Scale(chart_controls, from_=1, to=60, orient=tk.HORIZONTAL, variable=self.span_var, resolution=1, length=150,
+              command=self.update_chart_view).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(chart_controls, text="回看(s)").pack(side=tk.LEFT)
+        self.scrub_var = tk.DoubleVar(value=0.0)
+        Scale(chart_controls, from_=0, to=60, orient=tk.HORIZONTAL, variable=self.scrub_var, resolution=0.1, length=150,
+              command=self.update_chart_view).pack(side=tk.LEFT)
+        chart_specs = [
+            ("滚转/俯仰 vs 目标", [("roll", "#FF4444"), ("target_roll", "#884444"), ("pitch", "#44FF44"), ("target_pitch", "#448844")], 2.0),
+            ("电机输出", [("motor1", "#FF4444"), ("motor2", "#44FF44"), ("motor3", "#4444FF"), ("motor4", "#FFFF44")], 0.1),
+            ("陀螺仪", [("gyro_x", "#FF4444"), ("gyro_y", "#44FF44"), ("gyro_z", "#4444FF")], 0.05)
+        ]
+        self.charts = []
+        for title, channels, min_range in chart_specs:
+            canvas = tk.Canvas(self.chart_frame, width=560, height=90, bg="#000022", highlightthickness=0)
+            canvas.pack(fill=tk.BOTH, expand=True, pady=2)
+            self.charts.append(StripChart(canvas, self.history, channels, title, min_range))
         self.info_frame = LabelFrame(left_frame, text="飞行数据", padx=10, pady=10)
         self.info_frame.pack(fill=tk.BOTH, expand=True)
         info_grid_frame = ttk.Frame(self.info_frame)
@@ -72,6 +126,36 @@ class FlightUISimulator:
             ttk.Label(info_grid_frame, text=text).grid(row=i, column=2, sticky=tk.W, padx=5, pady=2)
             self.info_labels[key] = ttk.Label(info_grid_frame, text="0.0")
             self.info_labels[key].grid(row=i, column=3, sticky=tk.W, padx=5, pady=2)
+        self.render_stats_label = ttk.Label(info_grid_frame, text="")
+        self.render_stats_label.grid(row=len(labels), column=0, columnspan=4, sticky=tk.W, padx=5, pady=2)
+        self.source_frame = LabelFrame(right_frame, text="数据源", padx=10, pady=5)
+        self.source_frame.pack(fill=tk.X, pady=(0, 10))
+        self.source_var = tk.StringVar(value=source)
+        source_buttons = ttk.Frame(self.source_frame)
+        source_buttons.pack(fill=tk.X)
+        for mode, text in zip(SOURCE_MODES, ("实时UDP", "本地仿真", "日志回放")):
+            ttk.Radiobutton(source_buttons, text=text, value=mode, variable=self.source_var, command=self.on_source_change).pack(side=tk.LEFT, padx=(0, 5))
+        replay_frame = ttk.Frame(self.source_frame)
+        replay_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(replay_frame, text="回放日志:").pack(side=tk.LEFT)
+        self.replay_var = tk.StringVar(value=replay_path or "")
+        ttk.Entry(replay_frame, textvariable=self.replay_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.link_label = tk.Label(self.source_frame, text="等待数据", fg="#888888", anchor=tk.W)
+        self.link_label.pack(fill=tk.X)
+        self.overview_frame = LabelFrame(right_frame, text="飞行器总览", padx=10, pady=5)
+        self.overview_frame.pack(fill=tk.X, pady=(0, 10))
+        columns = ("roll", "pitch", "yaw", "motors", "link")
+        self.overview = ttk.Treeview(self.overview_frame, columns=columns, height=5, selectmode="browse")
+        self.overview.heading("#0", text="编号")
+        self.overview.column("#0", width=50, stretch=False)
+        for column, text, width in zip(columns, ("滚转", "俯仰", "偏航", "电机(%)", "链路"), (50, 50, 50, 100, 50)):
+            self.overview.heading(column, text=text)
+            self.overview.column(column, width=width, anchor=tk.CENTER)
+        overview_scroll = ttk.Scrollbar(self.overview_frame, orient=tk.VERTICAL, command=self.overview.yview)
+        self.overview.configure(yscrollcommand=overview_scroll.set)
+        self.overview.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        overview_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.overview.bind("<<TreeviewSelect>>", self.on_vehicle_select)
         self.motor_frame = LabelFrame(right_frame, text="电机输出", padx=10, pady=10)
         self.motor_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         self.motor_bars = []
@@ -109,19 +193,27 @@ class FlightUISimulator:
     def update_target_roll(self, value):
         self.target_roll = float(value)
         self.controls["target_roll"][2].config(text=f"{self.target_roll:.1f}")
+        self.pipeline.targets["target_roll"] = self.target_roll
         self.send_parameter("target_roll", self.target_roll)
+        self.render_scheduler.mark_dirty()
     def update_target_pitch(self, value):
         self.target_pitch = float(value)
         self.controls["target_pitch"][2].config(text=f"{self.target_pitch:.1f}")
+        self.pipeline.targets["target_pitch"] = self.target_pitch
         self.send_parameter("target_pitch", self.target_pitch)
+        self.render_scheduler.mark_dirty()
     def update_target_yaw(self, value):
         self.target_yaw = float(value)
         self.controls["target_yaw"][2].config(text=f"{self.target_yaw:.1f}")
+        self.pipeline.targets["target_yaw"] = self.target_yaw
         self.send_parameter("target_yaw", self.target_yaw)
+        self.render_scheduler.mark_dirty()
     def update_target_throttle(self, value):
         self.target_throttle = float(value) / 100.0
         self.controls["target_throttle"][2].config(text=f"{self.target_throttle:.2f}")
+        self.pipeline.targets["target_throttle"] = self.target_throttle
         self.send_parameter("target_throttle", self.target_throttle)
+        self.render_scheduler.mark_dirty()
     def update_param(self, value):
         widget = self.root.focus_get()
         if widget:
@@ -131,193 +223,181 @@ class FlightUISimulator:
                     label.config(text=f"{val:.2f}")
                     self.send_parameter(key, val)
                     break
+    def toggle_chart_pause(self):
+        self.chart_paused = not self.chart_paused
+        self.pause_button.config(text="继续" if self.chart_paused else "暂停")
+        self.render_scheduler.mark_dirty()
+    def update_chart_view(self, value):
+        self.render_scheduler.mark_dirty()
     def send_parameter(self, param_name, value):
+        self.param_client.set(param_name, value)
+    def switch_source(self, mode):
+        if self.source is not None:
+            self.source.stop()
+            self.source = None
+        self.vehicles.reset()
+        self.select_vehicle(self.selected_vehicle if mode == "live" else 0)
+        self.source_error = None
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-                message = json.dumps({"param": param_name, "value": value}).encode()
-                s.sendto(message, ('<broadcast>', 5005))
-        except Exception:
-            pass
-    def start_udp_server(self):
-        def udp_listener():
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                    s.bind(('0.0.0.0', 5006))
-                    s.settimeout(1.0)
-                    while self.running:
-                        try:
-                            data, _ = s.recvfrom(4096)
-                            try:
-                                message = json.loads(data.decode())
-                                with self.param_lock:
-                                    if 'roll' in message:
-                                        self.current_roll = message['roll']
-                                    if 'pitch' in message:
-                                        self.current_pitch = message['pitch']
-                                    if 'yaw' in message:
-                                        self.current_yaw = message['yaw']
-                                    if 'motors' in message:
-                                        self.motor_values = message['motors']
-                                    if 'sensors' in message:
-                                        self.sensor_values = message['sensors']
-                            except json.JSONDecodeError:
-                                pass
-                        except socket.timeout:
-                            continue
-            except Exception:
-                pass
-        self.udp_thread = threading.Thread(target=udp_listener, daemon=True)
-        self.udp_thread.start()
-    def start_simulation_thread(self):
-        def simulation_loop():
-            while self.running:
-                self.simulate_data()
-                self.root.after(0, self.update_ui)
-                time.sleep(0.05)
-        self.simulation_thread = threading.Thread(target=simulation_loop, daemon=True)
-        self.simulation_thread.start()
-    def simulate_data(self):
-        dt = 0.05
-        kp = 2.5
-        ki = 0.1
-        kd = 0.5
-        roll_error = self.target_roll - self.current_roll
-        pitch_error = self.target_pitch - self.current_pitch
-        yaw_error = self.target_yaw - self.current_yaw
-        self.current_roll += roll_error * kp * dt + random.gauss(0, 0.1)
-        self.current_pitch += pitch_error * kp * dt + random.gauss(0, 0.1)
-        self.current_yaw += yaw_error * 0.5 * dt + random.gauss(0, 0.2)
-        self.current_roll = max(-90, min(90, self.current_roll))
-        self.current_pitch = max(-90, min(90, self.current_pitch))
-        if self.current_yaw > 180: self.current_yaw -= 360
-        if self.current_yaw < -180: self.current_yaw += 360
-        self.sensor_values["accel"][0] = -math.sin(math.radians(self.current_pitch)) * 9.8 + random.gauss(0, 0.1)
-        self.sensor_values["accel"][1] = math.sin(math.radians(self.current_roll)) * math.cos(math.radians(self.current_pitch)) * 9.8 + random.gauss(0, 0.1)
-        self.sensor_values["accel"][2] = math.cos(math.radians(self.current_roll)) * math.cos(math.radians(self.current_pitch)) * 9.8 + random.gauss(0, 0.1)
-        self.sensor_values["gyro"][0] = (self.current_roll - getattr(self, 'prev_roll', 0)) / dt + random.gauss(0, 0.2)
-        self.sensor_values["gyro"][1] = (self.current_pitch - getattr(self, 'prev_pitch', 0)) / dt + random.gauss(0, 0.2)
-        self.sensor_values["gyro"][2] = (self.current_yaw - getattr(self, 'prev_yaw', 0)) / dt + random.gauss(0, 0.5)
-        self.prev_roll = self.current_roll
-        self.prev_pitch = self.current_pitch
-        self.prev_yaw = self.current_yaw
-        self.motor_values[0] = self.target_throttle + (self.current_roll * 0.02) + (self.current_pitch * 0.02)
-        self.motor_values[1] = self.target_throttle - (self.current_roll * 0.02) + (self.current_pitch * 0.02)
-        self.motor_values[2] = self.target_throttle - (self.current_roll * 0.02) - (self.current_pitch * 0.02)
-        self.motor_values[3] = self.target_throttle + (self.current_roll * 0.02) - (self.current_pitch * 0.02)
-        self.motor_values = [max(0, min(1, m)) for m in self.motor_values]
+            self.source = create_source(mode, self.vehicles, self.port, self.replay_var.get().strip(), self.replay_speed, self.network)
+        except ValueError as e:
+            self.source_error = str(e)
+            return False
+        self.source.start()
+        return True
+    def select_vehicle(self, vehicle):
+        self.selected_vehicle = vehicle
+        self.pipeline = self.vehicles.get(vehicle)
+        self.pipeline.targets.update(target_roll=self.target_roll, target_pitch=self.target_pitch,
+                                     target_yaw=self.target_yaw, target_throttle=self.target_throttle)
+        self.history = self.pipeline.history
+        for chart in self.charts:
+            chart.history = self.history
+        self.chart_end = None
+        self.drawn_chart_view = None
+        self.attitude_frame.config(text=f"飞机姿态 - 飞行器 {vehicle}")
+        self.connect_param_client()
+        self.render_scheduler.mark_dirty()
+    def connect_param_client(self):
+        address = self.vehicles.addresses.get(self.selected_vehicle, ("<broadcast>", self.param_port))
+        client = self.param_client
+        if client is not None and client.address == address and client.vehicle == self.selected_vehicle:
+            return
+        if client is not None:
+            client.close()
+        self.param_client = ParamClient(address, network=self.network, vehicle=self.selected_vehicle)
+    def on_vehicle_select(self, event):
+        selection = self.overview.selection()
+        if selection and int(selection[0]) != self.selected_vehicle:
+            self.select_vehicle(int(selection[0]))
+    def refresh_overview(self):
+        tree = self.overview
+        rows = self.overview_rows
+        pipelines = self.vehicles.pipelines
+        for vehicle in [v for v in rows if v not in pipelines]:
+            tree.delete(str(vehicle))
+            del rows[vehicle]
+        for vehicle, pipeline in pipelines.items():
+            sample, _ = pipeline.latest_sample()
+            age = pipeline.age()
+            link = "等待" if age is None else ("丢失" if age > self.stale_timeout else "正常")
+            values = (f"{sample[1]:.1f}", f"{sample[2]:.1f}", f"{sample[3]:.1f}", " ".join(f"{m * 100:.0f}" for m in sample[4:8]), link)
+            if vehicle not in rows:
+                tree.insert("", bisect.bisect(sorted(rows), vehicle), iid=str(vehicle), text=str(vehicle), values=values)
+            elif rows[vehicle] == values:
+                continue
+            else:
+                tree.item(str(vehicle), values=values)
+            rows[vehicle] = values
+        if str(self.selected_vehicle) not in tree.selection() and self.selected_vehicle in rows:
+            tree.selection_set(str(self.selected_vehicle))
+        self.connect_param_client()
+    def on_source_change(self):
+        self.switch_source(self.source_var.get())
+    def check_link(self):
+        if not self.running:
+            return
+        age = self.pipeline.age()
+        source = self.source
+        if self.source_error is not None:
+            text, color = self.source_error, "#CC0000"
+        elif source is not None and source.error is not None:
+            text, color = f"数据源错误: {source.error}", "#CC0000"
+        elif age is None:
+            text, color = "等待数据", "#888888"
+        elif age > self.stale_timeout:
+            text, color = f"链路丢失（{age:.1f}s 无数据）", "#CC0000"
+        else:
+            text, color = f"链路正常（飞行器 {self.selected_vehicle}，{self.pipeline.updates} 个样本，共 {len(self.vehicles.pipelines)} 架）", "#008800"
+        self.widget_cache.text(self.link_label, text)
+        if color != self.link_color:
+            self.link_color = color
+            self.link_label.config(fg=color)
+        self.overview_ticks += 1
+        if self.overview_ticks % 3 == 0:
+            self.refresh_overview()
+        self.root.after(100, self.check_link)
     def update_ui(self):
+        cache = self.widget_cache
+        labels = self.info_labels
+        sample, _ = self.pipeline.latest_sample()
+        self.current_roll, self.current_pitch, self.current_yaw = sample[1], sample[2], sample[3]
+        self.motor_values = sample[4:8]
+        self.sensor_values = {"accel": sample[8:11], "gyro": sample[11:14], "baro": sample[14]}
         self.update_attitude_display()
-        self.info_labels["roll_value"].config(text=f"{self.current_roll:.1f}°")
-        self.info_labels["pitch_value"].config(text=f"{self.current_pitch:.1f}°")
-        self.info_labels["yaw_value"].config(text=f"{self.current_yaw:.1f}°")
-        self.info_labels["target_roll_value"].config(text=f"{self.target_roll:.1f}°")
-        self.info_labels["target_pitch_value"].config(text=f"{self.target_pitch:.1f}°")
-        self.info_labels["target_yaw_value"].config(text=f"{self.target_yaw:.1f}°")
-        self.info_labels["throttle_value"].config(text=f"{self.target_throttle:.2f}")
-        self.info_labels["accel_x"].config(text=f"{self.sensor_values['accel'][0]:.2f}")
-        self.info_labels["accel_y"].config(text=f"{self.sensor_values['accel'][1]:.2f}")
-        self.info_labels["accel_z"].config(text=f"{self.sensor_values['accel'][2]:.2f}")
-        self.info_labels["gyro_x"].config(text=f"{self.sensor_values['gyro'][0]:.2f}")
-        self.info_labels["gyro_y"].config(text=f"{self.sensor_values['gyro'][1]:.2f}")
-        self.info_labels["gyro_z"].config(text=f"{self.sensor_values['gyro'][2]:.2f}")
-        self.info_labels["baro"].config(text=f"{self.sensor_values['baro']:.2f}")
+        self.update_charts()
+        cache.text(labels["roll_value"], f"{self.current_roll:.1f}°")
+        cache.text(labels["pitch_value"], f"{self.current_pitch:.1f}°")
+        cache.text(labels["yaw_value"], f"{self.current_yaw:.1f}°")
+        cache.text(labels["target_roll_value"], f"{self.target_roll:.1f}°")
+        cache.text(labels["target_pitch_value"], f"{self.target_pitch:.1f}°")
+        cache.text(labels["target_yaw_value"], f"{self.target_yaw:.1f}°")
+        cache.text(labels["throttle_value"], f"{self.target_throttle:.2f}")
+        cache.text(labels["accel_x"], f"{self.sensor_values['accel'][0]:.2f}")
+        cache.text(labels["accel_y"], f"{self.sensor_values['accel'][1]:.2f}")
+        cache.text(labels["accel_z"], f"{self.sensor_values['accel'][2]:.2f}")
+        cache.text(labels["gyro_x"], f"{self.sensor_values['gyro'][0]:.2f}")
+        cache.text(labels["gyro_y"], f"{self.sensor_values['gyro'][1]:.2f}")
+        cache.text(labels["gyro_z"], f"{self.sensor_values['gyro'][2]:.2f}")
+        cache.text(labels["baro"], f"{self.sensor_values['baro']:.2f}")
         for i, (bar, label) in enumerate(self.motor_bars):
-            value = self.motor_values[i] * 100
-            bar['value'] = value
-            label.config(text=f"{value:.0f}%")
+            value = round(self.motor_values[i] * 100)
+            cache.value(bar, value)
+            cache.text(label, f"{value}%")
+        now = time.monotonic()
+        if now - self.last_render_stats >= 1.0:
+            self.last_render_stats = now
+            stats = self.render_scheduler.stats()
+            cache.text(self.render_stats_label, f"刷新上限 {stats['fps_cap']:.0f}fps  已绘制 {stats['frames']} 帧  合并 {stats['coalesced']}  丢帧 {stats['dropped']}  "
+                                                f"控件更新 {cache.updates} / 跳过 {cache.skipped}\n网络 {self.network.summary()}")
+    def update_charts(self):
+        with self.pipeline.lock:
+            latest = self.history.latest_time()
+            if latest is None:
+                return
+            if not self.chart_paused or self.chart_end is None:
+                self.chart_end = latest
+            span = self.span_var.get()
+            end = self.chart_end - self.scrub_var.get()
+            view = (end, span, None if self.chart_paused else self.history.count)
+            if view == self.drawn_chart_view:
+                return
+            self.drawn_chart_view = view
+            traces = [chart.collect(end, span) for chart in self.charts]
+        for chart, trace in zip(self.charts, traces):
+            chart.render(trace)
     def update_attitude_display(self):
-        self.attitude_canvas.delete("all")
-        width = self.attitude_canvas.winfo_width()
-        height = self.attitude_canvas.winfo_height()
-        if width == 1 or height == 1:
-            width, height = self.canvas_width, self.canvas_height
-        center_x = width // 2
-        center_y = height // 2
-        radius = min(width, height) // 2 - 20
-        roll_rad = math.radians(self.current_roll)
-        pitch_rad = math.radians(self.current_pitch)
-        self.attitude_canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius, outline="#444466", fill="#000022")
-        for i in range(-90, 91, 15):
-            angle_rad = math.radians(i)
-            x1 = center_x + radius * math.cos(angle_rad)
-            y1 = center_y + radius * math.sin(angle_rad)
-            x2 = center_x + (radius - 10) * math.cos(angle_rad)
-            y2 = center_y + (radius - 10) * math.sin(angle_rad)
-            self.attitude_canvas.create_line(x1, y1, x2, y2, fill="#444466")
-            if i % 30 == 0:
-                text_x = center_x + (radius - 20) * math.cos(angle_rad)
-                text_y = center_y + (radius - 20) * math.sin(angle_rad)
-                self.attitude_canvas.create_text(text_x, text_y, text=str(i), fill="#444466")
-        for i in range(-90, 91, 15):
-            angle_rad = math.radians(i)
-            x1 = center_x + radius * math.cos(angle_rad + math.pi/2)
-            y1 = center_y + radius * math.sin(angle_rad + math.pi/2)
-            x2 = center_x + (radius - 10) * math.cos(angle_rad + math.pi/2)
-            y2 = center_y + (radius - 10) * math.sin(angle_rad + math.pi/2)
-            self.attitude_canvas.create_line(x1, y1, x2, y2, fill="#444466")
-        plane_size = radius * 0.4
-        rot_matrix = self.get_rotation_matrix(roll_rad, pitch_rad, 0)
-        points = [
-            (0, -plane_size/2, 0),
-            (plane_size/2, plane_size/2, 0),
-            (-plane_size/2, plane_size/2, 0)
-        ]
-        projected_points = []
-        for x, y, z in points:
-            x_proj, y_proj, _ = self.apply_rotation(x, y, z, rot_matrix)
-            projected_points.append((center_x + x_proj, center_y + y_proj))
-        self.attitude_canvas.create_polygon(projected_points, fill="#FF4444", outline="#FF0000")
-        wing_length = plane_size * 0.8
-        tail_length = plane_size * 0.4
-        wing_points = [
-            (center_x - wing_length/2, center_y),
-            (center_x + wing_length/2, center_y),
-            (center_x + wing_length/2, center_y + 5),
-            (center_x - wing_length/2, center_y + 5)
-        ]
-        tail_points = [
-            (center_x, center_y - plane_size/2),
-            (center_x, center_y - plane_size/2 - tail_length),
-            (center_x + 5, center_y - plane_size/2 - tail_length),
-            (center_x + 5, center_y - plane_size/2)
-        ]
-        wing_rot_matrix = self.get_rotation_matrix(roll_rad, 0, 0)
-        tail_rot_matrix = self.get_rotation_matrix(0, pitch_rad, 0)
-        rotated_wing_points = []
-        for x, y in wing_points:
-            rel_x = x - center_x
-            rel_y = y - center_y
-            rx, ry, _ = self.apply_rotation(rel_x, rel_y, 0, wing_rot_matrix)
-            rotated_wing_points.append((center_x + rx, center_y + ry))
-        rotated_tail_points = []
-        for x, y in tail_points:
-            rel_x = x - center_x
-            rel_y = y - center_y
-            rx, ry, _ = self.apply_rotation(rel_x, rel_y, 0, tail_rot_matrix)
-            rotated_tail_points.append((center_x + rx, center_y + ry))
-        self.attitude_canvas.create_polygon(rotated_wing_points, fill="#4444FF", outline="#0000FF")
-        self.attitude_canvas.create_polygon(rotated_tail_points, fill="#44FF44", outline="#00FF00")
-    def get_rotation_matrix(self, roll, pitch, yaw):
-        cr, sr = math.cos(roll), math.sin(roll)
-        cp, sp = math.cos(pitch), math.sin(pitch)
-        cy, sy = math.cos(yaw), math.sin(yaw)
-        return [
-            [cy*cp, cy*sp*sr - sy*cr, cy*sp*cr + sy*sr],
-            [sy*cp, sy*sp*sr + cy*cr, sy*sp*cr - cy*sr],
-            [-sp, cp*sr, cp*cr]
-        ]
-    def apply_rotation(self, x, y, z, rot_matrix):
-        nx = x * rot_matrix[0][0] + y * rot_matrix[0][1] + z * rot_matrix[0][2]
-        ny = x * rot_matrix[1][0] + y * rot_matrix[1][1] + z * rot_matrix[1][2]
-        nz = x * rot_matrix[2][0] + y * rot_matrix[2][1] + z * rot_matrix[2][2]
-        return (nx, ny, nz)
+        attitude = (round(self.current_roll, 1), round(self.current_pitch, 1))
+        if attitude != self.drawn_attitude:
+            self.drawn_attitude = attitude
+            self.attitude_renderer.draw(self.current_roll, self.current_pitch)
     def on_closing(self):
         self.running = False
+        self.render_scheduler.stop()
+        if self.source is not None:
+            self.source.stop()
+        if self.param_client is not None:
+            self.param_client.flush(0.5)
+            self.param_client.close()
+        self.network.stop()
+        if self.capture is not None:
+            self.capture.close()
         self.root.destroy()
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="飞控可视化调试器")
+    parser.add_argument("--fps", type=float, default=30.0, help="界面刷新帧率上限")
+    parser.add_argument("--history", type=int, default=10000, help="每架飞行器的曲线历史缓冲区样本数")
+    parser.add_argument("--source", choices=SOURCE_MODES, default="live", help="数据源：实时UDP遥测、本地仿真或日志回放")
+    parser.add_argument("--port", type=int, default=5006, help="遥测接收端口")
+    parser.add_argument("--replay", default=None, help="回放的黑匣子目录、CSV日志或抓包文件")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="回放倍速，0 表示尽快回放")
+    parser.add_argument("--stale-ms", type=float, default=500, help="超过该时间没有数据即显示链路丢失")
+    parser.add_argument("--param-port", type=int, default=5005, help="尚未收到遥测时广播参数使用的端口")
+    parser.add_argument("--capture", default=None, help="把参数和遥测通道收发的所有数据包记录到抓包文件")
+    args = parser.parse_args()
     root = tk.Tk()
-    app = FlightUISimulator(root)
+    app = FlightUISimulator(root, args.fps, args.history, args.source, args.port, args.replay, args.replay_speed, args.stale_ms, args.param_port, args.capture)
     root.mainloop()
 
 # x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,267 @@
+import threading
+import time
+from flight_telemetry import SAMPLE_FIELDS, FRAME_MAGIC, decode_frames, frame_header
+from flight_charts import HistoryBuffer
+from flight_net import shared_network
+from flight_capture import CaptureReader, Replayer, is_capture
+from flight_controller import FlightController, fill_sample
+from flight_plant import PLANT_GAINS, QuadPlant
+SOURCE_MODES = ("live", "sim", "replay")
+TARGET_FIELDS = ("target_roll", "target_pitch", "target_yaw")
+class StatePipeline:
+    def __init__(self, history, on_update=None, clock=time.monotonic):
+        self.history = history
+        self.on_update = on_update
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.latest = [0.0, 0.0, 0.0, 0.0, 0.5, 0.5, 0.5, 0.5, 0.0, 0.0, 9.8, 0.0, 0.0, 0.0, 1013.25]
+        self.targets = {"target_roll": 0.0, "target_pitch": 0.0, "target_yaw": 0.0, "target_throttle": 0.5}
+        self.updates = 0
+        self.last_update = None
+    def reset(self):
+        with self.lock:
+            self.history.clear()
+            self.updates = 0
+            self.last_update = None
+    def notify(self):
+        if self.on_update is not None:
+            self.on_update()
+    def publish(self, v):
+        targets = self.targets
+        with self.lock:
+            self.history.push((v[0], v[1], v[2], v[3], targets["target_roll"], targets["target_pitch"], targets["target_yaw"],
+                               v[4], v[5], v[6], v[7], v[11], v[12], v[13]))
+            self.latest[:] = v[:15]
+            self.updates += 1
+            self.last_update = self.clock()
+        self.notify()
+    def publish_frame(self, buffer):
+        with self.lock:
+            last = self.history.push_frame(buffer, self.targets)
+            if last is None:
+                return
+            latest = self.latest
+            for i, name in enumerate(SAMPLE_FIELDS):
+                latest[i] = float(last[name])
+            self.updates += 1
+            self.last_update = self.clock()
+        self.notify()
+    def publish_columns(self, columns, k):
+        if not k:
+            return
+        chart = {name: columns[name] for name in self.history.fields if name in columns}
+        for name in TARGET_FIELDS:
+            if name not in chart:
+                chart[name] = self.targets[name]
+        with self.lock:
+            self.history.push_columns(chart, k)
+            latest = self.latest
+            for i, name in enumerate(SAMPLE_FIELDS):
+                latest[i] = float(columns[name][k - 1])
+            self.updates += k
+            self.last_update = self.clock()
+        self.notify()
+    def latest_sample(self):
+        with self.lock:
+            return list(self.latest), self.updates
+    def age(self):
+        last = self.last_update
+        return None if last is None else self.clock() - last
+class VehicleRegistry:
+    def __init__(self, capacity=10000, on_update=None, clock=time.monotonic, max_vehicles=1024):
+        self.capacity = capacity
+        self.on_update = on_update
+        self.clock = clock
+        self.max_vehicles = max_vehicles
+        self.lock = threading.Lock()
+        self.pipelines = {}
+        self.addresses = {}
+        self.rejected = 0
+    def get(self, vehicle):
+        pipeline = self.pipelines.get(vehicle)
+        if pipeline is not None:
+            return pipeline
+        with self.lock:
+            pipeline = self.pipelines.get(vehicle)
+            if pipeline is None:
+                if len(self.pipelines) >= self.max_vehicles:
+                    self.rejected += 1
+                    raise ValueError(f"飞行器数量超过上限 {self.max_vehicles}")
+                pipeline = StatePipeline(HistoryBuffer(self.capacity), self.notify, self.clock)
+                pipelines = dict(self.pipelines)
+                pipelines[vehicle] = pipeline
+                self.pipelines = pipelines
+            return pipeline
+    def notify(self):
+        if self.on_update is not None:
+            self.on_update()
+    def vehicles(self):
+        return sorted(self.pipelines)
+    def reset(self):
+        with self.lock:
+            self.pipelines = {}
+            self.addresses = {}
+class SourceThread:
+    name = ""
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.running = False
+        self.thread = None
+        self.error = None
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.guarded_run, name=f"ui-source-{self.name}", daemon=True)
+        self.thread.start()
+    def guarded_run(self):
+        try:
+            self.run()
+        except Exception as e:
+            self.error = e
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+class UdpSource:
+    name = "live"
+    def __init__(self, registry, port=5006, network=None):
+        self.registry = registry
+        self.port = port
+        self.network = network or shared_network()
+        self.endpoint = None
+        self.error = None
+    def start(self):
+        try:
+            self.endpoint = self.network.open("telemetry", self.on_datagram, local_addr=('0.0.0.0', self.port))
+        except OSError as e:
+            self.error = e
+    def on_datagram(self, endpoint, data, addr):
+        vehicle = publish_datagram(self.registry, data)
+        if self.registry.addresses.get(vehicle) != addr:
+            self.registry.addresses[vehicle] = addr
+    def stop(self):
+        if self.endpoint is not None:
+            self.endpoint.close()
+            self.endpoint = None
+class SimSource(SourceThread):
+    name = "sim"
+    def __init__(self, pipeline, dt=0.05, seed=None, control_dt=0.01):
+        super().__init__(pipeline)
+        self.dt = dt
+        self.substeps = max(1, int(round(dt / control_dt)))
+        self.controller = FlightController(params=PLANT_GAINS, seed=seed, plant=QuadPlant())
+        self.controller.refresh_params()
+        self.sample = [0.0] * len(SAMPLE_FIELDS)
+    def run(self):
+        while self.running:
+            self.pipeline.publish(self.step())
+            time.sleep(self.dt)
+    def step(self):
+        targets = self.pipeline.targets
+        controller = self.controller
+        controller.update_setpoint({"roll": targets["target_roll"], "pitch": targets["target_pitch"], "yaw": targets["target_yaw"],
+                                    "throttle": targets["target_throttle"]})
+        dt = self.dt / self.substeps
+        for _ in range(self.substeps):
+            roll, pitch, yaw, motors = controller.step(dt)
+        fill_sample(self.sample, time.monotonic(), roll, pitch, yaw, motors, controller.sensors)
+        return self.sample
+class ReplaySource(SourceThread):
+    name = "replay"
+    def __init__(self, pipeline, path, speed=1.0, chunk_records=20000):
+        super().__init__(pipeline)
+        self.path = path
+        self.speed = speed
+        self.chunk_records = chunk_records
+        self.replayed = 0
+        self.finished = False
+    def run(self):
+        from flight_analysis import iter_chunks
+        start = None
+        base = None
+        for chunk in iter_chunks(self.path, self.chunk_records):
+            t = chunk["timestamp"]
+            n = len(t)
+            if not n:
+                continue
+            if start is None:
+                start = time.monotonic()
+                base = float(t[0])
+            columns = {name: chunk[name] for name in SAMPLE_FIELDS}
+            for axis in ("roll", "pitch", "yaw"):
+                if f"setpoint_{axis}" in chunk:
+                    columns[f"target_{axis}"] = chunk[f"setpoint_{axis}"]
+            if self.speed <= 0:
+                if not self.running:
+                    return
+                columns["timestamp"] = start + (t - base)
+                self.pipeline.publish_columns(columns, n)
+                self.replayed += n
+                continue
+            wall = start + (t - base) / self.speed
+            columns["timestamp"] = wall
+            i = 0
+            while i < n:
+                if not self.running:
+                    return
+                now = time.monotonic()
+                j = int(wall.searchsorted(now, "right"))
+                if j <= i:
+                    time.sleep(min(0.01, wall[i] - now))
+                    continue
+                self.pipeline.publish_columns({name: values[i:j] for name, values in columns.items()}, j - i)
+                self.replayed += j - i
+                i = j
+        self.finished = True
+class CaptureSource(SourceThread):
+    name = "capture"
+    def __init__(self, registry, path, speed=1.0, channel=5006):
+        super().__init__(registry.get(0))
+        self.registry = registry
+        self.reader = CaptureReader(path)
+        self.replayer = Replayer(self.reader, self.on_record, speed, (channel,))
+    def on_record(self, channel, data):
+        try:
+            publish_datagram(self.registry, data)
+        except (ValueError, KeyError, TypeError, IndexError):
+            pass
+    def start(self):
+        self.replayer.running = True
+        super().start()
+    def run(self):
+        self.replayer.run()
+    def stop(self):
+        self.replayer.running = False
+        super().stop()
+        self.reader.close()
+def publish_datagram(registry, data):
+    if data[:2] == FRAME_MAGIC:
+        vehicle = frame_header(data)[0]
+        registry.get(vehicle).publish_frame(data)
+        return vehicle
+    vehicle = 0
+    for message in decode_frames(data):
+        vehicle = message.get("vehicle", 0)
+        registry.get(vehicle).publish(message_to_sample(message))
+    return vehicle
+def message_to_sample(message):
+    motors = message["motors"]
+    sensors = message["sensors"]
+    accel = sensors["accel"]
+    gyro = sensors["gyro"]
+    return (message.get("timestamp", time.monotonic()), message["roll"], message["pitch"], message["yaw"],
+            motors[0], motors[1], motors[2], motors[3], accel[0], accel[1], accel[2], gyro[0], gyro[1], gyro[2], sensors["baro"])
+def create_source(mode, registry, port=5006, replay_path=None, replay_speed=1.0, network=None):
+    if mode == "live":
+        return UdpSource(registry, port, network)
+    if mode == "sim":
+        return SimSource(registry.get(0))
+    if mode == "replay":
+        if not replay_path:
+            raise ValueError("回放模式需要指定日志路径")
+        if is_capture(replay_path):
+            return CaptureSource(registry, replay_path, replay_speed, port)
+        return ReplaySource(registry.get(0), replay_path, replay_speed)
+    raise ValueError(f"未知数据源: {mode}")
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,36 @@
+import pytest
+from flight_blackbox import RECORD_FIELDS, BlackboxReader, BlackboxWriter
+def write_run(directory, times, segment_records=100):
+    writer = BlackboxWriter(str(directory), segment_records=segment_records)
+    sample = [0.0] * len(RECORD_FIELDS)
+    for t in times:
+        sample[0] = t
+        writer(sample)
+    writer.close()
+    return writer.session
+def test_each_writer_starts_a_new_session(tmp_path):
+    assert write_run(tmp_path, [0.01 * i for i in range(1, 201)]) == 0
+    assert write_run(tmp_path, [0.01 * i for i in range(1, 151)]) == 1
+    reader = BlackboxReader(str(tmp_path))
+    assert reader.sessions == [0, 1]
+    assert reader.session == 1
+    assert len(reader) == 150
+    assert len(list(reader.records(0.5, 1.0))) == 51
+    reader.close()
+    reader = BlackboxReader(str(tmp_path), session=0)
+    assert len(reader) == 200
+    assert reader.time_range() == pytest.approx((0.01, 2.0))
+    reader.close()
+def test_segments_span_time_ranges(tmp_path):
+    write_run(tmp_path, [0.01 * i for i in range(1, 251)], segment_records=60)
+    reader = BlackboxReader(str(tmp_path))
+    assert len(reader.segments) == 5
+    times = [r[0] for r in reader.records(0.55, 0.65)]
+    assert times == pytest.approx([0.01 * i for i in range(55, 66)])
+    reader.close()
+def test_non_monotonic_segments_are_rejected(tmp_path):
+    write_run(tmp_path, [1.0 + 0.01 * i for i in range(10)] + [0.01 * i for i in range(10)], segment_records=10)
+    with pytest.raises(ValueError):
+        BlackboxReader(str(tmp_path))
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,53 @@
+import math
+import pytest
+from flight_estimator import ESTIMATOR_MODES, GRAVITY, AttitudeEstimator
+def gravity_for(roll, pitch):
+    r = math.radians(roll)
+    p = math.radians(pitch)
+    return [-GRAVITY * math.sin(p), GRAVITY * math.sin(r) * math.cos(p), GRAVITY * math.cos(r) * math.cos(p)]
+@pytest.mark.parametrize("mode", ESTIMATOR_MODES)
+def test_converges_to_static_tilt(mode):
+    estimator = AttitudeEstimator(mode)
+    estimator.update([0.0, 0.0, GRAVITY], [0.0, 0.0, 0.0], 0.01)
+    accel = gravity_for(20.0, -10.0)
+    for _ in range(1500):
+        roll, pitch, _ = estimator.update(accel, [0.0, 0.0, 0.0], 0.01)
+    assert roll == pytest.approx(20.0, abs=1.0)
+    assert pitch == pytest.approx(-10.0, abs=1.0)
+@pytest.mark.parametrize("mode", ESTIMATOR_MODES)
+def test_first_sample_initializes_from_gravity(mode):
+    roll, pitch, yaw = AttitudeEstimator(mode).update(gravity_for(15.0, 5.0), [0.0, 0.0, 0.0], 0.01)
+    assert (roll, pitch, yaw) == pytest.approx((15.0, 5.0, 0.0), abs=0.1)
+@pytest.mark.parametrize("mode", ESTIMATOR_MODES)
+def test_integrates_yaw_rate(mode):
+    estimator = AttitudeEstimator(mode)
+    for _ in range(100):
+        _, _, yaw = estimator.update([0.0, 0.0, GRAVITY], [0.0, 0.0, math.radians(30.0)], 0.01)
+    assert yaw == pytest.approx(30.0, abs=0.5)
+def test_mahony_removes_gyro_bias_and_complementary_does_not():
+    errors = {}
+    for mode in ("complementary", "mahony"):
+        estimator = AttitudeEstimator(mode)
+        for _ in range(3000):
+            roll, _, _ = estimator.update([0.0, 0.0, GRAVITY], [0.02, 0.0, 0.0], 0.01)
+        errors[mode] = abs(roll)
+    assert errors["complementary"] == pytest.approx(math.degrees(0.02), rel=0.05)
+    assert errors["mahony"] < 0.5 * errors["complementary"]
+@pytest.mark.parametrize("mode", ESTIMATOR_MODES)
+def test_ignores_accel_outside_gravity_gate(mode):
+    estimator = AttitudeEstimator(mode)
+    estimator.update([0.0, 0.0, GRAVITY], [0.0, 0.0, 0.0], 0.01)
+    for _ in range(200):
+        roll, pitch, _ = estimator.update([0.0, 2.0 * GRAVITY, 0.5 * GRAVITY], [0.0, 0.0, 0.0], 0.01)
+    assert (roll, pitch) == pytest.approx((0.0, 0.0), abs=1e-6)
+def test_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        AttitudeEstimator("madgwick")
+def test_reset_returns_to_level():
+    estimator = AttitudeEstimator("ekf")
+    estimator.update(gravity_for(30.0, 0.0), [0.0, 0.0, 0.0], 0.01)
+    estimator.reset()
+    assert estimator.update([0.0, 0.0, GRAVITY], [0.0, 0.0, 0.0], 0.01) == pytest.approx((0.0, 0.0, 0.0), abs=1e-6)
+    assert estimator.stats()["updates"] == 1
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,21 @@
+import json
+import pytest
+from flight_headless import load_scenario
+def write(tmp_path, data):
+    path = tmp_path / "scenario.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+def test_scenario_params_are_validated_and_converted(tmp_path):
+    path = write(tmp_path, {"duration": 2.0, "wind_strength": "0.4", "simulate_wind": "true",
+                            "events": [{"time": 1.0, "params": {"roll_kp": 1}}]})
+    scenario = load_scenario(path, str(tmp_path / "missing.json"))
+    assert scenario["duration"] == 2.0
+    assert scenario["params"] == {"wind_strength": 0.4, "simulate_wind": True}
+    assert scenario["events"] == [{"time": 1.0, "params": {"roll_kp": 1.0}}]
+@pytest.mark.parametrize("data", [{"wind_strenght": 0.4}, {"roll_kp": "fast"},
+                                  {"events": [{"time": 1.0, "params": {"failure_typ": "motor1"}}]}])
+def test_unknown_or_bad_scenario_keys_are_rejected(tmp_path, data):
+    with pytest.raises(ValueError):
+        load_scenario(write(tmp_path, data), str(tmp_path / "missing.json"))
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from flight_batch import DEFAULT_PARAMS, BatchSimulator
+from flight_controller import FlightController
+from flight_pid import PIDBank
+from flight_plant import PLANT_GAINS, QuadPlant
+GAINS = ((2.5, 0.1, 0.5), (2.5, 0.1, 0.5), (1.0, 0.05, 0.2))
+def test_integral_is_clamped():
+    bank = PIDBank(gains=((0.0, 10.0, 0.0),) * 3, i_limit=0.3)
+    for _ in range(100):
+        output = bank.compute([5.0, -5.0, 0.01], [0.0, 0.0, 0.0], 0.01)
+    assert bank.i_terms[:2] == [0.3, -0.3]
+    assert output[:2] == [0.3, -0.3]
+    assert 0.0 < bank.i_terms[2] < 0.3
+def test_per_axis_integral_limits():
+    bank = PIDBank(gains=((0.0, 10.0, 0.0),) * 3, i_limit=[0.1, 0.2, 0.3])
+    for _ in range(100):
+        bank.compute([5.0, 5.0, 5.0], [0.0, 0.0, 0.0], 0.01)
+    assert bank.i_terms == [0.1, 0.2, 0.3]
+def test_derivative_is_low_pass_filtered():
+    raw = PIDBank(gains=((0.0, 0.0, 1.0),) * 3, d_cutoff=0.0)
+    filtered = PIDBank(gains=((0.0, 0.0, 1.0),) * 3, d_cutoff=5.0)
+    assert raw.compute([1.0, 0.0, 0.0], [0.0, 0.0, 0.0], 0.01)[0] == pytest.approx(100.0)
+    first = filtered.compute([1.0, 0.0, 0.0], [0.0, 0.0, 0.0], 0.01)[0]
+    assert 0.0 < first < 100.0
+    for _ in range(200):
+        last = filtered.compute([1.0, 0.0, 0.0], [0.0, 0.0, 0.0], 0.01)[0]
+    assert abs(last) < 1e-3
+def test_back_calculation_unwinds_integral_when_saturated():
+    bank = PIDBank(gains=((1.0, 1.0, 0.0),) * 3, i_limit=10.0, aw_gain=10.0)
+    plain = PIDBank(gains=((1.0, 1.0, 0.0),) * 3, i_limit=10.0, aw_gain=10.0)
+    for _ in range(100):
+        output = bank.compute([2.0, 0.0, 0.0], [0.0, 0.0, 0.0], 0.01)
+        bank.back_calculate([0.5, output[1], output[2]], 0.01)
+        plain.compute([2.0, 0.0, 0.0], [0.0, 0.0, 0.0], 0.01)
+    assert plain.i_terms[0] == pytest.approx(2.0)
+    assert bank.i_terms[0] < 0.1 * plain.i_terms[0]
+    assert bank.saturated == 100
+def test_back_calculation_skips_axes_without_integral():
+    bank = PIDBank(gains=((1.0, 0.0, 0.0),) * 3)
+    bank.compute([2.0, 0.0, 0.0], [0.0, 0.0, 0.0], 0.01)
+    bank.back_calculate([0.5, 0.0, 0.0], 0.01)
+    assert bank.i_terms == [0.0, 0.0, 0.0]
+    assert bank.saturated == 1
+def test_gain_and_dt_changes_take_effect():
+    bank = PIDBank(gains=((0.0, 1.0, 0.0),) * 3, i_limit=100.0)
+    bank.compute([1.0, 1.0, 1.0], [0.0, 0.0, 0.0], 0.01)
+    bank.compute([1.0, 1.0, 1.0], [0.0, 0.0, 0.0], 0.02)
+    assert bank.i_terms[0] == pytest.approx(0.03)
+    bank.set_gains(((0.0, 2.0, 0.0),) * 3, i_limit=100.0)
+    bank.compute([1.0, 1.0, 1.0], [0.0, 0.0, 0.0], 0.02)
+    assert bank.i_terms[0] == pytest.approx(0.07)
+def test_extra_axis_does_not_change_other_axes():
+    three = PIDBank(gains=GAINS)
+    four = PIDBank(axes=("roll", "pitch", "yaw", "z"), gains=GAINS + ((1.0, 1.0, 1.0),))
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        measured = rng.normal(0.0, 5.0, 4).tolist()
+        expected = list(three.compute([5.0, -3.0, 10.0], measured[:3], 0.01))
+        assert four.compute([5.0, -3.0, 10.0, 0.0], measured, 0.01)[:3] == pytest.approx(expected)
+def test_set_gains_rejects_wrong_axis_count():
+    with pytest.raises(ValueError):
+        PIDBank(gains=GAINS[:2])
+def test_batch_engine_matches_pid_bank():
+    base = dict(DEFAULT_PARAMS, target_roll=20.0, target_pitch=-5.0, target_yaw=3.0, target_throttle=0.5,
+                roll_kp=0.05, roll_ki=0.4, roll_kd=0.01, pid_integral_limit=0.2)
+    sim = BatchSimulator(base_params=base, dt=0.01)
+    gains = tuple((base[f"{axis}_kp"], base[f"{axis}_ki"], base[f"{axis}_kd"]) for axis in ("roll", "pitch", "yaw"))
+    bank = PIDBank(gains=gains, i_limit=0.2, d_cutoff=base["pid_derivative_cutoff"], aw_gain=base["pid_antiwindup_gain"])
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        attitude = rng.normal(0.0, 5.0, 3)
+        batch_output = sim.compute_pid(attitude[None, :])[0].copy()
+        motors, _, clipped = sim.mix(sim.pid_output)
+        sim.back_calculate(motors, clipped)
+        roll, pitch, yaw = bank.compute(sim.target[0], attitude, 0.01)
+        assert [roll, pitch, yaw] == pytest.approx(batch_output.tolist(), abs=1e-9)
+        raw = [0.5 + roll + pitch - yaw, 0.5 - roll + pitch + yaw, 0.5 - roll - pitch - yaw, 0.5 + roll - pitch + yaw]
+        m1, m2, m3, m4 = [min(1.0, max(0.0, m)) for m in raw]
+        if [m1, m2, m3, m4] != raw:
+            bank.back_calculate([(m1 - m2 - m3 + m4) * 0.25, (m1 + m2 - m3 - m4) * 0.25, (m2 + m4 - m1 - m3) * 0.25], 0.01)
+        assert bank.i_terms == pytest.approx(sim.i_terms[0].tolist(), abs=1e-9)
+@pytest.mark.parametrize("estimator", ["complementary", "mahony", "accel"])
+def test_batch_engine_matches_controller_and_plant(estimator):
+    base = dict(DEFAULT_PARAMS, **PLANT_GAINS, target_roll=10.0, target_pitch=-5.0, target_yaw=3.0, target_throttle=0.55,
+                accel_noise=0.0, gyro_noise=0.0, simulate_wind=True)
+    sim = BatchSimulator(base_params=base, dt=0.01, estimator=estimator)
+    controller = FlightController(params=base, estimator=estimator, seed=0, plant=QuadPlant())
+    for _ in range(300):
+        controller.step(0.01)
+        sim.step()
+        assert sim.angle[0].tolist() == pytest.approx(controller.plant.attitude(), abs=1e-9)
+    assert sim.state[2][0] == pytest.approx(controller.plant.state[2], abs=1e-9)
+    assert sim.motor_state[0].tolist() == pytest.approx(controller.plant.motor, abs=1e-12)
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,77 @@
+import socket
+import pytest
+from flight_protocol import ParamClient, decode_ack, decode_param_message, encode_ack, encode_param_batch, is_ack
+from flight_controller import FlightController
+from flight_net import NetworkLoop
+def test_batch_round_trip():
+    updates = {"roll_kp": 1.5, "simulate_wind": True}
+    assert decode_param_message(encode_param_batch(7, updates)) == (7, updates, None)
+    assert decode_param_message(encode_param_batch(8, updates, vehicle=3)) == (8, updates, 3)
+def test_single_param_message_is_a_one_item_batch():
+    assert decode_param_message(b'{"param": "roll_kp", "value": 2.0}') == (None, {"roll_kp": 2.0}, None)
+@pytest.mark.parametrize("data", [b"not json", b"[1, 2]", b'{"type": "params", "params": [1]}',
+                                  b'{"type": "params", "params": {}, "vehicle": "x"}', b'{"type": "other"}'])
+def test_malformed_messages_raise(data):
+    with pytest.raises(ValueError):
+        decode_param_message(data)
+def test_ack_round_trip():
+    data = encode_ack(5, 12, ["roll_kp"], ["bogus"], vehicle=2)
+    assert is_ack(data)
+    assert not is_ack(encode_param_batch(5, {"roll_kp": 1.0}))
+    assert decode_ack(data) == {"type": "ack", "seq": 5, "version": 12, "applied": ["roll_kp"], "rejected": ["bogus"], "vehicle": 2}
+    assert decode_ack(b"garbage") is None
+@pytest.fixture
+def link():
+    network = NetworkLoop("test-net").start()
+    controller = FlightController(vehicle_id=1, params={}, network=network)
+    endpoint = controller.start_param_server(0)
+    client = ParamClient(("127.0.0.1", endpoint.port), min_interval=0.0, network=network, vehicle=1)
+    yield controller, client
+    client.close()
+    endpoint.close()
+    network.stop()
+def test_send_applies_batch_and_acks(link):
+    controller, client = link
+    version = controller.params.version
+    ack = client.send({"roll_kp": 1.5, "pitch_kd": 0.3, "bogus": 1}, timeout=2.0)
+    assert ack is not None
+    assert sorted(ack["applied"]) == ["pitch_kd", "roll_kp"]
+    assert ack["rejected"] == ["bogus"]
+    assert ack["version"] == version + 1 == controller.params.version
+    assert controller.params.roll_kp == 1.5
+    assert controller.params.pitch_kd == 0.3
+def test_updates_coalesce_and_flush(link):
+    controller, client = link
+    client.update({"roll_kp": 1.0})
+    client.update({"roll_kp": 2.0, "yaw_ki": 0.01})
+    assert client.flush(2.0)
+    assert controller.params.roll_kp in (1.0, 2.0)
+    client.set("roll_kp", 3.0)
+    assert client.flush(2.0)
+    assert controller.params.roll_kp == 3.0
+    assert controller.params.yaw_ki == 0.01
+    assert client.stats()["acked"] >= 1
+def test_messages_for_other_vehicles_are_ignored(link):
+    controller, client = link
+    client.vehicle = 2
+    assert client.send({"roll_kp": 9.0}, timeout=0.3) is None
+    assert controller.params.roll_kp != 9.0
+    assert controller.filtered_messages == 1
+def test_unacked_batch_is_retransmitted_then_dropped():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    network = NetworkLoop("test-net").start()
+    client = ParamClient(("127.0.0.1", port), min_interval=0.0, ack_timeout=0.02, max_retries=2, network=network)
+    try:
+        client.update({"roll_kp": 1.0})
+        assert client.flush(2.0)
+        stats = client.stats()
+        assert stats["retransmits"] == 2
+        assert stats["failed"] >= 1
+        assert stats["acked"] == 0
+    finally:
+        client.close()
+        network.stop()
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,100 @@
+import threading
+import pytest
+from flight_ring import RingWorker, SampleRing
+def pop_all(ring):
+    out = [0.0] * ring.width
+    rows = []
+    while ring.pop(out):
+        rows.append(list(out))
+    return rows
+def test_wraparound_keeps_order():
+    ring = SampleRing(4, 2)
+    out = [0.0, 0.0]
+    for i in range(3):
+        ring.push([i, -i])
+    assert ring.pop(out) and out == [0, 0]
+    assert ring.pop(out) and out == [1, -1]
+    for i in range(3, 6):
+        ring.push([i, -i])
+    assert pop_all(ring) == [[i, -i] for i in range(2, 6)]
+    assert ring.stats()["dropped"] == 0
+def test_full_ring_at_rest_pops_every_sample():
+    for policy in ("drop_oldest", "drop_newest"):
+        ring = SampleRing(4, 1, policy)
+        for i in range(4):
+            assert ring.push([i])
+        assert pop_all(ring) == [[0], [1], [2], [3]]
+        assert ring.stats()["dropped"] == 0
+def test_drop_oldest_overwrites_tail():
+    ring = SampleRing(4, 1, "drop_oldest")
+    for i in range(6):
+        assert ring.push([i])
+    assert pop_all(ring) == [[2], [3], [4], [5]]
+    stats = ring.stats()
+    assert stats["dropped_oldest"] == 2
+    assert stats["popped"] == 4
+    assert stats["high_watermark"] == 4
+def test_drop_newest_rejects_when_full():
+    ring = SampleRing(4, 1, "drop_newest")
+    accepted = [ring.push([i]) for i in range(6)]
+    assert accepted == [True] * 4 + [False] * 2
+    assert pop_all(ring) == [[0], [1], [2], [3]]
+    assert ring.stats()["dropped_newest"] == 2
+    assert ring.push([9])
+    assert pop_all(ring) == [[9]]
+def test_rejects_bad_configuration():
+    with pytest.raises(ValueError):
+        SampleRing(0, 1)
+    with pytest.raises(ValueError):
+        SampleRing(4, 1, "drop_random")
+def test_concurrent_overwrite_never_returns_torn_rows():
+    ring = SampleRing(4, 64, "drop_oldest")
+    stop = threading.Event()
+    def produce():
+        k = 0
+        while not stop.is_set():
+            ring.push([float(k)] * 64)
+            k += 1
+    thread = threading.Thread(target=produce)
+    thread.start()
+    out = [0.0] * 64
+    torn = popped = 0
+    try:
+        for _ in range(50000):
+            if ring.pop(out):
+                popped += 1
+                if min(out) != max(out):
+                    torn += 1
+    finally:
+        stop.set()
+        thread.join()
+    assert popped > 0
+    assert torn == 0
+def test_worker_stop_timeout_leaves_drain_to_worker():
+    ring = SampleRing(16, 1)
+    release = threading.Event()
+    seen = []
+    def sink(sample):
+        release.wait()
+        seen.append(sample[0])
+    worker = RingWorker(ring, [sink], poll_interval=0.001)
+    worker.start()
+    for i in range(5):
+        ring.push([i])
+    while ring.stats()["pending"] == 5:
+        pass
+    assert worker.stop(timeout=0.05) is False
+    assert seen == []
+    release.set()
+    worker.thread.join(1.0)
+    assert seen == [0, 1, 2, 3, 4]
+def test_worker_stop_drains_remaining_samples():
+    ring = SampleRing(16, 1)
+    seen = []
+    worker = RingWorker(ring, [lambda sample: seen.append(sample[0])])
+    for i in range(3):
+        ring.push([i])
+    assert worker.stop() is True
+    assert seen == [0, 1, 2]
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,89 @@
+import json
+import os
+import pytest
+import flight_store
+from flight_schema import DEFAULT_PARAMS
+from flight_store import ParamStore, VERSION_KEY
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+def test_missing_file_is_created_with_defaults(tmp_path):
+    path = tmp_path / "params.json"
+    store = ParamStore(str(path))
+    data = read(path)
+    assert data.pop(VERSION_KEY) == 1 == store.version
+    assert data == DEFAULT_PARAMS
+    assert os.listdir(tmp_path) == ["params.json"]
+def test_update_writes_atomically_and_bumps_version(tmp_path):
+    path = str(tmp_path / "params.json")
+    store = ParamStore(path)
+    assert store.update({"roll_kp": 1.25, "simulate_wind": "true"}) == 2
+    data = read(path)
+    assert data["roll_kp"] == 1.25
+    assert data["simulate_wind"] is True
+    assert data[VERSION_KEY] == 2
+    assert os.listdir(tmp_path) == ["params.json"]
+    assert store.update({"roll_kp": 1.25}) == 2
+    assert store.stats()["writes"] == 2
+def test_invalid_update_leaves_file_untouched(tmp_path):
+    path = str(tmp_path / "params.json")
+    store = ParamStore(path)
+    before = read(path)
+    with pytest.raises(ValueError):
+        store.update({"no_such_param": 1})
+    with pytest.raises(ValueError):
+        store.update({"roll_kp": "fast"})
+    assert read(path) == before
+def test_failed_write_keeps_previous_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "params.json")
+    store = ParamStore(path)
+    before = read(path)
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(flight_store.json, "dump", broken)
+    with pytest.raises(OSError):
+        store.update({"roll_kp": 9.0})
+    monkeypatch.undo()
+    assert read(path) == before
+    assert os.listdir(tmp_path) == ["params.json"]
+def test_batch_writes_once(tmp_path):
+    store = ParamStore(str(tmp_path / "params.json"))
+    with store.batch():
+        store.set("roll_kp", 1.0)
+        store.set("pitch_kp", 1.1)
+        store.update({"yaw_kp": 0.4})
+    assert store.stats()["writes"] == 2
+    assert store.version == 2
+    assert (store.get("roll_kp"), store.get("pitch_kp"), store.get("yaw_kp")) == (1.0, 1.1, 0.4)
+def test_reload_picks_up_external_edits_and_notifies(tmp_path):
+    path = str(tmp_path / "params.json")
+    store = ParamStore(path)
+    other = ParamStore(path)
+    seen = []
+    store.subscribe(lambda changes, version: seen.append((changes, version)))
+    other.update({"roll_kd": 0.7})
+    assert store.reload() == {"roll_kd": 0.7}
+    assert seen == [({"roll_kd": 0.7}, 2)]
+    assert store.reload() == {}
+    assert store.get("roll_kd") == 0.7
+def test_unknown_keys_survive_rewrites(tmp_path):
+    path = str(tmp_path / "params.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"roll_kp": 2.0, "notes": "bench rig"}, f)
+    store = ParamStore(path)
+    assert store.get("roll_kp") == 2.0
+    store.set("roll_kp", 2.5)
+    data = read(path)
+    assert data["notes"] == "bench rig"
+    assert data["roll_kp"] == 2.5
+def test_corrupt_file_keeps_last_good_values(tmp_path):
+    path = str(tmp_path / "params.json")
+    store = ParamStore(path)
+    store.set("roll_kp", 1.75)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{\"roll_kp\": ")
+    assert store.reload() == {}
+    assert store.get("roll_kp") == 1.75
+    assert store.stats()["errors"] == 1
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,26 @@
+import pytest
+from flight_sweep import RunMetrics, run_case
+def scenario(params, events=()):
+    return {"params": dict(params), "duration": 1.0, "rate": 100.0, "seed": 0, "events": list(events),
+            "estimator": "complementary", "plant": None, "sensor_file": None}
+def sample(time, motors):
+    return [time, 0.0, 0.0, 0.0] + list(motors)
+def test_failed_motor_is_not_counted_as_saturation():
+    metrics = RunMetrics({"simulate_failure": True, "failure_type": "motor1"})
+    metrics(sample(0.01, (0.0, 0.7, 0.3, 0.7)))
+    metrics(sample(0.02, (0.0, 1.0, 0.3, 0.7)))
+    assert metrics.result()["saturation"] == 0.5
+def test_failure_events_switch_the_excluded_motor():
+    events = [{"time": 0.02, "params": {"simulate_failure": True, "failure_type": "motor2"}},
+              {"time": 0.03, "params": {"simulate_failure": False}}]
+    metrics = RunMetrics({}, events)
+    metrics(sample(0.01, (0.5, 0.0, 0.5, 0.5)))
+    metrics(sample(0.02, (0.7, 0.0, 0.7, 0.3)))
+    metrics(sample(0.03, (0.5, 0.0, 0.5, 0.5)))
+    assert metrics.result()["saturation"] == pytest.approx(2 / 3)
+def test_motor_failure_run_reports_no_saturation():
+    result = run_case((0, {}, scenario({"simulate_failure": True, "failure_type": "motor3"})))
+    assert result["metrics"]["steps"] == 100
+    assert result["metrics"]["saturation"] == 0.0
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,30 @@
+import json
+import pytest
+from flight_telemetry import FRAME_MAGIC, FRAME_VERSION, HEADER, SAMPLE, decode_frames, frame_header
+def frame(count, vehicle=3, samples=None):
+    data = bytearray(HEADER.pack(FRAME_MAGIC, FRAME_VERSION, count, vehicle))
+    for i in range(count if samples is None else samples):
+        data += SAMPLE.pack(i, float(i), *range(14))
+    return bytes(data)
+def test_frame_header_reads_vehicle_and_count():
+    assert frame_header(frame(2)) == (3, 2, HEADER.size)
+    assert [m["seq"] for m in decode_frames(frame(2))] == [0, 1]
+@pytest.mark.parametrize("data", [b"", b"F", b"FT", b"FT\x02", b"XX\x02\x00\x00\x00"])
+def test_frame_header_rejects_short_datagrams(data):
+    with pytest.raises(ValueError):
+        frame_header(data)
+@pytest.mark.parametrize("count,samples", [(3, 2), (1, 2), (2, 0)])
+def test_frame_header_rejects_count_mismatch(count, samples):
+    with pytest.raises(ValueError):
+        frame_header(frame(count, samples=samples))
+def test_decode_frames_accepts_json_objects():
+    assert decode_frames(b'{"seq": 1}') == [{"seq": 1}]
+    batch = json.dumps({"vehicle": 2, "samples": [{"seq": 1}, {"seq": 2, "vehicle": 5}]}).encode()
+    assert [(m["seq"], m["vehicle"]) for m in decode_frames(batch)] == [(1, 2), (2, 5)]
+    assert decode_frames(b'[{"seq": 1}]') == [{"seq": 1, "vehicle": 0}]
+@pytest.mark.parametrize("data", [b"5", b"[1, 2]", b'"text"', b"null", b'{"samples": [1]}', b"[{}, 3]", b"{"])
+def test_decode_frames_rejects_non_object_json(data):
+    with pytest.raises(ValueError):
+        decode_frames(data)
+
+# x0r_fl0w
\ No newline at end of file
@@ -0,0 +1,46 @@
+import threading
+import numpy as np
+from flight_charts import HistoryBuffer, StripChart
+from flight_ui_sources import StatePipeline
+class Canvas:
+    def __init__(self, width=200, height=50):
+        self.size = {"width": width, "height": height}
+        self.items = 0
+    def __getitem__(self, key):
+        return self.size[key]
+    def create_line(self, *args, **kwargs):
+        self.items += 1
+        return self.items
+    create_text = create_line
+    def coords(self, item, *args):
+        pass
+    def itemconfig(self, item, **kwargs):
+        pass
+    def tag_lower(self, item):
+        pass
+    def bind(self, event, callback):
+        pass
+def sample(t):
+    return [t, 1.0, 2.0, 3.0, 0.5, 0.5, 0.5, 0.5, 0.0, 0.0, 9.8, 0.1, 0.2, 0.3, 1013.25]
+def test_history_writes_wait_for_pipeline_lock():
+    pipeline = StatePipeline(HistoryBuffer(100))
+    with pipeline.lock:
+        thread = threading.Thread(target=pipeline.publish, args=(sample(1.0),))
+        thread.start()
+        thread.join(0.05)
+        assert pipeline.history.count == 0
+    thread.join(1.0)
+    assert pipeline.history.count == 1
+    assert pipeline.latest_sample() == (sample(1.0), 1)
+def test_collected_traces_do_not_alias_history():
+    history = HistoryBuffer(8)
+    chart = StripChart(Canvas(), history, [("roll", "")])
+    for i in range(8):
+        history.push((i * 0.1, float(i)) + (0.0,) * 12)
+    (xs, ys), = chart.collect(0.7, 1.0)
+    before = ys.copy()
+    for i in range(8, 16):
+        history.push((i * 0.1, -1.0) + (0.0,) * 12)
+    assert np.array_equal(ys, before)
+
+# x0r_fl0w
\ No newline at end of file